@@ -0,0 +1,51 @@
+"""Pool of reusable agent executors.
+
+Executors are built once (lazily, up to ``size``) and checked out for the
+duration of one request, so concurrent Streamlit sessions never share an
+executor mid-run and nobody pays for initialize_agent on every question.
+"""
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+
+class ExecutorPool:
+    def __init__(self, factory, size=None):
+        self.factory = factory
+        self.size = size or int(os.getenv("AGENT_POOL_SIZE", "4"))
+        self._idle = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _checkout(self, timeout):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self.factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        # Pool exhausted: wait for another session to hand one back
+        return self._idle.get(timeout=timeout)
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        executor = self._checkout(timeout)
+        try:
+            yield executor
+        finally:
+            self._idle.put(executor)
+
+    def stats(self):
+        return {"size": self.size, "created": self._created, "idle": self._idle.qsize()}
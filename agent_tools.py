@@ -1,42 +1,66 @@
-import os
-import json
 from dotenv import load_dotenv
-from langchain.llms import Cohere
-from langchain.vectorstores import Chroma
-from langchain.embeddings import HuggingFaceEmbeddings
-from langchain.docstore.document import Document
-from langchain.chains import RetrievalQA
-from langchain.chains.question_answering import load_qa_chain
-from langchain.agents import Tool
+from faq_index import faq_retriever
+from registry import registry
+from semantic_cache import create_semantic_cache
+from agent_pool import ExecutorPool
+from tracing import langchain_callbacks
+from tool_memo import memoize
 
 load_dotenv()
-llm = Cohere(cohere_api_key=os.getenv("COHERE_API_KEY"))
+
 def load_faq_chain(llm):
-    with open("faq_data.json", "r") as f:
-        faqs = json.load(f)
-
-    docs = [Document(page_content=f"{faq['question']} - {faq['answer']}") for faq in faqs]
-    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-    vectorstore = Chroma.from_documents(
-        documents=docs,
-        embedding=embeddings,
-        persist_directory="./chroma_db"
-    )
+    RetrievalQA = registry.import_module("langchain.chains").RetrievalQA
+    load_qa_chain = registry.import_module("langchain.chains.question_answering").load_qa_chain
+
+    # Reuses the persisted index; only added/edited FAQ entries are embedded
+    retriever = faq_retriever("admission", "./chroma_db", k=2)
 
     qa_chain = load_qa_chain(llm=llm, chain_type="stuff")
 
     return RetrievalQA(
-        retriever=vectorstore.as_retriever(search_kwargs={"k": 2}),
+        retriever=retriever,
         combine_documents_chain=qa_chain
     )
 
-faq_chain = load_faq_chain(llm)
 
+def answer_faq(question):
+    """Answer from the semantic cache when a similar question was seen, else run the FAQ chain."""
+    return registry.get("faq_answer_cache").get_or_compute(
+        question, lambda q: registry.get("faq_chain").run(q, callbacks=langchain_callbacks())
+    )
+
+
+def create_faq_tool():
+    Tool = registry.import_module("langchain.agents").Tool
+    return Tool(
+        name="FAQ Retriever",
+        func=memoize("FAQ Retriever", answer_faq, ttl=3600, llm_calls=1, sources=["faq_data.json"]),
+        description="Use this to answer FAQs related to student admission."
+    )
+
+
+def create_faq_agent():
+    agents = registry.import_module("langchain.agents")
+    return agents.initialize_agent(
+        tools=[registry.get("faq_tool")],
+        llm=registry.get("streaming_llm"),
+        agent=agents.AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        verbose=False,
+        handle_parsing_errors=True,
+        return_intermediate_steps=True
+    )
+
+
+registry.register("faq_chain", lambda: load_faq_chain(registry.get("llm")))
+registry.register("faq_tool", create_faq_tool)
+registry.register("faq_agent_pool", lambda: ExecutorPool(create_faq_agent))
+registry.register("faq_answer_cache", lambda: create_semantic_cache(registry.get("embeddings"), ["faq_data.json"]))
 
-faq_tool = Tool(
-    name="FAQ Retriever",
-    func=lambda q: faq_chain.run(q),
-    description="Use this to answer FAQs related to student admission."
-)
 
-tools = [faq_tool]
+def __getattr__(name):
+    # Module-level objects are built on first access through the shared registry
+    if name in ("llm", "faq_chain", "faq_tool"):
+        return registry.get(name)
+    if name == "tools":
+        return [registry.get("faq_tool")]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
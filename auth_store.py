@@ -0,0 +1,185 @@
+"""Shared user accounts and login sessions.
+
+Users and sessions live in SQLite (``AUTH_STORE_PATH``, default ``auth.db``,
+WAL mode), so every Streamlit process behind a load balancer sees the same
+accounts, and a session started on one replica is valid on the others.
+Passwords are stored as salted PBKDF2-SHA256 hashes. A session is a random
+token kept in the page URL (``?session=``), so a refresh or a request routed
+to another replica resumes it; only a hash of the token is stored. Sessions
+expire after ``SESSION_TIMEOUT_MINUTES`` of inactivity.
+
+The URL token is a bearer credential: it ends up in browser history and in
+links people share, and whoever has it is logged in until logout or the idle
+timeout. That is the price of resuming sessions without cookies, which
+Streamlit can't set. Every login issues a fresh token and revokes the one the
+browser held before.
+
+Successful password checks are cached in memory for
+``AUTH_CACHE_TTL_SECONDS``, so reruns of a page don't re-hash the password.
+Cached sessions skip the ``last_active`` write for as long, but every lookup
+still reads the session row, so a logout or purge on any replica takes
+effect at once.
+"""
+import os
+import hmac
+import time
+import sqlite3
+import hashlib
+import secrets
+import threading
+from cache_utils import LRUCache
+from registry import registry
+
+ROLES = ("Admin", "Document Checker", "Loan Agent")
+SESSION_TIMEOUT_MINUTES = float(os.getenv("SESSION_TIMEOUT_MINUTES", "15"))
+PBKDF2_ITERATIONS = int(os.getenv("AUTH_PBKDF2_ITERATIONS", "240000"))
+CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "10"))
+
+# Seeded into an empty store so a fresh install can log in
+DEMO_USERS = {
+    "admin": ("admin123", "Admin"),
+    "doc_checker": ("doc456", "Document Checker"),
+    "loan_agent": ("loan789", "Loan Agent"),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password_hash TEXT NOT NULL,
+    role TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    token_hash TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    role TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_active REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_last_active ON sessions (last_active);
+"""
+
+
+def hash_password(password, iterations=PBKDF2_ITERATIONS, salt=None):
+    """``pbkdf2_sha256$<iterations>$<salt>$<hash>`` for ``password``."""
+    salt = salt or secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), iterations)
+    return f"pbkdf2_sha256${iterations}${salt}${digest.hex()}"
+
+
+def check_password(password, encoded):
+    _, iterations, salt, _ = encoded.split("$")
+    return hmac.compare_digest(hash_password(password, int(iterations), salt), encoded)
+
+
+def _token_hash(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class AuthStore:
+    def __init__(self, path=None, timeout_minutes=SESSION_TIMEOUT_MINUTES, cache_ttl=CACHE_TTL_SECONDS):
+        self.path = path or os.getenv("AUTH_STORE_PATH", "auth.db")
+        self.timeout_seconds = timeout_minutes * 60
+        self._local = threading.local()
+        # Keyed by a digest of username + password under a per-process key, never the password itself
+        self._cache_key = secrets.token_bytes(32)
+        self._verified = LRUCache(maxsize=1024, ttl=cache_ttl)
+        self._sessions = LRUCache(maxsize=4096, ttl=cache_ttl)
+        # Compared against when the user doesn't exist, so unknown names take as long as wrong passwords
+        self._dummy_hash = hash_password(secrets.token_hex(8))
+        if os.getenv("AUTH_SEED_DEMO_USERS", "1") == "1":
+            self.seed(DEMO_USERS)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def seed(self, users):
+        """Create ``{username: (password, role)}`` accounts when the store has no users yet."""
+        if self._connection().execute("SELECT 1 FROM users LIMIT 1").fetchone() is None:
+            for username, (password, role) in users.items():
+                self.create_user(username, password, role)
+
+    def create_user(self, username, password, role):
+        """False when the username is taken."""
+        if role not in ROLES:
+            raise ValueError(f"Unknown role '{role}'")
+        cursor = self._connection().execute(
+            "INSERT OR IGNORE INTO users (username, password_hash, role, created_at) VALUES (?, ?, ?, ?)",
+            (username, hash_password(password), role, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def verify(self, username, password):
+        """The user's role when the password matches, else None."""
+        cache_key = hmac.new(self._cache_key, f"{username}\0{password}".encode(), hashlib.sha256).hexdigest()
+        role = self._verified.get(cache_key)
+        if role is not None:
+            return role
+        row = self._connection().execute(
+            "SELECT password_hash, role FROM users WHERE username = ?", (username,)
+        ).fetchone()
+        if row is None:
+            check_password(password, self._dummy_hash)
+            return None
+        if not check_password(password, row[0]):
+            return None
+        self._verified.set(cache_key, row[1])
+        return row[1]
+
+    def create_session(self, username, role):
+        """New session token for a verified user."""
+        token = secrets.token_urlsafe(32)
+        now = time.time()
+        self._connection().execute(
+            "INSERT INTO sessions (token_hash, username, role, created_at, last_active) VALUES (?, ?, ?, ?, ?)",
+            (_token_hash(token), username, role, now, now),
+        )
+        self._sessions.set(token, {"username": username, "role": role})
+        return token
+
+    def session(self, token):
+        """``{"username", "role"}`` of a live session, marking it active; None when unknown or expired."""
+        if not token:
+            return None
+        conn = self._connection()
+        cached = self._sessions.get(token)
+        if cached is not None:
+            # Primary-key read only: catches a session ended on another replica
+            if conn.execute("SELECT 1 FROM sessions WHERE token_hash = ?", (_token_hash(token),)).fetchone() is None:
+                self._sessions.pop(token)
+                return None
+            return cached
+        now = time.time()
+        row = conn.execute(
+            "SELECT username, role, last_active FROM sessions WHERE token_hash = ?", (_token_hash(token),)
+        ).fetchone()
+        if row is None:
+            return None
+        if now - row[2] > self.timeout_seconds:
+            self.end_session(token)
+            return None
+        conn.execute("UPDATE sessions SET last_active = ? WHERE token_hash = ?", (now, _token_hash(token)))
+        session = {"username": row[0], "role": row[1]}
+        self._sessions.set(token, session)
+        return session
+
+    def end_session(self, token):
+        self._sessions.pop(token)
+        self._connection().execute("DELETE FROM sessions WHERE token_hash = ?", (_token_hash(token),))
+
+    def purge_expired(self):
+        """Delete sessions idle for longer than the timeout; returns how many."""
+        cursor = self._connection().execute(
+            "DELETE FROM sessions WHERE last_active < ?", (time.time() - self.timeout_seconds,)
+        )
+        return cursor.rowcount
+
+
+registry.register("auth_store", AuthStore)
@@ -0,0 +1,192 @@
+"""Bulk document shortlisting.
+
+Fans OCR, validation, parsing and shortlisting out across a process pool and
+streams one result row per document to CSV or JSONL as soon as it finishes.
+
+    python batch_shortlist.py scans/ more_scans.zip -o results.csv
+"""
+import os
+import csv
+import sys
+import json
+import time
+import zipfile
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+
+DOCUMENT_EXTENSIONS = (".jpg", ".jpeg", ".png", ".pdf", ".docx")
+RESULT_FIELDS = [
+    "file", "status", "verification_status", "verification_message",
+    "result", "overall_grade", "decision", "ocr_seconds", "ocr_pass", "duplicate_of", "error",
+]
+
+# Per-process state, built once by _init_worker
+_doc_checker = None
+_shortlister = None
+
+
+def _init_worker(tesseract_path):
+    global _doc_checker, _shortlister
+    from doc_extrac_shortlist import DocumentCheckingAgent, ShortlistingAgent
+    _doc_checker = DocumentCheckingAgent(tesseract_path)
+    _shortlister = ShortlistingAgent()
+
+
+def process_document(name, source):
+    """Verify, parse and shortlist one document. Never raises: failures are
+    reported in the returned row so the rest of the batch keeps going."""
+    from doc_extrac_shortlist import EXPECTED_KEYWORDS, parse_extracted_text
+
+    row = dict.fromkeys(RESULT_FIELDS)
+    row["file"] = name
+    try:
+        ocr_result = _doc_checker.ocr(source)
+        if ocr_result is None:
+            raise FileNotFoundError(f"{name} not found")
+        validation = _doc_checker.validate_document(ocr_result, EXPECTED_KEYWORDS)
+        record = parse_extracted_text(ocr_result)
+        row.update({
+            "status": "ok",
+            "verification_status": validation["status"],
+            "verification_message": validation["message"],
+            "result": record.result,
+            "overall_grade": record.overall_grade,
+            "decision": _shortlister.evaluate(validation, record).message,
+            "ocr_seconds": round(ocr_result.elapsed, 4),
+            "ocr_pass": ocr_result.ocr_pass,
+            "duplicate_of": (validation.get("duplicate_of") or {}).get("document_id"),
+        })
+    except Exception as e:
+        row.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    return row
+
+
+def iter_inputs(paths):
+    """Yield (name, source) pairs from image files, directories and ZIP archives.
+    Files on disk are passed by path so workers read them; ZIP members are read
+    lazily as bytes."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for file_name in sorted(files):
+                    if file_name.lower().endswith(DOCUMENT_EXTENSIONS):
+                        yield os.path.join(root, file_name), os.path.join(root, file_name)
+        elif path.lower().endswith(".zip"):
+            with zipfile.ZipFile(path) as archive:
+                yield from iter_zip(archive, prefix=path)
+        else:
+            yield path, path
+
+
+def iter_zip(archive, prefix=""):
+    for member in archive.namelist():
+        if member.lower().endswith(DOCUMENT_EXTENSIONS):
+            name = f"{prefix}:{member}" if prefix else member
+            yield name, archive.read(member)
+
+
+class ResultWriter:
+    """Writes result rows to a text stream as CSV or JSONL, flushing each row."""
+
+    def __init__(self, stream, fmt="csv"):
+        self.stream = stream
+        self.fmt = fmt
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(stream, fieldnames=RESULT_FIELDS)
+            self._csv.writeheader()
+
+    def write(self, row):
+        if self._csv is not None:
+            self._csv.writerow(row)
+        else:
+            self.stream.write(json.dumps(row) + "\n")
+        self.stream.flush()
+
+
+def run_batch(inputs, writer=None, workers=None, max_pending=None,
+              tesseract_path=None, on_result=None):
+    """Process (name, source) pairs across a process pool.
+
+    At most ``max_pending`` documents are queued or in flight at once, so a
+    large directory or archive is never loaded into memory all at once.
+    Returns a summary with counts and throughput in documents per second.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 2
+    summary = {"documents": 0, "ok": 0, "errors": 0, "shortlisted": 0}
+
+    def handle(row):
+        summary["documents"] += 1
+        summary["ok" if row["status"] == "ok" else "errors"] += 1
+        if row["decision"] == "Shortlisted":
+            summary["shortlisted"] += 1
+        if writer is not None:
+            writer.write(row)
+        if on_result is not None:
+            on_result(row)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(tesseract_path,)) as pool:
+        pending = {}
+        for name, source in inputs:
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    handle(_row_from_future(future, pending.pop(future)))
+            pending[pool.submit(process_document, name, source)] = name
+        for future in as_completed(list(pending)):
+            handle(_row_from_future(future, pending.pop(future)))
+
+    elapsed = time.perf_counter() - start
+    summary["seconds"] = round(elapsed, 3)
+    summary["docs_per_second"] = round(summary["documents"] / elapsed, 2) if elapsed else 0.0
+    return summary
+
+
+def _row_from_future(future, name):
+    # A crashed worker process surfaces here rather than inside process_document
+    try:
+        return future.result()
+    except Exception as e:
+        row = dict.fromkeys(RESULT_FIELDS)
+        row.update({"file": name, "status": "error", "error": f"{type(e).__name__}: {e}"})
+        return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk document verification and shortlisting.")
+    parser.add_argument("inputs", nargs="+", help="Image files, directories or ZIP archives")
+    parser.add_argument("-o", "--output", default="-", help="Output file (.csv or .jsonl), '-' for stdout")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Output format (default: from extension)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--max-pending", type=int, default=None, help="Max documents queued at once")
+    parser.add_argument("--tesseract", default=None, help="Path to the tesseract executable")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("jsonl" if args.output.endswith(".jsonl") else "csv")
+    stream = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        summary = run_batch(
+            iter_inputs(args.inputs),
+            writer=ResultWriter(stream, fmt),
+            workers=args.workers,
+            max_pending=args.max_pending,
+            tesseract_path=args.tesseract,
+        )
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+
+    print(
+        f"Processed {summary['documents']} documents ({summary['errors']} errors, "
+        f"{summary['shortlisted']} shortlisted) in {summary['seconds']}s "
+        f"- {summary['docs_per_second']} docs/s",
+        file=sys.stderr,
+    )
+    return 0 if summary["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
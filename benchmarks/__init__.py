@@ -0,0 +1 @@
+"""Benchmarks for the admission helpdesk. Run modules with ``python -m benchmarks.<name>``."""
@@ -0,0 +1,84 @@
+"""End-to-end shortlisting benchmark against synthetic ground truth.
+
+Generates result cards with known fields and runs them through the batch
+pipeline: OCR, validation, parsing and shortlisting. Reports documents per
+second, the share of cards that pass verification, and field and decision
+accuracy, plus the share of cards accepted at each OCR ladder pass. Results
+are stored under benchmarks/results/ and compared with the previous run.
+
+    python -m benchmarks.bench_e2e --count 200 --workers 4 --noise 12 --max-rotation 3
+"""
+import os
+import sys
+import argparse
+import tempfile
+
+from benchmarks import results
+from benchmarks.synthetic import generate_cards, expected_decision
+
+
+def run(count=100, workers=None, seed=0, noise=8.0, max_rotation=2.0, tesseract_path=None):
+    # Fresh duplicate index and event store, so earlier runs' extractions are
+    # never reused and nothing is written to the production databases
+    directory = tempfile.mkdtemp(prefix="helpdesk-e2e-")
+    os.environ["PHASH_INDEX_PATH"] = os.path.join(directory, "phash.db")
+    os.environ["EVENT_STORE_PATH"] = os.path.join(directory, "events.db")
+    from batch_shortlist import run_batch
+
+    truth = {}
+
+    def inputs():
+        for name, data, card_truth in generate_cards(count, seed, noise, max_rotation):
+            truth[name] = card_truth
+            yield name, data
+
+    rows = []
+    summary = run_batch(inputs(), workers=workers, tesseract_path=tesseract_path, on_result=rows.append)
+
+    verified = result_ok = grade_ok = decision_ok = 0
+    accepted_at = {}
+    for row in rows:
+        accepted_at[row["ocr_pass"] or "none"] = accepted_at.get(row["ocr_pass"] or "none", 0) + 1
+        expected = truth[row["file"]]
+        verified += row["verification_status"] == "verified"
+        result_ok += (row["result"] or "") == expected["result"]
+        grade_ok += row["overall_grade"] == expected["overall_grade"]
+        decision = "Shortlisted" if row["decision"] == "Shortlisted" else "Rejected"
+        decision_ok += decision == expected_decision(expected)
+
+    n = len(rows) or 1
+    return {
+        "documents": summary["documents"],
+        "errors": summary["errors"],
+        "docs_per_second": summary["docs_per_second"],
+        "verification_accuracy": round(verified / n, 4),
+        "result_accuracy": round(result_ok / n, 4),
+        "grade_accuracy": round(grade_ok / n, 4),
+        "decision_accuracy": round(decision_ok / n, 4),
+        **{f"ocr_pass_{name}_share": round(count / n, 4) for name, count in sorted(accepted_at.items())},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end shortlisting throughput and accuracy.")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--noise", type=float, default=8.0)
+    parser.add_argument("--max-rotation", type=float, default=2.0)
+    parser.add_argument("--tesseract", default=None, help="Path to the tesseract executable")
+    parser.add_argument("--no-save", action="store_true", help="Compare with the previous run but don't store this one")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    metrics = run(args.count, args.workers, args.seed, args.noise, args.max_rotation, args.tesseract)
+    for key, value in metrics.items():
+        print(f"{key:>20}: {value}")
+
+    params = {"count": args.count, "workers": args.workers, "seed": args.seed,
+              "noise": args.noise, "max_rotation": args.max_rotation}
+    return results.report("e2e", metrics, params, store=not args.no_save, tolerance=args.tolerance)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""Field extraction throughput as the number of supported formats grows.
+
+Builds engines with the built-in board formats plus N synthetic ones, then
+parses one card per format. The ad-hoc baseline is the previous approach
+generalised to many formats: ``re.search`` with pattern strings, tried format
+by format and field by field. The engine detects the board with one search
+and reads every field in a single pass.
+
+    python -m benchmarks.bench_extraction --formats 1 8 64 256 --repeat 2000
+"""
+import re
+import sys
+import time
+import random
+import argparse
+
+from extraction_rules import ExtractionEngine, FORMATS, GENERIC_RULES, FIELDS, FLAGS
+from benchmarks import results
+from benchmarks.synthetic import random_truth
+
+
+def synthetic_formats(count):
+    return [
+        {
+            "name": f"regional_{i}",
+            "detect": rf"REGIONAL\s+EXAMINATION\s+BOARD\s+NO\.?\s*{i}\b",
+            "rules": [rf"\bCandidate\s+Code\s+{i}\s*[:\-]?\s*(?P<registration_no>[A-Z0-9][A-Z0-9/\-]{{3,}})"],
+        }
+        for i in range(count)
+    ]
+
+
+def card_text(truth, header):
+    return (
+        f"{header}\nSTATEMENT OF MARKS\nName: {truth['name']}\nRoll No: {truth['roll_no']}\n"
+        f"Registration No: {truth['registration_no']}\nSubject Marks\nEnglish 88\nMathematics 93\n"
+        f"Result Total Overall Grade\n{truth['result']} 452 {truth['overall_grade']}\n"
+    )
+
+
+def headers(formats):
+    header = {"cbse": "CENTRAL BOARD OF SECONDARY EDUCATION",
+              "state_board": "STATE BOARD OF HIGHER SECONDARY EDUCATION",
+              "cisce": "COUNCIL FOR THE INDIAN SCHOOL CERTIFICATE EXAMINATIONS",
+              "university": "GUJARAT UNIVERSITY"}
+    for fmt in formats:
+        yield fmt["name"], header.get(fmt["name"]) or f"REGIONAL EXAMINATION BOARD NO. {fmt['name'].split('_')[-1]}"
+
+
+def naive_extract(text, formats):
+    """Format by format, field by field, with uncompiled pattern strings."""
+    rules = list(GENERIC_RULES)
+    for fmt in formats:
+        if re.search(fmt["detect"], text, FLAGS):
+            rules = list(fmt.get("rules", [])) + rules
+            break
+    values = {}
+    for field in FIELDS:
+        for rule in rules:
+            if f"(?P<{field}>" in rule:
+                match = re.search(rule, text, FLAGS)
+                if match:
+                    values[field] = match.group(field)
+                    break
+    return values
+
+
+def run(format_counts=(1, 8, 64, 256), repeat=1000, seed=0):
+    rng = random.Random(seed)
+    metrics = {}
+    for count in format_counts:
+        formats = list(FORMATS) + synthetic_formats(count)
+        engine = ExtractionEngine(formats)
+        cards = [(name, random_truth(rng), header) for name, header in headers(formats)]
+        texts = [card_text(truth, header) for _, truth, header in cards]
+
+        correct = 0
+        for (name, truth, _), text in zip(cards, texts):
+            record = engine.extract(text)
+            correct += (record.board == name and record.overall_grade == truth["overall_grade"]
+                        and record.result == truth["result"] and record.roll_no == truth["roll_no"])
+
+        timings = {}
+        for label, extract in (("engine", engine.extract), ("naive", lambda text: naive_extract(text, formats))):
+            start = time.perf_counter()
+            for i in range(repeat):
+                extract(texts[i % len(texts)])
+            timings[label] = repeat / (time.perf_counter() - start)
+
+        metrics[f"formats_{count}_engine_docs_per_second"] = round(timings["engine"], 1)
+        metrics[f"formats_{count}_naive_docs_per_second"] = round(timings["naive"], 1)
+        metrics[f"formats_{count}_accuracy"] = round(correct / len(cards), 4)
+    return metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--formats", type=int, nargs="+", default=[1, 8, 64, 256],
+                        help="Synthetic formats added on top of the built-in ones")
+    parser.add_argument("--repeat", type=int, default=1000, help="Cards parsed per configuration")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-save", action="store_true", help="Compare with the previous run but don't store this one")
+    args = parser.parse_args(argv)
+
+    metrics = run(args.formats, args.repeat, args.seed)
+    print(f"{'formats':>8} {'engine docs/s':>14} {'naive docs/s':>13} {'speedup':>8} {'accuracy':>9}")
+    for count in args.formats:
+        engine = metrics[f"formats_{count}_engine_docs_per_second"]
+        naive = metrics[f"formats_{count}_naive_docs_per_second"]
+        print(f"{count + len(FORMATS):>8} {engine:>14,.0f} {naive:>13,.0f} {engine / naive:>7.1f}x "
+              f"{metrics[f'formats_{count}_accuracy']:>9.2%}")
+    params = {"formats": args.formats, "repeat": args.repeat, "seed": args.seed}
+    return results.report("extraction", metrics, params, store=not args.no_save)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Budget ledger throughput under multi-process contention.
+
+Every worker process hammers the same SQLite ledger with reserve+commit calls
+(and replays some idempotency keys). At the end the balance must equal the
+initial budget minus exactly the committed amounts, i.e. no lost updates and
+no double spends.
+
+    python -m benchmarks.bench_ledger --processes 8 --ops 2000
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import multiprocessing
+
+from budget_ledger import BudgetLedger, InsufficientBudget
+from benchmarks import results
+
+
+def _worker(path, worker_id, ops, amount, replay_every, barrier, results):
+    ledger = BudgetLedger(path)
+    spent = rejected = replays = 0
+    barrier.wait()
+    start = time.perf_counter()
+    for i in range(ops):
+        key = f"{worker_id}:{i}"
+        try:
+            ledger.spend(amount, idempotency_key=key)
+            spent += 1
+        except InsufficientBudget:
+            rejected += 1
+        if replay_every and i % replay_every == 0:
+            # Retried request with the same key must not spend again
+            try:
+                ledger.spend(amount, idempotency_key=key)
+            except InsufficientBudget:
+                pass
+            replays += 1
+    results.put({"spent": spent, "rejected": rejected, "replays": replays,
+                 "seconds": time.perf_counter() - start})
+
+
+def run(processes=4, ops=1000, amount=1.0, budget=None, replay_every=10, path=None):
+    budget = budget if budget is not None else processes * ops * amount * 0.9
+    path = path or os.path.join(tempfile.mkdtemp(), "bench_ledger.db")
+    BudgetLedger(path, initial_budget=budget)
+
+    barrier = multiprocessing.Barrier(processes)
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target=_worker, args=(path, n, ops, amount, replay_every, barrier, results))
+        for n in range(processes)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    stats = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    spent = sum(s["spent"] for s in stats)
+    calls = sum(s["spent"] + s["rejected"] + s["replays"] for s in stats)
+    balance = BudgetLedger(path).balance()
+    expected = budget - spent * amount
+    return {
+        "processes": processes,
+        "calls": calls,
+        "approved": spent,
+        "rejected": sum(s["rejected"] for s in stats),
+        "seconds": round(elapsed, 3),
+        "calls_per_second": round(calls / elapsed, 1),
+        "final_available": balance["available"],
+        "expected_available": round(expected, 2),
+        "consistent": abs(balance["available"] - expected) < 0.005 and balance["reserved"] == 0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--ops", type=int, default=1000, help="Decisions per process")
+    parser.add_argument("--amount", type=float, default=1.0)
+    parser.add_argument("--replay-every", type=int, default=10, help="Replay every Nth idempotency key (0 disables)")
+    parser.add_argument("--no-save", action="store_true", help="Compare with the previous run but don't store this one")
+    args = parser.parse_args(argv)
+
+    result = run(args.processes, args.ops, args.amount, replay_every=args.replay_every)
+    for key, value in result.items():
+        print(f"{key:>20}: {value}")
+    params = {"processes": args.processes, "ops": args.ops, "amount": args.amount, "replay_every": args.replay_every}
+    regressed = results.report("ledger", result, params, store=not args.no_save)
+    return 0 if result["consistent"] and not regressed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,399 @@
+"""Concurrent-session load test of the helpdesk page flows.
+
+Virtual users in threads play the app's roles against one process, the way
+Streamlit serves every browser session from one interpreter. Document checkers
+log in, upload a result card and run shortlisting. Loan agents check
+eligibility, reserve budget and ask loan FAQs. Counsellors ask admission FAQs.
+Each action makes the calls its page in main.py makes, so the loan agent,
+agent executors, FAQ chains and caches are shared across users as in
+production. (Streamlit's AppTest cannot upload files, so the flows are
+scripted against those calls rather than the widgets.)
+
+The LLM, embeddings and OCR are the local fakes, with configurable latency.
+Every store (events, auth, ledger, job queue, duplicate and vector indexes,
+layout templates) lives in a temporary directory. The report covers:
+
+- actions per second
+- p50/p95/p99 latency and error rate per action
+- process memory growth
+- two consistency checks: every shortlisting decision must match the one
+  computed for the same card before the load started, and the loan ledger
+  must have spent exactly what users were told was approved
+- how many uploads reused the extraction of a confirmed near-duplicate.
+
+The OCR cache is cleared after warm-up, so a card uploaded again under load
+goes through the perceptual-hash duplicate check, as a re-upload after a
+restart would. Loan agents enter an application ID for most decisions and
+sometimes finalize the same application twice (a double click or a refresh).
+
+    python -m benchmarks.bench_load --users 50 --duration 60 --think 0.5 --llm-latency 0.2
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+from collections import Counter, defaultdict
+
+import cv2
+import numpy as np
+
+from benchmarks import results
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROLES = ("checker", "loan", "counsellor")
+FLOWS = {
+    "checker": ("upload", "shortlist"),
+    "loan": ("loan_check", "loan_faq"),
+    "counsellor": ("faq",),
+}
+# Stand-ins for what users type: FAQ questions as written, lower-cased or with a prefix
+PHRASINGS = (str, str.lower, "Hi, {}".format, "Quick question: {}".format)
+
+
+def rss_bytes():
+    """Resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        if resource is None:
+            return 0
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def isolate(directory, ocr_latency):
+    """Point every store at ``directory`` and select the fake OCR backend; call before importing the app."""
+    for variable, name in (("EVENT_STORE_PATH", "events.db"), ("AUTH_STORE_PATH", "auth.db"),
+                           ("LOAN_LEDGER_PATH", "loan_budget.db"), ("JOB_QUEUE_PATH", "jobs.db"),
+                           ("PHASH_INDEX_PATH", "phash.db"), ("VECTOR_INDEX_PATH", "faq_vector_index"),
+                           ("LAYOUT_TEMPLATES_PATH", "layout_templates.json")):
+        os.environ[variable] = os.path.join(directory, name)
+    os.environ["OCR_BACKEND"] = "fake"
+    os.environ["FAKE_OCR_LATENCY"] = str(ocr_latency)
+
+
+def make_cards(count, seed):
+    """PNG result cards, lightly degraded so each decodes and preprocesses like an upload."""
+    from benchmarks.synthetic import random_truth, render_card, degrade
+
+    rng = random.Random(seed)
+    cards = []
+    for _ in range(count):
+        image = degrade(render_card(random_truth(rng), rng), rng, noise=6.0, max_rotation=1.5)
+        cards.append(cv2.imencode(".png", image)[1].tobytes())
+    return cards
+
+
+def questions(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [entry["question"] for entry in json.load(f)]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(Counter)
+        self.lock = threading.Lock()
+
+    def measure(self, action, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        except Exception as e:
+            with self.lock:
+                self.errors[action][f"{type(e).__name__}: {e}"[:200]] += 1
+            return None
+        finally:
+            with self.lock:
+                self.latencies[action].append(time.perf_counter() - start)
+
+    def fail(self, action, message):
+        with self.lock:
+            self.errors[action][message] += 1
+
+
+class PageFlows:
+    def __init__(self, cards, faq_questions, loan_questions, agent_rate, finalize_rate, retry_rate):
+        import auth_store  # noqa: F401 (registers the store)
+        import agent_tools  # noqa: F401 (registers the FAQ agent pool)
+        from registry import registry
+        from doc_extrac_shortlist import DocumentCheckingAgent, parse_extracted_text, EXPECTED_KEYWORDS, ocr_cache
+        from decisions import decide_shortlist, decide_loan, run_agent
+        from loan_agent import loan_agent, application_key
+        from event_store import record_event
+        from tool_memo import tool_memo
+        from tracing import tracer, langchain_callbacks
+
+        self.registry = registry
+        self.DocumentCheckingAgent = DocumentCheckingAgent
+        self.parse_extracted_text = parse_extracted_text
+        self.expected_keywords = EXPECTED_KEYWORDS
+        self.ocr_cache = ocr_cache
+        self.decide_shortlist, self.decide_loan, self.run_agent = decide_shortlist, decide_loan, run_agent
+        self.loan_agent, self.application_key = loan_agent, application_key
+        self.record_event = record_event
+        self.tool_memo, self.tracer, self.langchain_callbacks = tool_memo, tracer, langchain_callbacks
+        self.cards = cards
+        self.faq_questions, self.loan_questions = faq_questions, loan_questions
+        self.agent_rate, self.finalize_rate, self.retry_rate = agent_rate, finalize_rate, retry_rate
+        self.expected = {}
+        # Amounts users were told were finalized, per application (per click when no ID was entered)
+        self.approved = {}
+        self.approved_lock = threading.Lock()
+
+    # --- Login page and the session check every rerun of main.py makes ---
+    def signup(self, username, password, role):
+        return self.registry.get("auth_store").create_user(username, password, role)
+
+    def login(self, username, password):
+        store = self.registry.get("auth_store")
+        role = store.verify(username, password)
+        if role is None:
+            raise PermissionError(f"Login failed for {username}")
+        return store.create_session(username, role)
+
+    def session_check(self, token):
+        if self.registry.get("auth_store").session(token) is None:
+            raise PermissionError("Session expired")
+
+    # --- Document Shortlisting page ---
+    def upload(self, card):
+        doc_checker = self.DocumentCheckingAgent()
+        ocr_result = doc_checker.ocr(self.cards[card])
+        validation = doc_checker.validate_document(ocr_result, self.expected_keywords)
+        self.record_event("verification", validation["status"], ocr_result.elapsed * 1000)
+        parsed = self.parse_extracted_text(ocr_result)
+        if not (parsed.overall_grade and parsed.result) and not ocr_result.duplicate_of:
+            layout = doc_checker.extract_fields(self.cards[card], ocr_result)
+            for field in ("overall_grade", "result"):
+                if not getattr(parsed, field) and layout["fields"].get(field):
+                    setattr(parsed, field, layout["fields"][field])
+        return validation, parsed
+
+    def shortlist(self, validation, parsed, explain):
+        start = time.perf_counter()
+        decision = self.decide_shortlist(validation, parsed)
+        self.record_event("shortlisting", "shortlisted" if decision.shortlisted else "rejected",
+                          (time.perf_counter() - start) * 1000)
+        if explain:
+            query = {"verification_result": validation, "extracted_text": parsed.to_dict()}
+            self.run_agent("shortlist", self.registry.get("shortlist_agent_executor"),
+                           f"Shortlist this student: {json.dumps(query)}")
+        return decision.message
+
+    # --- Loan Queries page ---
+    def loan_check(self, application_id, annual_income, requested_loan, finalize, explain):
+        data = {"shortlisted": "shortlisted", "annual_income": annual_income, "requested_loan": requested_loan}
+        start = time.perf_counter()
+        decision = self.decide_loan("shortlisted", annual_income, requested_loan)
+        self.record_event("loan", "approved" if decision.approved else "rejected", (time.perf_counter() - start) * 1000)
+        if decision.approved and finalize:
+            key = self.application_key(application_id)
+            message = self.loan_agent.finalize_approval(json.dumps({**data, "application_id": key}))
+            if message.startswith("[FINAL]"):
+                with self.approved_lock:
+                    self.approved.setdefault(application_id or key, requested_loan)
+        if explain:
+            self.run_agent("loan", self.registry.get("loan_agent_executor"), f"Evaluate loan eligibility: {json.dumps(data)}")
+
+    def loan_faq(self, question):
+        cached_answer, _ = self.registry.get("loan_faq_answer_cache").lookup(question)
+        if cached_answer is None:
+            self.run_agent("loan_faq", self.registry.get("loan_agent_executor"), question)
+
+    # --- FAQ & Support page ---
+    def faq(self, question):
+        cached_answer, _ = self.registry.get("faq_answer_cache").lookup(question)
+        if cached_answer is not None:
+            return
+        with self.tracer.span("agent.faq") as span, self.tool_memo.track() as savings, \
+                self.registry.get("faq_agent_pool").acquire() as agent_executor:
+            agent_executor.invoke({"input": question}, config={"callbacks": self.langchain_callbacks()})
+            span.set(**savings.to_dict())
+
+    def warm_up(self):
+        """Build the shared components and record each card's decision before any concurrency."""
+        for name in ("auth_store", "event_store", "faq_chain", "faq_tool", "faq_answer_cache", "faq_agent_pool",
+                     "loan_faq_chain", "loan_faq_answer_cache", "loan_agent_executor", "shortlist_agent_executor"):
+            self.registry.get(name)
+        for card in range(len(self.cards)):
+            validation, parsed = self.upload(card)
+            self.expected[card] = (validation["status"], self.decide_shortlist(validation, parsed).message)
+        self.budget_before = self.loan_agent.ledger.balance()
+        # Uploads under load pay for OCR like first-time uploads until a card comes round again
+        self.ocr_cache.clear()
+
+
+class VirtualUser(threading.Thread):
+    def __init__(self, index, role, flows, recorder, rng, think, start_at, stop_at):
+        super().__init__(daemon=True, name=f"user-{index}")
+        self.index, self.role, self.flows, self.recorder, self.rng = index, role, flows, recorder, rng
+        self.think, self.start_at, self.stop_at = think, start_at, stop_at
+        self.username, self.password = f"load_{role}_{index}", f"pw-{index}-{rng.random():.6f}"
+        self.iterations = 0
+        self.card = self.uploaded = None
+        self.application = None
+
+    def pause(self):
+        if self.think:
+            time.sleep(min(self.rng.expovariate(1 / self.think), max(self.stop_at - time.time(), 0)))
+
+    def run(self):
+        time.sleep(max(self.start_at - time.time(), 0))
+        # The FAQ page is open to every role
+        role_name = {"checker": "Document Checker", "loan": "Loan Agent", "counsellor": "Admin"}[self.role]
+        self.flows.signup(self.username, self.password, role_name)
+        token = self.recorder.measure("login", self.flows.login, self.username, self.password)
+        if token is None:
+            return
+        while time.time() < self.stop_at:
+            for action in FLOWS[self.role]:
+                self.pause()
+                if time.time() >= self.stop_at:
+                    break
+                self.recorder.measure("session_check", self.flows.session_check, token)
+                getattr(self, action)()
+            self.iterations += 1
+
+    def upload(self):
+        self.card = self.rng.randrange(len(self.flows.cards))
+        self.uploaded = self.recorder.measure("upload", self.flows.upload, self.card)
+
+    def shortlist(self):
+        if not self.uploaded:
+            return
+        validation, parsed = self.uploaded
+        explain = self.rng.random() < self.flows.agent_rate
+        message = self.recorder.measure("shortlist", self.flows.shortlist, validation, parsed, explain)
+        if message is not None and (validation["status"], message) != self.flows.expected[self.card]:
+            self.recorder.fail("shortlist", "inconsistent decision")
+
+    def loan_check(self):
+        if self.application is None or self.rng.random() >= self.flows.retry_rate:
+            # Few distinct incomes and amounts, so different applicants often share both
+            income = self.rng.choice([150000, 250000, 350000])
+            amount = self.rng.choice([5000, 20000, 50000])
+            # Left blank sometimes, as on the page
+            student = f"{self.username}-{self.iterations}" if self.rng.random() < 0.7 else ""
+            self.application = (student, income, amount)
+        student, income, amount = self.application
+        self.recorder.measure(
+            "loan_check", self.flows.loan_check, student, income, amount,
+            self.rng.random() < self.flows.finalize_rate, self.rng.random() < self.flows.agent_rate,
+        )
+
+    def loan_faq(self):
+        question = self.rng.choice(PHRASINGS)(self.rng.choice(self.flows.loan_questions))
+        self.recorder.measure("loan_faq", self.flows.loan_faq, question)
+
+    def faq(self):
+        question = self.rng.choice(PHRASINGS)(self.rng.choice(self.flows.faq_questions))
+        self.recorder.measure("faq", self.flows.faq, question)
+
+
+def percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 3) if samples else 0.0
+
+
+def run(users=50, duration=30.0, think=0.5, ramp=5.0, mix=(0.4, 0.3, 0.3), cards=40, llm_latency=0.05,
+        ocr_latency=0.2, agent_rate=0.1, finalize_rate=0.5, retry_rate=0.1, seed=0):
+    isolate(tempfile.mkdtemp(prefix="helpdesk-load-"), ocr_latency)
+    from benchmarks import fakes
+
+    flows = PageFlows(make_cards(cards, seed), questions("faq_data.json"), questions("loan_data.json"),
+                      agent_rate, finalize_rate, retry_rate)
+    fakes.install(latency=llm_latency)
+    start = time.perf_counter()
+    flows.warm_up()
+    warmup_seconds = time.perf_counter() - start
+    duplicates_before = flows.registry.get("phash_index").stats()
+
+    rng = random.Random(seed)
+    recorder = Recorder()
+    rss_start = rss_peak = rss_bytes()
+    begin = time.time()
+    stop_at = begin + ramp + duration
+    roles = rng.choices(ROLES, weights=mix, k=users)
+    threads = [VirtualUser(i, role, flows, recorder, random.Random(rng.random()), think,
+                           begin + ramp * i / max(users, 1), stop_at) for i, role in enumerate(roles)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        rss_peak = max(rss_peak, rss_bytes())
+        time.sleep(0.25)
+    elapsed = time.time() - begin
+    rss_end = rss_bytes()
+    duplicates = flows.registry.get("phash_index").stats()
+
+    balance = flows.loan_agent.ledger.balance()
+    spent = flows.budget_before["available"] - balance["available"] - balance["reserved"]
+    actions = {action: samples for action, samples in recorder.latencies.items()}
+    total = sum(len(samples) for samples in actions.values())
+    errors = sum(sum(counter.values()) for counter in recorder.errors.values())
+    metrics = {
+        "users": users,
+        "roles": dict(Counter(roles)),
+        "warmup_seconds": round(warmup_seconds, 3),
+        "actions": total,
+        "actions_per_second": round(total / elapsed, 2),
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "inconsistent_decisions": recorder.errors["shortlist"].get("inconsistent decision", 0),
+        "ledger_drift": round(spent - sum(flows.approved.values()), 2),
+        "duplicates_reused": duplicates["duplicates"] - duplicates_before["duplicates"],
+        "duplicate_candidates_rejected": duplicates["rejected_candidates"] - duplicates_before["rejected_candidates"],
+        "rss_start_mb": round(rss_start / 2 ** 20, 1),
+        "rss_peak_mb": round(rss_peak / 2 ** 20, 1),
+        "rss_growth_mb": round((rss_end - rss_start) / 2 ** 20, 1),
+    }
+    for action in sorted(actions):
+        samples = actions[action]
+        metrics.update({
+            f"{action}_count": len(samples),
+            f"{action}_p50_ms": percentile_ms(samples, 50),
+            f"{action}_p95_ms": percentile_ms(samples, 95),
+            f"{action}_p99_ms": percentile_ms(samples, 99),
+            f"{action}_error_rate": round(sum(recorder.errors[action].values()) / len(samples), 4),
+        })
+    return metrics, recorder.errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load after ramp-up")
+    parser.add_argument("--think", type=float, default=0.5, help="Mean think time between actions (seconds)")
+    parser.add_argument("--ramp", type=float, default=5.0, help="Seconds over which users log in")
+    parser.add_argument("--mix", default="0.4,0.3,0.3", help="Share of checkers, loan agents and counsellors")
+    parser.add_argument("--cards", type=int, default=40, help="Distinct result cards users upload")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Fake LLM seconds per call")
+    parser.add_argument("--ocr-latency", type=float, default=0.2, help="Fake OCR seconds per page pass")
+    parser.add_argument("--agent-rate", type=float, default=0.1, help="Share of decisions that also ask the agent")
+    parser.add_argument("--finalize-rate", type=float, default=0.5, help="Share of approvals that reserve budget")
+    parser.add_argument("--retry-rate", type=float, default=0.1, help="Share of loan checks that repeat the previous application")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-save", action="store_true", help="Compare with the previous run but don't store this one")
+    args = parser.parse_args(argv)
+
+    mix = tuple(float(share) for share in args.mix.split(","))
+    metrics, errors = run(args.users, args.duration, args.think, args.ramp, mix, args.cards, args.llm_latency,
+                          args.ocr_latency, args.agent_rate, args.finalize_rate, args.retry_rate, args.seed)
+    for key, value in metrics.items():
+        print(f"{key:>26}: {value}")
+    for action, counter in sorted(errors.items()):
+        for message, count in counter.most_common(3):
+            print(f"  {action}: {count} x {message}")
+    params = {key: getattr(args, key) for key in ("users", "duration", "think", "ramp", "mix", "cards", "llm_latency",
+                                                   "ocr_latency", "agent_rate", "finalize_rate", "retry_rate", "seed")}
+    return results.report("load", metrics, params, store=not args.no_save)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
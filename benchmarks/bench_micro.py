@@ -0,0 +1,154 @@
+"""Microbenchmarks for the hot functions of the admission pipeline.
+
+Runs offline: cards come from the synthetic generator, and the FAQ retriever
+is built with the hash-based fake embeddings in a temporary directory.
+Results are stored under benchmarks/results/ and compared with the previous run.
+
+    python -m benchmarks.bench_micro --repeat 200
+    python -m benchmarks.bench_micro --only parse_extracted_text shortlist
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+from benchmarks import fakes, results
+from benchmarks.synthetic import generate_cards
+
+SAMPLE_TEXT = """CENTRAL BOARD OF SECONDARY EDUCATION
+STATEMENT OF MARKS
+Name: Meera Iyer
+Roll No: 4821907
+Registration No: REG202141377
+Subject Marks
+English 88
+Mathematics 93
+Result Total Overall Grade
+PASS 452 A+
+"""
+
+
+def measure(func, repeat, warmup=3):
+    """Call ``func`` ``repeat`` times; return throughput and latency percentiles."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    total = sum(samples)
+    return {
+        "calls": repeat,
+        "calls_per_second": round(repeat / total, 1) if total else None,
+        "mean_us": round(total / repeat * 1e6, 2),
+        "p50_us": round(samples[len(samples) // 2] * 1e6, 2),
+        "p95_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1e6, 2),
+    }
+
+
+def bench_extract_text(repeat, tesseract_path=None):
+    from doc_extrac_shortlist import DocumentCheckingAgent, ocr_cache
+
+    checker = DocumentCheckingAgent(tesseract_path)
+    cards = [data for _, data, _ in generate_cards(5, seed=1)]
+    state = {"i": 0}
+
+    def cold():
+        # Clearing the cache measures the full decode + preprocess + Tesseract path
+        ocr_cache.clear()
+        checker.extract_text_from_image(cards[state["i"] % len(cards)])
+        state["i"] += 1
+
+    def warm():
+        checker.extract_text_from_image(cards[0])
+
+    return {"cold": measure(cold, max(repeat // 20, 5), warmup=1), "cached": measure(warm, repeat)}
+
+
+def bench_parse(repeat):
+    from doc_extrac_shortlist import parse_extracted_text
+    return measure(lambda: parse_extracted_text(SAMPLE_TEXT), repeat)
+
+
+def bench_shortlist(repeat):
+    from doc_extrac_shortlist import ShortlistingAgent, parse_extracted_text
+
+    agent = ShortlistingAgent()
+    payload = json.dumps({
+        "verification_result": {"status": "verified", "message": "Document is valid."},
+        "extracted_text": parse_extracted_text(SAMPLE_TEXT).to_dict(),
+    })
+    return measure(lambda: agent.shortlist(payload), repeat)
+
+
+def bench_approve_loan(repeat):
+    from budget_ledger import BudgetLedger
+    from loan_agent import LoanDecisionAgent
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_micro_ledger.db")
+    agent = LoanDecisionAgent(500000, 300000, ledger=BudgetLedger(path, initial_budget=500000))
+    payload = json.dumps({"shortlisted": "shortlisted", "annual_income": 250000, "requested_loan": 120000})
+    return measure(lambda: agent.approve_loan(payload), repeat)
+
+
+def bench_faq_retrieval(repeat):
+    from faq_index import load_vector_index
+
+    embeddings = fakes.HashEmbeddings()
+    index = load_vector_index(embeddings, directory=tempfile.mkdtemp())
+    retriever = index.as_retriever(embeddings, k=2, filter={"domain": "admission"})
+    questions = ["What documents are required for admission?", "When is the last date to apply?",
+                 "Is there a hostel facility?", "How do I pay the fees?"]
+    state = {"i": 0}
+
+    def query():
+        retriever.invoke(questions[state["i"] % len(questions)])
+        state["i"] += 1
+
+    return measure(query, repeat)
+
+
+BENCHMARKS = {
+    "extract_text_from_image": bench_extract_text,
+    "parse_extracted_text": bench_parse,
+    "shortlist": bench_shortlist,
+    "approve_loan": bench_approve_loan,
+    "faq_retrieval": bench_faq_retrieval,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline microbenchmarks.")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument("--tesseract", default=None, help="Path to the tesseract executable")
+    parser.add_argument("--no-save", action="store_true", help="Compare with the previous run but don't store this one")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative slowdown before flagging")
+    args = parser.parse_args(argv)
+
+    # Set before the app is imported: events go to a scratch store, and cold OCR
+    # runs cycle through the same cards, so duplicate reuse would skip the OCR
+    os.environ["EVENT_STORE_PATH"] = os.path.join(tempfile.mkdtemp(), "events.db")
+    os.environ["PHASH_INDEX_ENABLED"] = "0"
+    fakes.install()
+    metrics = {}
+    for name in args.only or BENCHMARKS:
+        bench = BENCHMARKS[name]
+        kwargs = {"tesseract_path": args.tesseract} if name == "extract_text_from_image" else {}
+        try:
+            metrics[name] = bench(args.repeat, **kwargs)
+        except Exception as e:
+            print(f"{name}: skipped ({type(e).__name__}: {e})", file=sys.stderr)
+            continue
+        print(f"{name:>24}: {json.dumps(metrics[name])}")
+
+    params = {"repeat": args.repeat, "only": sorted(args.only or BENCHMARKS)}
+    return results.report("micro", metrics, params, store=not args.no_save, tolerance=args.tolerance)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
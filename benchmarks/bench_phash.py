@@ -0,0 +1,94 @@
+"""Near-duplicate lookup latency with hundreds of thousands of stored hashes.
+
+Stored 64-bit codes are grouped around ``templates`` centers, as cards printed
+from the same board template are, so a query has many true neighbours. Each
+query is a stored code with a few flipped bits, like a re-photographed copy.
+Multi-index hashing is compared with a vectorized brute-force popcount scan.
+Recall is the share of brute-force neighbours within the radius that
+multi-index hashing also returns (it should be exact).
+
+    python -m benchmarks.bench_phash --rows 300000 --queries 1000 --radius 8
+"""
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from phash_index import MultiIndexHash, popcount
+from benchmarks import results
+
+
+def flip_bits(codes, rng, max_bits):
+    """Codes with up to ``max_bits`` random bits flipped each."""
+    noise = np.zeros(len(codes), dtype=np.uint64)
+    for _ in range(max_bits):
+        bits = rng.integers(0, 64, len(codes)).astype(np.uint64)
+        noise ^= np.where(rng.random(len(codes)) < 0.5, np.uint64(1) << bits, np.uint64(0))
+    return codes ^ noise
+
+
+def percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 4)
+
+
+def run(rows=300000, queries=1000, radius=8, templates=2000, spread=6, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.integers(0, 2 ** 63, templates, dtype=np.int64).astype(np.uint64) * np.uint64(2) + np.uint64(1)
+    codes = flip_bits(centers[rng.integers(0, templates, rows)], rng, spread)
+    probes = flip_bits(codes[rng.integers(0, rows, queries)], rng, radius // 2)
+
+    start = time.perf_counter()
+    index = MultiIndexHash(radius)
+    index.add(codes)
+    index.rebuild()
+    build_seconds = time.perf_counter() - start
+
+    mih, found = [], []
+    for code in probes:
+        start = time.perf_counter()
+        positions, _ = index.search(code)
+        mih.append(time.perf_counter() - start)
+        found.append(positions)
+
+    brute, expected, matched = [], 0, 0
+    for code, positions in zip(probes, found):
+        start = time.perf_counter()
+        exact = np.flatnonzero(popcount(codes ^ code) <= radius)
+        brute.append(time.perf_counter() - start)
+        expected += len(exact)
+        matched += len(np.intersect1d(positions, exact))
+
+    return {
+        "rows": rows,
+        "build_seconds": round(build_seconds, 3),
+        "mih_p50_ms": percentile_ms(mih, 50),
+        "mih_p99_ms": percentile_ms(mih, 99),
+        "brute_force_p50_ms": percentile_ms(brute, 50),
+        "brute_force_p99_ms": percentile_ms(brute, 99),
+        "mih_lookups_per_second": round(len(mih) / sum(mih), 1),
+        "neighbours_per_query": round(sum(map(len, found)) / queries, 1),
+        "recall_accuracy": round(matched / expected, 4) if expected else 1.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=300000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--radius", type=int, default=8, help="Hamming distance of a near-duplicate")
+    parser.add_argument("--templates", type=int, default=2000, help="Groups of similar stored codes")
+    parser.add_argument("--spread", type=int, default=6, help="Bits flipped around a template")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-save", action="store_true", help="Compare with the previous run but don't store this one")
+    args = parser.parse_args(argv)
+
+    metrics = run(args.rows, args.queries, args.radius, args.templates, args.spread, args.seed)
+    for key, value in metrics.items():
+        print(f"{key:>26}: {value}")
+    params = {key: getattr(args, key) for key in ("rows", "queries", "radius", "templates", "spread", "seed")}
+    return results.report("phash", metrics, params, store=not args.no_save)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
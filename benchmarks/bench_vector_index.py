@@ -0,0 +1,100 @@
+"""Vector index latency, recall and footprint at FAQ-corpus scale.
+
+Builds ``VectorIndex`` from synthetic clustered embeddings split across two
+domains and measures single and batched top-k search, brute force and IVF,
+for float16 and int8 storage. Recall@k is measured against exact float32
+search, and the stored size is compared with the float32 matrix.
+
+    python -m benchmarks.bench_vector_index --rows 100000 --dim 384 --queries 500
+"""
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from vector_index import VectorIndex, normalize
+from benchmarks import results
+
+
+def synthetic_embeddings(rows, dim, topics=500, spread=0.07, seed=0):
+    """Unit vectors grouped around ``topics`` directions, like FAQ entries on shared subjects."""
+    rng = np.random.default_rng(seed)
+    centers = normalize(rng.standard_normal((topics, dim)))
+    topic = rng.integers(0, topics, rows)
+    return normalize(centers[topic] + spread * rng.standard_normal((rows, dim))), centers
+
+
+def percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 4)
+
+
+def run(rows=100000, dim=384, queries=500, k=4, batch=32, nprobe=8, seed=0):
+    vectors, centers = synthetic_embeddings(rows, dim, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    probes = normalize(centers[rng.integers(0, len(centers), queries)] + 0.04 * rng.standard_normal((queries, dim)))
+    ids = [f"faq:{i}" for i in range(rows)]
+    texts = [f"entry {i}" for i in range(rows)]
+    metadata = [{"domain": "admission" if i % 2 else "loan"} for i in range(rows)]
+    exact = np.argsort(-(vectors @ probes.T), axis=0)[:k].T
+
+    metrics = {"rows": rows, "dim": dim, "float32_bytes": int(vectors.nbytes)}
+    for dtype in ("float16", "int8"):
+        for mode, nlist in (("brute", 0), ("ivf", None)):
+            start = time.perf_counter()
+            index = VectorIndex.build(tempfile.mkdtemp(), ids, texts, vectors, metadata, dtype=dtype, nlist=nlist)
+            build_seconds = time.perf_counter() - start
+            name = f"{dtype}_{mode}"
+
+            latencies, hits = [], 0
+            for j, query in enumerate(probes):
+                start = time.perf_counter()
+                found = index.search(query, k, nprobe=nprobe)[0]
+                latencies.append(time.perf_counter() - start)
+                hits += len({index.ids[row] for row, _ in found} & {ids[i] for i in exact[j]})
+
+            start = time.perf_counter()
+            for offset in range(0, queries, batch):
+                index.search(probes[offset:offset + batch], k, nprobe=nprobe)
+            batched = (time.perf_counter() - start) / queries
+
+            filtered = []
+            for query in probes[:100]:
+                start = time.perf_counter()
+                index.search(query, k, filter={"domain": "loan"}, nprobe=nprobe)
+                filtered.append(time.perf_counter() - start)
+
+            metrics.update({
+                f"{name}_build_seconds": round(build_seconds, 3),
+                f"{name}_p50_ms": percentile_ms(latencies, 50),
+                f"{name}_p99_ms": percentile_ms(latencies, 99),
+                f"{name}_batched_per_query_ms": round(batched * 1000, 4),
+                f"{name}_filtered_p50_ms": percentile_ms(filtered, 50),
+                f"{name}_recall_accuracy": round(hits / (queries * k), 4),
+                f"{name}_stored_bytes": int(index.nbytes()),
+            })
+    return metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=32, help="Queries per batched search")
+    parser.add_argument("--nprobe", type=int, default=8, help="IVF clusters scanned per query")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-save", action="store_true", help="Compare with the previous run but don't store this one")
+    args = parser.parse_args(argv)
+
+    metrics = run(args.rows, args.dim, args.queries, args.k, args.batch, args.nprobe, args.seed)
+    for key, value in metrics.items():
+        print(f"{key:>36}: {value}")
+    params = {key: getattr(args, key) for key in ("rows", "dim", "queries", "k", "batch", "nprobe", "seed")}
+    return results.report("vector_index", metrics, params, store=not args.no_save)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
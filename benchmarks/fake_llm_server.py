@@ -0,0 +1,102 @@
+"""Local stand-in for an LLM provider, for exercising the LLM gateway.
+
+Answers POST {"prompt", "stop"} with {"text"} after a configurable latency,
+fails a configurable fraction of requests with HTTP 503 and counts how many
+requests actually arrived, so coalescing and retries can be observed.
+
+    python -m benchmarks.fake_llm_server --port 8765 --latency 0.5 --fail-rate 0.1
+    LLM_PROVIDER=local LOCAL_LLM_URL=http://127.0.0.1:8765/generate streamlit run main.py
+
+With ``--bench N`` it also fires N concurrent gateway calls (half of them
+duplicates) at itself and prints what the gateway and the server saw.
+"""
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    latency = 0.2
+    fail_rate = 0.0
+    requests_seen = 0
+    _lock = threading.Lock()
+
+    def do_POST(self):
+        with FakeLLMHandler._lock:
+            FakeLLMHandler.requests_seen += 1
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        time.sleep(random.uniform(0.5, 1.5) * self.latency)
+        if random.random() < self.fail_rate:
+            self.send_response(503)
+            self.end_headers()
+            return
+        digest = hashlib.sha256(body.get("prompt", "").encode("utf-8")).hexdigest()[:12]
+        payload = json.dumps({"text": f"Final Answer: fake response {digest}"}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port, latency, fail_rate):
+    FakeLLMHandler.latency = latency
+    FakeLLMHandler.fail_rate = fail_rate
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeLLMHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench(port, calls):
+    from concurrent.futures import ThreadPoolExecutor
+    from llm_gateway import gateway, HTTPProvider
+
+    gateway.register("fake", lambda: HTTPProvider(f"http://127.0.0.1:{port}/generate"))
+    prompts = [f"question {i % max(calls // 2, 1)}" for i in range(calls)]
+    errors = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(calls, 64)) as pool:
+        futures = [pool.submit(gateway.complete, "fake", prompt) for prompt in prompts]
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                errors += 1
+    elapsed = time.perf_counter() - start
+    stats = next(row for row in gateway.stats() if row["provider"] == "fake")
+    print(f"{calls} calls in {elapsed:.2f}s ({errors} failed); server saw {FakeLLMHandler.requests_seen} requests")
+    print(json.dumps(stats, indent=2))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake LLM HTTP server.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Mean seconds per response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--bench", type=int, default=0, help="Run N concurrent gateway calls against the server and exit")
+    args = parser.parse_args(argv)
+
+    server = serve(args.port, args.latency, args.fail_rate)
+    if args.bench:
+        bench(args.port, args.bench)
+        server.shutdown()
+        return 0
+    print(f"Fake LLM listening on http://127.0.0.1:{args.port}/generate", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
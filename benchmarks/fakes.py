@@ -0,0 +1,163 @@
+"""Deterministic, offline stand-ins for the LLM, the embedding model and Tesseract.
+
+``install()`` registers them in the shared registry under ``llm``,
+``streaming_llm`` and ``embeddings``, so every existing chain, agent and
+vector store runs unchanged without Cohere or Hugging Face. Setting
+``HELPDESK_MODELS=fake`` does the same when the registry is imported.
+``OCR_BACKEND=fake`` selects ``FakeOCRBackend`` for document checking.
+"""
+import re
+import time
+import random
+import hashlib
+import threading
+from typing import Any, List, Optional
+import cv2
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.llms import LLM
+from registry import registry
+
+
+class FakeLLM(LLM):
+    """Answers every prompt with the same text for the same input.
+
+    ReAct prompts get a ``Final Answer:`` straight away so agents finish in one
+    step; ``latency`` (seconds) simulates provider response time.
+    """
+
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self):
+        return "fake"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        answer = f"This is a deterministic answer ({digest})."
+        if "Final Answer" in prompt:
+            return f"Thought: I now know the final answer\nFinal Answer: {answer}"
+        return answer
+
+
+class HashEmbeddings(Embeddings):
+    """Bag-of-words feature hashing: texts sharing words get similar vectors."""
+
+    def __init__(self, dimensions=384):
+        self.dimensions = dimensions
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[h % self.dimensions] += 1.0 if (h >> 32) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+class FakeOCRBackend:
+    """Reads every page as a synthetic result card picked by the image content.
+
+    Pages are told apart by a 16x16 thumbnail of their inked area, so a
+    rescaled copy (the fast ladder pass), a re-encoded upload and the page a
+    crop was cut from all read as the same card, and different images as
+    different cards. Words are laid out relative to the inked area. A crop
+    (a view into a page, as the layout and duplicate checks take) returns the
+    words inside it. Full pages take ``latency`` seconds, crops a tenth of that.
+    """
+
+    name = "fake"
+    # Largest thumbnail difference (grey levels) still read as the same page
+    TOLERANCE = 5.0
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self._pages = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def card_lines(seed):
+        from benchmarks.synthetic import random_truth
+
+        rng = random.Random(seed)
+        truth = random_truth(rng)
+        total = rng.randint(180, 490) if truth["result"] == "PASS" else rng.randint(50, 180)
+        return [
+            truth["board"].split(),
+            ["STATEMENT", "OF", "MARKS"],
+            ["Name:", *truth["name"].split()],
+            ["Roll", "No:", truth["roll_no"]],
+            ["Registration", "No:", truth["registration_no"]],
+            ["Result", "Total", "Overall", "Grade"],
+            [truth["result"], str(total), truth["overall_grade"]],
+        ]
+
+    def _seed(self, ink):
+        thumbnail = cv2.resize(ink.astype(np.float32), (16, 16), interpolation=cv2.INTER_AREA)
+        with self._lock:
+            for known, seed in self._pages:
+                if np.abs(known - thumbnail).max() <= self.TOLERANCE:
+                    return seed
+            seed = int.from_bytes(hashlib.blake2b(np.round(thumbnail).tobytes(), digest_size=8).digest(), "little")
+            self._pages.append((thumbnail, seed))
+            return seed
+
+    def _page_words(self, page):
+        ys, xs = np.nonzero(page < 128)
+        if not len(ys):
+            return []
+        top, left, bottom, right = ys.min(), xs.min(), ys.max() + 1, xs.max() + 1
+        lines = self.card_lines(self._seed(page[top:bottom, left:right]))
+        line_height = (bottom - top) / len(lines)
+        words = []
+        for line_num, line in enumerate(lines, start=1):
+            x = 0.05
+            for word in line:
+                width = 0.018 * len(word)
+                words.append({"text": word, "left": left + int(x * (right - left)),
+                              "top": top + int((line_num - 1 + 0.3) * line_height),
+                              "width": max(int(width * (right - left)), 1), "height": max(int(0.4 * line_height), 1),
+                              "line_num": line_num})
+                x += width + 0.02
+        return words
+
+    @staticmethod
+    def _page_of(gray):
+        """(page, row, column) of ``gray`` within the array it is a view of."""
+        base = gray.base
+        if not isinstance(base, np.ndarray) or base.ndim != 2 or base.dtype != gray.dtype or base.strides != gray.strides:
+            return gray, 0, 0
+        row, rest = divmod(gray.__array_interface__["data"][0] - base.__array_interface__["data"][0], base.strides[0])
+        return base, row, rest // base.strides[1]
+
+    def image_to_data(self, gray, psm=None):
+        data = {key: [] for key in ("text", "left", "top", "width", "height", "conf",
+                                    "block_num", "par_num", "line_num")}
+        page, row, column = self._page_of(gray)
+        height, width = gray.shape[:2]
+        if self.latency:
+            time.sleep(self.latency if gray.size * 4 >= page.size else self.latency / 10)
+        for word in self._page_words(page):
+            middle_y, middle_x = word["top"] + word["height"] / 2 - row, word["left"] + word["width"] / 2 - column
+            if not (0 <= middle_y < height and 0 <= middle_x < width):
+                continue
+            for key, value in (("text", word["text"]), ("left", word["left"] - column), ("top", word["top"] - row),
+                               ("width", word["width"]), ("height", word["height"]), ("conf", 95.0),
+                               ("block_num", 1), ("par_num", 1), ("line_num", word["line_num"])):
+                data[key].append(value)
+        return data
+
+
+def install(latency=0.0, dimensions=384):
+    """Swap the shared LLM and embedding components for the fakes."""
+    registry.register("llm", lambda: FakeLLM(latency=latency))
+    registry.register("streaming_llm", lambda: FakeLLM(latency=latency))
+    registry.register("embeddings", lambda: HashEmbeddings(dimensions))
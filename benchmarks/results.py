@@ -0,0 +1,100 @@
+"""Stored benchmark results and regression checks.
+
+Each run is appended as one JSON line to ``benchmarks/results/<benchmark>.jsonl``
+with the git revision and machine it ran on. ``compare`` checks a new run
+against the previous one on the same machine. Throughput and accuracy must not
+drop, and latencies must not grow, by more than the tolerance.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Metric name suffixes that say which direction is an improvement; other metrics are not compared
+HIGHER_IS_BETTER = ("_per_second", "accuracy", "hit_rate")
+LOWER_IS_BETTER = ("_ms", "_us", "_seconds", "error_rate")
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(RESULTS_DIR), timeout=10,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment():
+    return {
+        "revision": _git_revision(),
+        "machine": platform.node(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def _path(benchmark):
+    return os.path.join(RESULTS_DIR, f"{benchmark}.jsonl")
+
+
+def load(benchmark):
+    try:
+        with open(_path(benchmark), encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def save(benchmark, metrics, params=None):
+    entry = {"ts": time.time(), **environment(), "params": params or {}, "metrics": metrics}
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(_path(benchmark), "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+    return entry
+
+
+def _flatten(metrics, prefix=""):
+    flat = {}
+    for key, value in metrics.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(benchmark, metrics, params=None, tolerance=0.1):
+    """Regression messages for ``metrics`` against the last stored run with the same params and machine."""
+    machine = platform.node()
+    previous = [entry for entry in load(benchmark)
+                if entry.get("machine") == machine and entry.get("params") == (params or {})]
+    if not previous:
+        return []
+    baseline = _flatten(previous[-1]["metrics"])
+    regressions = []
+    for name, value in _flatten(metrics).items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        change = (value - before) / abs(before)
+        if name.endswith(HIGHER_IS_BETTER) and change < -tolerance:
+            regressions.append(f"{name}: {before} -> {value} ({change:+.0%})")
+        elif name.endswith(LOWER_IS_BETTER) and change > tolerance:
+            regressions.append(f"{name}: {before} -> {value} ({change:+.0%})")
+    return regressions
+
+
+def report(benchmark, metrics, params=None, store=True, tolerance=0.1):
+    """Print regressions against the previous run, then store this one. Returns the exit code."""
+    regressions = compare(benchmark, metrics, params, tolerance)
+    for line in regressions:
+        print(f"REGRESSION {benchmark} {line}", file=sys.stderr)
+    if store:
+        save(benchmark, metrics, params)
+    return 1 if regressions else 0
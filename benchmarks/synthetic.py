@@ -0,0 +1,142 @@
+"""Synthetic result-card images with known ground truth.
+
+Cards are drawn with OpenCV in the layout the parser and layout extractor
+expect (labelled Name / Roll No / Registration No lines and a Result / Total /
+Overall Grade table), then degraded with rotation, Gaussian noise, blur and a
+varying resolution to look like phone photos and scans.
+
+    python -m benchmarks.synthetic -n 200 -o cards/ --noise 12 --max-rotation 3
+"""
+import os
+import sys
+import csv
+import random
+import argparse
+import cv2
+import numpy as np
+
+BOARDS = [
+    "CENTRAL BOARD OF SECONDARY EDUCATION",
+    "STATE BOARD OF HIGHER SECONDARY EDUCATION",
+    "COUNCIL FOR SCHOOL CERTIFICATE EXAMINATIONS",
+]
+FIRST_NAMES = ["Aarav", "Diya", "Ishaan", "Meera", "Rohan", "Sara", "Kabir", "Anaya", "Vivaan", "Tara"]
+LAST_NAMES = ["Sharma", "Iyer", "Khan", "Das", "Reddy", "Patel", "Nair", "Singh", "Gupta", "Bose"]
+SUBJECTS = ["English", "Mathematics", "Physics", "Chemistry", "Biology", "Computer Science"]
+GRADES = ["A+", "A", "B+", "B", "C", "D"]
+TRUTH_FIELDS = ["file", "name", "roll_no", "registration_no", "result", "overall_grade", "board"]
+
+# Page size in pixels at 150 DPI (A4 portrait); ``scale`` resizes from here
+PAGE_WIDTH, PAGE_HEIGHT = 1240, 1754
+
+
+def random_truth(rng):
+    result = "PASS" if rng.random() < 0.85 else "FAIL"
+    return {
+        "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "roll_no": str(rng.randint(1000000, 9999999)),
+        "registration_no": f"REG{rng.randint(2015, 2024)}{rng.randint(10000, 99999)}",
+        "result": result,
+        "overall_grade": rng.choice(GRADES) if result == "PASS" else "F",
+        "board": rng.choice(BOARDS),
+    }
+
+
+def render_card(truth, rng):
+    """Clean grayscale card image (uint8, white background) for ``truth``."""
+    img = np.full((PAGE_HEIGHT, PAGE_WIDTH), 255, dtype=np.uint8)
+    font = cv2.FONT_HERSHEY_SIMPLEX
+
+    def text(x, y, value, scale=1.0, thickness=2):
+        cv2.putText(img, value, (x, y), font, scale, 0, thickness, cv2.LINE_AA)
+
+    text(90, 140, truth["board"], 1.05, 3)
+    text(380, 210, "STATEMENT OF MARKS", 1.1, 2)
+    y = 330
+    for label, key in (("Name", "name"), ("Roll No", "roll_no"), ("Registration No", "registration_no")):
+        text(110, y, f"{label}:", 1.0)
+        text(520, y, truth[key], 1.0)
+        y += 70
+
+    y += 40
+    text(110, y, "Subject", 1.0)
+    text(800, y, "Marks", 1.0)
+    cv2.line(img, (100, y + 20), (1140, y + 20), 0, 2)
+    total = 0
+    for subject in rng.sample(SUBJECTS, 5):
+        y += 65
+        marks = rng.randint(35, 99) if truth["result"] == "PASS" else rng.randint(10, 60)
+        total += marks
+        text(110, y, subject, 0.95)
+        text(820, y, str(marks), 0.95)
+
+    y += 130
+    text(110, y, "Result", 1.0)
+    text(420, y, "Total", 1.0)
+    text(700, y, "Overall Grade", 1.0)
+    y += 70
+    text(110, y, truth["result"], 1.0)
+    text(420, y, str(total), 1.0)
+    text(700, y, truth["overall_grade"], 1.0)
+    return img
+
+
+def degrade(img, rng, noise=8.0, max_rotation=2.0, scale=1.0, blur=True):
+    """Rotate, rescale, blur and add Gaussian noise."""
+    angle = rng.uniform(-max_rotation, max_rotation)
+    if angle:
+        h, w = img.shape
+        matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+        img = cv2.warpAffine(img, matrix, (w, h), borderValue=255, flags=cv2.INTER_LINEAR)
+    if scale != 1.0:
+        img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    if blur:
+        img = cv2.GaussianBlur(img, (3, 3), 0)
+    if noise:
+        np_rng = np.random.default_rng(rng.randint(0, 2 ** 32 - 1))
+        img = np.clip(img + np_rng.normal(0, noise, img.shape), 0, 255).astype(np.uint8)
+    return img
+
+
+def generate_cards(n, seed=0, noise=8.0, max_rotation=2.0, scales=(0.75, 1.0, 1.5), fmt="png"):
+    """Yield (file_name, encoded image bytes, truth dict) for ``n`` cards.
+    The same seed always yields the same cards."""
+    rng = random.Random(seed)
+    for i in range(n):
+        truth = random_truth(rng)
+        img = degrade(render_card(truth, rng), rng, noise, max_rotation, rng.choice(scales))
+        ok, encoded = cv2.imencode(f".{fmt}", img, [cv2.IMWRITE_JPEG_QUALITY, 85] if fmt == "jpg" else [])
+        if not ok:
+            raise RuntimeError("Could not encode synthetic card")
+        name = f"card_{i:05d}.{fmt}"
+        yield name, encoded.tobytes(), {"file": name, **truth}
+
+
+def expected_decision(truth, accepted_grades=("B", "B+", "A", "A+")):
+    return "Shortlisted" if truth["result"] == "PASS" and truth["overall_grade"] in accepted_grades else "Rejected"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic result cards with ground truth.")
+    parser.add_argument("-n", "--count", type=int, default=100)
+    parser.add_argument("-o", "--output", required=True, help="Directory for the images and ground_truth.csv")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--noise", type=float, default=8.0, help="Gaussian noise standard deviation")
+    parser.add_argument("--max-rotation", type=float, default=2.0, help="Maximum skew in degrees")
+    parser.add_argument("--format", choices=["png", "jpg"], default="png")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output, exist_ok=True)
+    with open(os.path.join(args.output, "ground_truth.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=TRUTH_FIELDS)
+        writer.writeheader()
+        for name, data, truth in generate_cards(args.count, args.seed, args.noise, args.max_rotation, fmt=args.format):
+            with open(os.path.join(args.output, name), "wb") as image:
+                image.write(data)
+            writer.writerow(truth)
+    print(f"Wrote {args.count} cards to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
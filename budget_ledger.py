@@ -0,0 +1,240 @@
+"""Concurrency-safe, persistent loan budget ledger.
+
+The university budget lives in a SQLite database in WAL mode so every Streamlit
+session and every server process sees the same balance and it survives
+restarts. Money moves through reservations: ``reserve`` atomically takes the
+amount out of the available balance, ``commit`` makes it final and ``release``
+gives it back. Each reservation can carry an idempotency key so a retried or
+re-rendered approval never spends twice, and every change is written to an
+audit log in the same transaction.
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ledger (
+    name TEXT PRIMARY KEY,
+    total INTEGER NOT NULL,
+    available INTEGER NOT NULL,
+    reserved INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS reservations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ledger TEXT NOT NULL,
+    idempotency_key TEXT UNIQUE,
+    amount INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS audit_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ledger TEXT NOT NULL,
+    ts REAL NOT NULL,
+    action TEXT NOT NULL,
+    reservation_id INTEGER,
+    amount INTEGER,
+    available_after INTEGER,
+    detail TEXT
+);
+"""
+
+
+class LedgerError(Exception):
+    pass
+
+
+class InsufficientBudget(LedgerError):
+    pass
+
+
+class IdempotencyConflict(LedgerError):
+    pass
+
+
+def _to_units(amount):
+    # Stored in paise so repeated arithmetic never drifts
+    return int(round(float(amount) * 100))
+
+
+def _from_units(units):
+    return units / 100
+
+
+class BudgetLedger:
+    def __init__(self, path=None, name="loan_budget", initial_budget=None, timeout=30.0):
+        self.path = path or os.getenv("LOAN_LEDGER_PATH", "loan_budget.db")
+        self.name = name
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connection()
+        if initial_budget is not None:
+            self.initialize(initial_budget)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def _audit(self, conn, action, reservation_id, amount, detail=None):
+        available = conn.execute("SELECT available FROM ledger WHERE name = ?", (self.name,)).fetchone()[0]
+        conn.execute(
+            "INSERT INTO audit_log (ledger, ts, action, reservation_id, amount, available_after, detail) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.name, time.time(), action, reservation_id, amount, available,
+             json.dumps(detail) if detail is not None else None),
+        )
+
+    def initialize(self, total):
+        """Create the ledger with ``total`` budget unless it already exists."""
+        units = _to_units(total)
+        with self._transaction() as conn:
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO ledger (name, total, available) VALUES (?, ?, ?)",
+                (self.name, units, units),
+            ).rowcount
+            if inserted:
+                self._audit(conn, "initialize", None, units)
+
+    def balance(self):
+        row = self._connection().execute(
+            "SELECT total, available, reserved FROM ledger WHERE name = ?", (self.name,)
+        ).fetchone()
+        if row is None:
+            raise LedgerError(f"Ledger '{self.name}' has not been initialized")
+        total, available, reserved = row
+        return {"total": _from_units(total), "available": _from_units(available), "reserved": _from_units(reserved)}
+
+    def available(self):
+        return self.balance()["available"]
+
+    def _reservation(self, conn, column, value):
+        row = conn.execute(
+            f"SELECT id, idempotency_key, amount, status FROM reservations WHERE {column} = ?", (value,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "idempotency_key": row[1], "amount": _from_units(row[2]), "status": row[3]}
+
+    def reserve(self, amount, idempotency_key=None, detail=None):
+        """Atomically hold ``amount`` from the available budget.
+
+        Retrying with the same idempotency key returns the original reservation
+        instead of reserving again; reusing the key for a different amount raises
+        IdempotencyConflict. Raises InsufficientBudget if it doesn't fit.
+        """
+        units = _to_units(amount)
+        if units <= 0:
+            raise LedgerError("Reservation amount must be positive")
+        with self._transaction() as conn:
+            if idempotency_key is not None:
+                existing = self._reservation(conn, "idempotency_key", idempotency_key)
+                if existing is not None:
+                    if _to_units(existing["amount"]) != units:
+                        raise IdempotencyConflict(
+                            f"Key '{idempotency_key}' already reserved {existing['amount']}, not {_from_units(units)}"
+                        )
+                    return existing
+            updated = conn.execute(
+                "UPDATE ledger SET available = available - ?, reserved = reserved + ? "
+                "WHERE name = ? AND available >= ?",
+                (units, units, self.name, units),
+            ).rowcount
+            if not updated:
+                raise InsufficientBudget(
+                    f"Requested {_from_units(units)} exceeds remaining budget ({self.available()})"
+                )
+            now = time.time()
+            reservation_id = conn.execute(
+                "INSERT INTO reservations (ledger, idempotency_key, amount, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'reserved', ?, ?)",
+                (self.name, idempotency_key, units, now, now),
+            ).lastrowid
+            self._audit(conn, "reserve", reservation_id, units, detail)
+        return {"id": reservation_id, "idempotency_key": idempotency_key,
+                "amount": _from_units(units), "status": "reserved"}
+
+    def _settle(self, reservation_id, status, detail):
+        with self._transaction() as conn:
+            reservation = self._reservation(conn, "id", reservation_id)
+            if reservation is None:
+                raise LedgerError(f"Unknown reservation {reservation_id}")
+            if reservation["status"] == status:
+                return reservation  # already settled this way: idempotent
+            if reservation["status"] != "reserved":
+                raise LedgerError(f"Reservation {reservation_id} is already {reservation['status']}")
+            units = _to_units(reservation["amount"])
+            if status == "committed":
+                conn.execute("UPDATE ledger SET reserved = reserved - ? WHERE name = ?", (units, self.name))
+            else:
+                conn.execute(
+                    "UPDATE ledger SET reserved = reserved - ?, available = available + ? WHERE name = ?",
+                    (units, units, self.name),
+                )
+            conn.execute(
+                "UPDATE reservations SET status = ?, updated_at = ? WHERE id = ?",
+                (status, time.time(), reservation_id),
+            )
+            self._audit(conn, "commit" if status == "committed" else "release", reservation_id, units, detail)
+        reservation["status"] = status
+        return reservation
+
+    def commit(self, reservation_id, detail=None):
+        """Make a reservation final."""
+        return self._settle(reservation_id, "committed", detail)
+
+    def release(self, reservation_id, detail=None):
+        """Return a reserved amount to the available budget."""
+        return self._settle(reservation_id, "released", detail)
+
+    def spend(self, amount, idempotency_key=None, detail=None):
+        """Reserve and immediately commit ``amount``."""
+        reservation = self.reserve(amount, idempotency_key, detail)
+        if reservation["status"] == "reserved":
+            reservation = self.commit(reservation["id"])
+        return reservation
+
+    def audit_log(self, limit=100):
+        rows = self._connection().execute(
+            "SELECT ts, action, reservation_id, amount, available_after, detail FROM audit_log "
+            "WHERE ledger = ? ORDER BY id DESC LIMIT ?",
+            (self.name, limit),
+        ).fetchall()
+        return [
+            {
+                "ts": ts,
+                "action": action,
+                "reservation_id": reservation_id,
+                "amount": _from_units(amount) if amount is not None else None,
+                "available_after": _from_units(available_after) if available_after is not None else None,
+                "detail": json.loads(detail) if detail else None,
+            }
+            for ts, action, reservation_id, amount, available_after, detail in rows
+        ]
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK: takes the write lock up front so
+    concurrent processes serialize instead of failing on lock upgrades."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
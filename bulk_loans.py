@@ -0,0 +1,174 @@
+"""Vectorized bulk loan eligibility and budget allocation.
+
+Applies the same rules as LoanDecisionAgent (shortlisted, income under the
+threshold, fits in the budget) to a whole CSV/Parquet file of applicants with
+NumPy/pandas array operations, then allocates the budget across the eligible
+applicants under a selectable policy:
+
+* ``fifo``          – in file order, like the one-at-a-time agent
+* ``lowest_income`` – lowest annual income funded first
+* ``max_funded``    – smallest requests first, which maximizes the number of
+                      applicants funded
+
+    python bulk_loans.py applicants.csv -o decisions.csv --policy max_funded
+"""
+import sys
+import time
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+
+POLICIES = ("fifo", "lowest_income", "max_funded")
+
+COLUMN_ALIASES = {
+    "shortlisted": ("shortlisted", "shortlisting_status", "status"),
+    "annual_income": ("annual_income", "income"),
+    "requested_loan": ("requested_loan", "requested_amount", "loan_amount"),
+}
+
+
+def read_applicants(path):
+    if path.lower().endswith((".parquet", ".pq")):
+        return normalize_columns(pd.read_parquet(path))
+    return normalize_columns(pd.read_csv(path))
+
+
+def normalize_columns(df):
+    """Rename accepted column aliases to shortlisted / annual_income / requested_loan."""
+    rename = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        found = next((alias for alias in aliases if alias in df.columns), None)
+        if found is None:
+            raise ValueError(f"Missing column '{column}' (accepted names: {', '.join(aliases)})")
+        rename[found] = column
+    return df.rename(columns=rename)
+
+
+def write_decisions(df, path):
+    if path.lower().endswith((".parquet", ".pq")):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def _allocation_order(df, policy):
+    if policy == "fifo":
+        return np.arange(len(df))
+    if policy == "lowest_income":
+        return np.argsort(df["annual_income"].to_numpy(), kind="stable")
+    if policy == "max_funded":
+        return np.argsort(df["requested_loan"].to_numpy(), kind="stable")
+    raise ValueError(f"Unknown policy '{policy}' (choose from {', '.join(POLICIES)})")
+
+
+def _greedy_fill(amounts, budget):
+    """Walk ``amounts`` in order, funding each one that still fits.
+
+    The leading run that fits is found with one cumulative sum; after the first
+    request that doesn't fit, the remaining (usually small) budget is filled by
+    skipping ahead, stopping as soon as nothing later can fit.
+    """
+    funded = np.zeros(len(amounts), dtype=bool)
+    if not len(amounts):
+        return funded
+    cumulative = np.cumsum(amounts)
+    k = int(np.searchsorted(cumulative, budget, side="right"))
+    funded[:k] = True
+    remaining = budget - (cumulative[k - 1] if k else 0.0)
+    # Smallest request from each position onward: lets the tail loop stop early
+    suffix_min = np.minimum.accumulate(amounts[::-1])[::-1]
+    for j in range(k + 1, len(amounts)):
+        if suffix_min[j] > remaining:
+            break
+        if amounts[j] <= remaining:
+            funded[j] = True
+            remaining -= amounts[j]
+    return funded
+
+
+def decide(df, budget, income_threshold, policy="fifo"):
+    """Return a copy of ``df`` with decision, reason and remaining_budget columns."""
+    shortlisted = df["shortlisted"].astype(str).str.strip().str.lower().to_numpy() == "shortlisted"
+    income = pd.to_numeric(df["annual_income"], errors="coerce").fillna(0).to_numpy(dtype=float)
+    requested = pd.to_numeric(df["requested_loan"], errors="coerce").fillna(0).to_numpy(dtype=float)
+    eligible = shortlisted & (income <= income_threshold) & (requested > 0)
+
+    order = _allocation_order(df.assign(annual_income=income, requested_loan=requested), policy)
+    order = order[eligible[order]]
+    funded_in_order = _greedy_fill(requested[order], float(budget))
+    approved = np.zeros(len(df), dtype=bool)
+    approved[order[funded_in_order]] = True
+
+    # Budget left after each approval, in allocation order
+    remaining = np.full(len(df), np.nan)
+    spent = np.cumsum(np.where(funded_in_order, requested[order], 0.0))
+    remaining[order] = budget - spent
+
+    reasons = np.select(
+        [~shortlisted, income > income_threshold, requested <= 0, approved],
+        [
+            "Loan Rejected: Student not shortlisted.",
+            "Loan Rejected: Annual income exceeds threshold.",
+            "Loan Rejected: Requested loan amount must be positive.",
+            "Loan Approved.",
+        ],
+        default="Loan Rejected: Requested loan exceeds remaining budget.",
+    )
+
+    out = df.copy()
+    out["decision"] = np.where(approved, "approved", "rejected")
+    out["reason"] = reasons
+    out["remaining_budget"] = np.where(approved, remaining, np.nan)
+    return out
+
+
+def summarize(decisions, budget):
+    approved = decisions["decision"] == "approved"
+    allocated = float(pd.to_numeric(decisions.loc[approved, "requested_loan"]).sum())
+    return {
+        "applicants": len(decisions),
+        "approved": int(approved.sum()),
+        "rejected": int((~approved).sum()),
+        "allocated": allocated,
+        "budget_left": float(budget) - allocated,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk loan eligibility and budget allocation.")
+    parser.add_argument("applicants", help="CSV or Parquet file with shortlisted, annual_income, requested_loan")
+    parser.add_argument("-o", "--output", required=True, help="Decision file (.csv or .parquet)")
+    parser.add_argument("--policy", choices=POLICIES, default="fifo")
+    parser.add_argument("--budget", type=float, default=None, help="Budget to allocate (default: ledger balance)")
+    parser.add_argument("--income-threshold", type=float, default=None)
+    parser.add_argument("--commit", action="store_true", help="Spend the allocated total from the budget ledger")
+    args = parser.parse_args(argv)
+
+    from loan_agent import loan_agent
+
+    budget = args.budget if args.budget is not None else loan_agent.budget
+    income_threshold = args.income_threshold if args.income_threshold is not None else loan_agent.income_threshold
+
+    df = read_applicants(args.applicants)
+    start = time.perf_counter()
+    decisions = decide(df, budget, income_threshold, args.policy)
+    elapsed = time.perf_counter() - start
+    write_decisions(decisions, args.output)
+
+    summary = summarize(decisions, budget)
+    if args.commit and summary["allocated"] > 0:
+        with open(args.applicants, "rb") as f:
+            batch_key = f"bulk:{args.policy}:{hashlib.sha256(f.read()).hexdigest()}"
+        loan_agent.ledger.spend(summary["allocated"], idempotency_key=batch_key, detail=summary)
+
+    print(
+        f"{summary['applicants']} applicants: {summary['approved']} approved, {summary['rejected']} rejected, "
+        f"₹{summary['allocated']:.2f} allocated ({args.policy}) in {elapsed * 1000:.1f} ms",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
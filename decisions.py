@@ -0,0 +1,75 @@
+"""Structured decision API.
+
+Shortlisting and loan eligibility are pure functions of structured data, so the
+app calls the decision engines directly and gets typed results back in
+microseconds. The ReAct agents are only used for free-text questions or when an
+explanation is explicitly requested. Call counts and latency are tracked for
+both paths so the difference is visible on the analytics page, along with the
+tool calls each agent run got from the tool memo.
+"""
+import time
+import threading
+from tracing import tracer, langchain_callbacks
+from tool_memo import track
+from doc_extrac_shortlist import ShortlistDecision, shortlist_agent
+from loan_agent import LoanDecision, loan_agent
+
+
+class DecisionStats:
+    """Thread-safe call counts and latency per (decision, path)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, decision, path, seconds):
+        with self._lock:
+            entry = self._stats.setdefault((decision, path), {"calls": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            entry["calls"] += 1
+            entry["total_seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+
+    def snapshot(self):
+        """Rows of {decision, path, calls, avg_ms, max_ms} for display."""
+        with self._lock:
+            return [
+                {
+                    "decision": decision,
+                    "path": path,
+                    "calls": entry["calls"],
+                    "avg_ms": round(entry["total_seconds"] / entry["calls"] * 1000, 3),
+                    "max_ms": round(entry["max_seconds"] * 1000, 3),
+                }
+                for (decision, path), entry in sorted(self._stats.items())
+            ]
+
+
+decision_stats = DecisionStats()
+
+
+def decide_shortlist(verification_result, parsed_data) -> ShortlistDecision:
+    start = time.perf_counter()
+    with tracer.span("decision.shortlist"):
+        decision = shortlist_agent.evaluate(verification_result, parsed_data)
+    decision_stats.record("shortlist", "fast", time.perf_counter() - start)
+    return decision
+
+
+def decide_loan(shortlisted, annual_income, requested_loan) -> LoanDecision:
+    start = time.perf_counter()
+    with tracer.span("decision.loan"):
+        decision = loan_agent.evaluate(shortlisted, annual_income, requested_loan)
+    decision_stats.record("loan", "fast", time.perf_counter() - start)
+    return decision
+
+
+def run_agent(decision, executor, prompt):
+    """Run a ReAct agent (free-text questions, optional explanations) and record its latency."""
+    start = time.perf_counter()
+    try:
+        with tracer.span(f"agent.{decision}") as span, track() as savings:
+            response = executor.run(prompt, callbacks=langchain_callbacks())
+            span.set(**savings.to_dict())
+            return response
+    finally:
+        decision_stats.record(decision, "agent", time.perf_counter() - start)
@@ -0,0 +1,111 @@
+"""Multi-page document sources for OCR: PDF and DOCX.
+
+Pages are produced lazily, one at a time. A PDF page that already carries a
+text layer yields that text and is never rasterized. Scanned pages are only
+rendered to a grayscale image when the OCR loop asks for them. A DOCX yields
+its body text plus each embedded image. A 40-page transcript therefore never
+has more page images in memory than the OCR loop has in flight.
+"""
+import io
+import os
+import zipfile
+from xml.etree import ElementTree
+import numpy as np
+from preprocessing import decode_image
+
+try:
+    import pymupdf as fitz
+except ImportError:  # optional: PDF support (older PyMuPDF releases only ship ``fitz``)
+    try:
+        import fitz
+    except ImportError:
+        fitz = None
+
+# Pages with fewer characters of embedded text than this are treated as scans
+MIN_EMBEDDED_CHARS = int(os.getenv("PDF_MIN_TEXT_CHARS", "20"))
+PDF_RENDER_DPI = int(os.getenv("PDF_RENDER_DPI", "200"))
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_DOCX_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+
+def document_type(data):
+    """'pdf', 'docx' or 'image' from the leading bytes."""
+    if data[:5] == b"%PDF-":
+        return "pdf"
+    if data[:2] == b"PK":
+        try:
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                if "word/document.xml" in archive.namelist():
+                    return "docx"
+        except zipfile.BadZipFile:
+            pass
+    return "image"
+
+
+class Page:
+    """One page: either embedded ``text`` or an image rendered on demand."""
+
+    __slots__ = ("index", "text", "_render")
+
+    def __init__(self, index, text=None, render=None):
+        self.index = index
+        self.text = text
+        self._render = render
+
+    def image(self):
+        return self._render()
+
+
+def _render_pdf_page(page, dpi):
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+    return gray[:, :pix.width].copy()
+
+
+def _pdf_pages(data, dpi):
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        for index, page in enumerate(doc):
+            text = page.get_text("text")
+            if len(text.strip()) >= MIN_EMBEDDED_CHARS:
+                yield Page(index, text=text)
+            else:
+                yield Page(index, render=lambda page=page: _render_pdf_page(page, dpi))
+
+
+def _docx_parts(archive):
+    root = ElementTree.fromstring(archive.read("word/document.xml"))
+    paragraphs = ("".join(t.text or "" for t in p.iter(f"{_WORD_NS}t")) for p in root.iter(f"{_WORD_NS}p"))
+    text = "\n".join(p for p in paragraphs if p.strip())
+    media = sorted(name for name in archive.namelist()
+                   if name.startswith("word/media/") and name.lower().endswith(_DOCX_IMAGE_EXTENSIONS))
+    return text, media
+
+
+def _docx_pages(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        text, media = _docx_parts(archive)
+        index = 0
+        if text.strip():
+            yield Page(index, text=text)
+            index += 1
+        # Scanned cards pasted into the document are OCRed like uploads
+        for name in media:
+            yield Page(index, render=lambda name=name: decode_image(archive.read(name)))
+            index += 1
+
+
+def open_document(data, kind=None, dpi=None):
+    """Return (page_count, lazy page iterator) for PDF or DOCX bytes."""
+    kind = kind or document_type(data)
+    if kind == "pdf":
+        if fitz is None:
+            raise ImportError("PDF support needs PyMuPDF (pip install pymupdf)")
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            count = doc.page_count
+        return count, _pdf_pages(data, dpi or PDF_RENDER_DPI)
+    if kind == "docx":
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            text, media = _docx_parts(archive)
+        return (1 if text.strip() else 0) + len(media), _docx_pages(data)
+    raise ValueError(f"Not a multi-page document: {kind}")
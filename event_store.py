@@ -0,0 +1,186 @@
+"""Append-only event store with incrementally maintained aggregates.
+
+Every verification, shortlisting and loan decision is appended to a local
+SQLite log. In the same transaction the store bumps per-hour counters, all-time
+totals and a log-scale latency histogram per stage, so the analytics page reads
+a handful of precomputed rows instead of scanning the event history, no matter
+how many millions of events have been recorded.
+"""
+import os
+import json
+import math
+import logging
+import time
+import sqlite3
+import threading
+from registry import registry
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SECONDS = 3600
+# Latency histogram resolution: 8 bins per doubling (~9% relative error)
+BINS_PER_OCTAVE = 8
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    stage TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    latency_ms REAL,
+    payload TEXT
+);
+CREATE TABLE IF NOT EXISTS counters (
+    bucket INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (bucket, stage, outcome)
+);
+CREATE TABLE IF NOT EXISTS totals (
+    stage TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (stage, outcome)
+);
+CREATE TABLE IF NOT EXISTS latency_histogram (
+    stage TEXT NOT NULL,
+    bin INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (stage, bin)
+);
+"""
+
+
+def _latency_bin(latency_ms):
+    return int(math.floor(math.log2(max(latency_ms, 1e-3)) * BINS_PER_OCTAVE))
+
+
+def _bin_upper_ms(bin_index):
+    return 2 ** ((bin_index + 1) / BINS_PER_OCTAVE)
+
+
+class EventStore:
+    def __init__(self, path=None):
+        self.path = path or os.getenv("EVENT_STORE_PATH", "events.db")
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def record(self, stage, outcome, latency_ms=None, payload=None, ts=None):
+        """Append one event and update its aggregates atomically."""
+        self.record_many([(stage, outcome, latency_ms, payload, ts)])
+
+    def record_many(self, events):
+        """Append (stage, outcome, latency_ms, payload, ts) tuples in one transaction."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for stage, outcome, latency_ms, payload, ts in events:
+                ts = ts if ts is not None else time.time()
+                outcome = str(outcome)
+                conn.execute(
+                    "INSERT INTO events (ts, stage, outcome, latency_ms, payload) VALUES (?, ?, ?, ?, ?)",
+                    (ts, stage, outcome, latency_ms, json.dumps(payload) if payload is not None else None),
+                )
+                conn.execute(
+                    "INSERT INTO counters (bucket, stage, outcome, count) VALUES (?, ?, ?, 1) "
+                    "ON CONFLICT (bucket, stage, outcome) DO UPDATE SET count = count + 1",
+                    (int(ts // BUCKET_SECONDS) * BUCKET_SECONDS, stage, outcome),
+                )
+                conn.execute(
+                    "INSERT INTO totals (stage, outcome, count) VALUES (?, ?, 1) "
+                    "ON CONFLICT (stage, outcome) DO UPDATE SET count = count + 1",
+                    (stage, outcome),
+                )
+                if latency_ms is not None:
+                    conn.execute(
+                        "INSERT INTO latency_histogram (stage, bin, count) VALUES (?, ?, 1) "
+                        "ON CONFLICT (stage, bin) DO UPDATE SET count = count + 1",
+                        (stage, _latency_bin(latency_ms)),
+                    )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def totals(self, stage=None):
+        """{(stage, outcome): count} from the precomputed totals."""
+        query, args = "SELECT stage, outcome, count FROM totals", ()
+        if stage is not None:
+            query, args = query + " WHERE stage = ?", (stage,)
+        return {(s, o): c for s, o, c in self._connection().execute(query, args)}
+
+    def count(self, stage, *outcomes):
+        totals = self.totals(stage)
+        if not outcomes:
+            return sum(totals.values())
+        return sum(totals.get((stage, outcome), 0) for outcome in outcomes)
+
+    def timeseries(self, since=None, stage=None):
+        """Per-bucket counts as rows of {bucket, stage, outcome, count}."""
+        since = since if since is not None else time.time() - 7 * 24 * 3600
+        query = "SELECT bucket, stage, outcome, count FROM counters WHERE bucket >= ?"
+        args = [int(since // BUCKET_SECONDS) * BUCKET_SECONDS]
+        if stage is not None:
+            query += " AND stage = ?"
+            args.append(stage)
+        rows = self._connection().execute(query + " ORDER BY bucket", args).fetchall()
+        return [{"bucket": b, "stage": s, "outcome": o, "count": c} for b, s, o, c in rows]
+
+    def latency_percentiles(self, stage, percentiles=(50, 95, 99)):
+        """Latency percentiles (ms) for a stage, estimated from its histogram."""
+        rows = self._connection().execute(
+            "SELECT bin, count FROM latency_histogram WHERE stage = ? ORDER BY bin", (stage,)
+        ).fetchall()
+        total = sum(count for _, count in rows)
+        result = {f"p{p}": None for p in percentiles}
+        if not total:
+            return result
+        for p in percentiles:
+            target, seen = total * p / 100, 0
+            for bin_index, count in rows:
+                seen += count
+                if seen >= target:
+                    result[f"p{p}"] = round(_bin_upper_ms(bin_index), 3)
+                    break
+        return result
+
+    def stage_summary(self, window_seconds=3600):
+        """Per stage: total events, throughput over the last window and latency percentiles."""
+        now = time.time()
+        # Whole buckets only: the rate is taken over the span they actually cover
+        start = int((now - window_seconds) // BUCKET_SECONDS) * BUCKET_SECONDS
+        minutes = max(now - start, 60) / 60
+        recent = {}
+        for row in self.timeseries(since=start):
+            recent[row["stage"]] = recent.get(row["stage"], 0) + row["count"]
+        stages = sorted({stage for stage, _ in self.totals()})
+        summary = []
+        for stage in stages:
+            summary.append({
+                "stage": stage,
+                "events": self.count(stage),
+                "per_minute": round(recent.get(stage, 0) / minutes, 2),
+                **self.latency_percentiles(stage),
+            })
+        return summary
+
+
+registry.register("event_store", EventStore)
+
+
+def record_event(stage, outcome, latency_ms=None, payload=None):
+    """Record to the shared event store; analytics must never break the page that reports."""
+    try:
+        registry.get("event_store").record(stage, outcome, latency_ms, payload)
+    except sqlite3.Error as e:
+        logger.warning("Event store unavailable: %s", e)
@@ -0,0 +1,158 @@
+"""Declarative, precompiled field extraction for result cards.
+
+Every supported board/university format is a list of rules. A rule is a
+regular expression whose named groups are the fields it fills, so one rule can
+read a whole table row (result, total and grade). Formats are compiled once at
+import:
+
+* all board header patterns go into one detector regex, so identifying the
+  format is a single search regardless of how many formats exist;
+* all rules of a format go into one alternation, so every field is extracted
+  in a single ``finditer`` pass over the text.
+
+The result is an ``ExtractedRecord`` that shortlisting consumes directly.
+Extra formats can be loaded from a JSON file named by ``EXTRACTION_FORMATS_PATH``
+(a list of ``{"name", "detect", "rules"}`` objects).
+"""
+import os
+import re
+import json
+from dataclasses import dataclass, asdict, fields
+from typing import Optional
+
+FLAGS = re.IGNORECASE | re.MULTILINE
+
+_GRADE = r"(?P<overall_grade>O|[A-F][+\-]?)(?![A-Za-z0-9+\-])"
+# Roll/registration numbers contain a digit, so a header word ("Registration") is never read as one
+_ID = r"(?=[A-Z/\-]*\d)[A-Z0-9][A-Z0-9/\-]{3,}"
+
+# Rules shared by every format; board-specific rules are tried before these
+GENERIC_RULES = [
+    # Table row under a "Result  Total  Overall Grade" header: PASS 452 A+
+    r"\b(?P<result>PASS|FAIL)\s+(?P<total>\d{2,4})\s+" + _GRADE,
+    r"^\s*(?:Student(?:'s)?\s+)?Name\s*[:\-]\s*(?P<name>[A-Za-z][A-Za-z .']*[A-Za-z])",
+    r"\bRoll\s*(?:No|Number)\.?\s*[:\-]?\s*(?P<roll_no>" + _ID + ")",
+    r"\bRegistration\s*(?:No|Number)\.?\s*[:\-]?\s*(?P<registration_no>" + _ID + ")",
+    r"\bResult\s*[:\-]\s*(?P<result>PASS|FAIL)\b",
+    r"\bOverall\s+Grade\s*[:\-]?\s*" + _GRADE,
+]
+
+FORMATS = [
+    {
+        "name": "cbse",
+        "detect": r"CENTRAL\s+BOARD\s+OF\s+SECONDARY\s+EDUCATION",
+        "rules": [],
+    },
+    {
+        "name": "state_board",
+        "detect": r"STATE\s+BOARD\s+OF\s+(?:HIGHER\s+)?SECONDARY\s+EDUCATION",
+        "rules": [r"\bReg\.?\s*No\.?\s*[:\-]?\s*(?P<registration_no>" + _ID + ")"],
+    },
+    {
+        "name": "cisce",
+        "detect": r"COUNCIL\s+FOR\s+(?:THE\s+INDIAN\s+)?SCHOOL\s+CERTIFICATE\s+EXAMINATIONS",
+        "rules": [r"\bUnique\s+ID\s*[:\-]?\s*(?P<registration_no>" + _ID + ")"],
+    },
+    {
+        "name": "university",
+        "detect": r"\bUNIVERSITY\b",
+        "rules": [
+            r"\bEnrol(?:l)?ment\s*No\.?\s*[:\-]?\s*(?P<registration_no>" + _ID + ")",
+            r"\bFinal\s+Grade\s*[:\-]?\s*" + _GRADE,
+        ],
+    },
+]
+
+
+@dataclass
+class ExtractedRecord:
+    board: Optional[str] = None
+    name: Optional[str] = None
+    roll_no: Optional[str] = None
+    registration_no: Optional[str] = None
+    result: Optional[str] = None
+    total: Optional[int] = None
+    overall_grade: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data):
+        known = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in (data or {}).items() if key in known})
+
+    def to_dict(self):
+        return asdict(self)
+
+
+FIELDS = tuple(f.name for f in fields(ExtractedRecord) if f.name != "board")
+
+
+class CompiledFormat:
+    """All rules of one format merged into a single alternation."""
+
+    def __init__(self, name, rules):
+        self.name = name
+        parts, self._rule_groups = [], {}
+        for i, rule in enumerate(rules):
+            # Field groups are renamed per rule so several rules may fill the same field
+            renamed = re.sub(r"\(\?P<(\w+)>", lambda m: f"(?P<r{i}__{m.group(1)}>", rule)
+            parts.append(f"(?P<r{i}>{renamed})")
+            self._rule_groups[f"r{i}"] = [(f"r{i}__{field}", field) for field in re.findall(r"\(\?P<(\w+)>", rule)]
+        self.pattern = re.compile("|".join(parts), FLAGS)
+
+    def extract(self, text):
+        values = {}
+        for match in self.pattern.finditer(text):
+            # The wrapping rule group closes last, so lastgroup names the rule that matched
+            for group, field in self._rule_groups[match.lastgroup]:
+                value = match.group(group)
+                if value is not None and field not in values:
+                    values[field] = value
+            if len(values) == len(FIELDS):
+                break
+        return values
+
+
+class ExtractionEngine:
+    def __init__(self, formats=FORMATS, generic_rules=GENERIC_RULES):
+        self.generic = CompiledFormat(None, generic_rules)
+        self.formats = {}
+        detectors = []
+        for i, fmt in enumerate(formats):
+            self.formats[f"b{i}"] = CompiledFormat(fmt["name"], list(fmt.get("rules", [])) + list(generic_rules))
+            detectors.append(f"(?P<b{i}>{fmt['detect']})")
+        self.detector = re.compile("|".join(detectors), FLAGS) if detectors else None
+
+    def detect(self, text):
+        """The compiled format for the board named in ``text`` (generic if none matches)."""
+        match = self.detector.search(text) if self.detector is not None else None
+        return self.formats[match.lastgroup] if match else self.generic
+
+    def extract(self, text):
+        fmt = self.detect(text)
+        values = fmt.extract(text)
+        return ExtractedRecord(
+            board=fmt.name,
+            name=values.get("name"),
+            roll_no=values.get("roll_no"),
+            registration_no=values.get("registration_no"),
+            result=values["result"].upper() if values.get("result") else None,
+            total=int(values["total"]) if values.get("total") else None,
+            overall_grade=values["overall_grade"].upper() if values.get("overall_grade") else None,
+        )
+
+
+def load_formats(path=None):
+    """Built-in formats plus the ones listed in ``path`` (or EXTRACTION_FORMATS_PATH)."""
+    path = path or os.getenv("EXTRACTION_FORMATS_PATH")
+    formats = list(FORMATS)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            formats = json.load(f) + formats
+    return formats
+
+
+engine = ExtractionEngine(load_formats())
+
+
+def extract_record(text):
+    return engine.extract(text)
@@ -0,0 +1,164 @@
+"""Persistent, incrementally updated FAQ vector index.
+
+Each FAQ entry is stored in Chroma under a content-derived id, and a small
+manifest next to the collection remembers the hash of the source JSON it was
+built from. On startup an unchanged source file means the persisted collection
+is opened as-is with no embedding work; a changed file only embeds entries that
+were added or edited and deletes the ones that disappeared, so repeated
+restarts never duplicate documents.
+
+``FAQ_INDEX_BACKEND=numpy`` (the default) replaces the per-domain Chroma stores
+with one in-process ``VectorIndex`` shared by every domain. It is synced the
+same way: unchanged sources open the memory-mapped index as-is, and only
+added or edited entries are embedded.
+"""
+import os
+import json
+import hashlib
+from registry import registry
+
+MANIFEST_NAME = "faq_manifest.json"
+
+# Domains sharing the in-process index, told apart by the "domain" metadata filter
+FAQ_SOURCES = {"admission": "faq_data.json", "loan": "loan_data.json"}
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", "./faq_vector_index")
+EMBED_BATCH_SIZE = 256
+
+
+def faq_text(faq):
+    return f"{faq['question']} - {faq['answer']}"
+
+
+def entry_id(faq):
+    return hashlib.sha1(faq_text(faq).encode("utf-8")).hexdigest()
+
+
+def file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def embedding_signature(embeddings):
+    """Model identifier and vector dimension; an index built under another signature is rebuilt."""
+    name = getattr(embeddings, "model_name", None) or getattr(embeddings, "model", None)
+    model = f"{type(embeddings).__name__}:{name}" if name else type(embeddings).__name__
+    # One short query embedding: the only reliable way to get the dimension across providers
+    return {"model": model, "dim": len(embeddings.embed_query("dimension probe"))}
+
+
+class FAQIndexManager:
+    def __init__(self, source_path, persist_directory, embeddings):
+        self.source_path = source_path
+        self.persist_directory = persist_directory
+        self.embeddings = embeddings
+        self.manifest_path = os.path.join(persist_directory, MANIFEST_NAME)
+        self.last_sync = None
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_manifest(self, manifest):
+        os.makedirs(self.persist_directory, exist_ok=True)
+        with open(self.manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    def load(self):
+        """Open the persisted collection, syncing it with the source JSON if it changed."""
+        Chroma = registry.import_module("langchain.vectorstores").Chroma
+        vectorstore = Chroma(persist_directory=self.persist_directory, embedding_function=self.embeddings)
+        source_hash = file_hash(self.source_path)
+        signature = embedding_signature(self.embeddings)
+        manifest = self._read_manifest()
+        if manifest.get("embedding") == signature and manifest.get("source_hash") == source_hash:
+            self.last_sync = {"added": 0, "removed": 0, "unchanged": True}
+            return vectorstore
+        if manifest.get("embedding") != signature:
+            # Vectors from another model can't be compared with new queries: start over
+            vectorstore.delete_collection()
+            vectorstore = Chroma(persist_directory=self.persist_directory, embedding_function=self.embeddings)
+
+        with open(self.source_path, "r") as f:
+            faqs = json.load(f)
+        wanted = {entry_id(faq): faq for faq in faqs}
+
+        # Ids left behind by older builds (or edited entries) no longer match and are removed
+        existing = set(vectorstore.get(include=[])["ids"])
+        removed = list(existing - wanted.keys())
+        added = [key for key in wanted if key not in existing]
+
+        if removed:
+            vectorstore.delete(ids=removed)
+        if added:
+            vectorstore.add_texts(
+                texts=[faq_text(wanted[key]) for key in added],
+                metadatas=[{"question": wanted[key]["question"]} for key in added],
+                ids=added,
+            )
+        if hasattr(vectorstore, "persist"):
+            vectorstore.persist()
+
+        self._write_manifest({"source_hash": source_hash, "embedding": signature, "entries": len(wanted)})
+        self.last_sync = {"added": len(added), "removed": len(removed), "unchanged": False}
+        return vectorstore
+
+
+def load_vector_index(embeddings, sources=None, directory=None, dtype=None):
+    """Open the shared FAQ ``VectorIndex``, rebuilding it if a source file or the embedding model changed."""
+    vector_index = registry.import_module("vector_index")
+    sources = sources or FAQ_SOURCES
+    directory = directory or VECTOR_INDEX_PATH
+    dtype = dtype or os.getenv("VECTOR_INDEX_DTYPE", "int8")
+    source_hashes = {domain: file_hash(path) for domain, path in sources.items()}
+    signature = embedding_signature(embeddings)
+    try:
+        existing = vector_index.VectorIndex(directory)
+    except FileNotFoundError:
+        existing = None
+    same_model = existing is not None and existing.manifest.get("embedding") == signature
+    if same_model and existing.manifest.get("sources") == source_hashes and existing.manifest["dtype"] == dtype:
+        existing.last_sync = {"added": 0, "removed": 0, "unchanged": True}
+        return existing
+
+    entries = {}
+    for domain, path in sources.items():
+        with open(path, "r") as f:
+            for faq in json.load(f):
+                entries[f"{domain}:{entry_id(faq)}"] = (faq_text(faq), {"domain": domain, "question": faq["question"]})
+    ids = list(entries)
+
+    # Vectors of entries that are still there are reused unless the model changed; only new ones are embedded
+    known = {key: row for row, key in enumerate(existing.ids)} if same_model else {}
+    reused = [i for i, key in enumerate(ids) if key in known]
+    added = [i for i, key in enumerate(ids) if key not in known]
+    vectors = [None] * len(ids)
+    if reused:
+        for i, vector in zip(reused, existing.dequantize([known[ids[i]] for i in reused])):
+            vectors[i] = vector
+    for start in range(0, len(added), EMBED_BATCH_SIZE):
+        batch = added[start:start + EMBED_BATCH_SIZE]
+        for i, vector in zip(batch, embeddings.embed_documents([entries[ids[i]][0] for i in batch])):
+            vectors[i] = vector
+
+    index = vector_index.VectorIndex.build(
+        directory, ids, [entries[key][0] for key in ids], vectors, [entries[key][1] for key in ids],
+        dtype=dtype, manifest={"sources": source_hashes, "embedding": signature},
+    )
+    removed = len(existing.ids) - len(reused) if existing is not None else 0
+    index.last_sync = {"added": len(added), "removed": removed, "unchanged": False}
+    return index
+
+
+def faq_retriever(domain, persist_directory, k=2):
+    """Retriever over one FAQ domain: the shared in-process index, or Chroma with FAQ_INDEX_BACKEND=chroma."""
+    embeddings = registry.get("embeddings")
+    if os.getenv("FAQ_INDEX_BACKEND", "numpy") == "chroma":
+        vectorstore = FAQIndexManager(FAQ_SOURCES[domain], persist_directory, embeddings).load()
+        return vectorstore.as_retriever(search_kwargs={"k": k})
+    return registry.get("faq_vector_index").as_retriever(embeddings, k=k, filter={"domain": domain})
+
+
+registry.register("faq_vector_index", lambda: load_vector_index(registry.get("embeddings")))
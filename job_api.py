@@ -0,0 +1,128 @@
+"""Small HTTP API over the job queue.
+
+    POST /jobs/verification    raw image bytes, or JSON {"document_base64", "payload", "idempotency_key"}
+    POST /jobs/shortlisting    same as verification
+    POST /jobs/loan            JSON {"payload": {"shortlisted", "annual_income", "requested_loan", "finalize"}}
+    GET  /jobs/<id>            status, progress, stage and (when done) the result
+    GET  /jobs?status=queued   most recent jobs
+    GET  /health               queue counts
+
+    python job_api.py --port 8080 --workers 4
+"""
+import sys
+import json
+import base64
+import argparse
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from job_queue import JobQueue, JobError, JOB_KINDS
+
+MAX_BODY_BYTES = 20 * 1024 * 1024
+
+
+class JobAPIHandler(BaseHTTPRequestHandler):
+    queue = None
+
+    def _send(self, status, body):
+        data = json.dumps(body, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        if len(parts) != 2 or parts[0] != "jobs" or parts[1] not in JOB_KINDS:
+            return self._send(404, {"error": f"POST /jobs/<{'|'.join(JOB_KINDS)}>"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            return self._send(400, {"error": "Invalid Content-Length"})
+        if length > MAX_BODY_BYTES:
+            return self._send(413, {"error": "Request body too large"})
+        body = self.rfile.read(length)
+
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            try:
+                request = json.loads(body or b"{}")
+                if not isinstance(request, dict):
+                    raise TypeError("expected a JSON object")
+                document = base64.b64decode(request["document_base64"]) if request.get("document_base64") else None
+            except (ValueError, TypeError) as e:
+                return self._send(400, {"error": f"Invalid JSON body: {e}"})
+            payload = request.get("payload") or {}
+            if not isinstance(payload, dict):
+                return self._send(400, {"error": "Invalid JSON body: payload must be an object"})
+            idempotency_key = request.get("idempotency_key")
+        else:
+            # Raw upload: the body is the document itself
+            document, payload, idempotency_key = body, {"file": query.get("file")}, query.get("idempotency_key")
+
+        try:
+            job_id = self.queue.submit(parts[1], payload, document, idempotency_key)
+        except JobError as e:
+            return self._send(400, {"error": str(e)})
+        self._send(202, {"id": job_id, "status_url": f"/jobs/{job_id}"})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        if parts == ["health"]:
+            return self._send(200, {"status": "ok", "jobs": self.queue.counts()})
+        if parts == ["jobs"]:
+            query = parse_qs(url.query)
+            status = query.get("status", [None])[0]
+            try:
+                limit = int(query.get("limit", ["50"])[0])
+            except ValueError:
+                limit = 0
+            if limit <= 0:
+                return self._send(400, {"error": "limit must be a positive integer"})
+            return self._send(200, {"jobs": self.queue.list(status, limit)})
+        if len(parts) == 2 and parts[0] == "jobs":
+            job = self.queue.get(parts[1])
+            if job is None:
+                return self._send(404, {"error": "Unknown job"})
+            return self._send(200, job)
+        self._send(404, {"error": "Not found"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def create_server(host="127.0.0.1", port=8080, queue_path=None):
+    JobAPIHandler.queue = JobQueue(queue_path)
+    return ThreadingHTTPServer((host, port), JobAPIHandler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP API for the job queue.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--queue", default=None, help="Job database (default: JOB_QUEUE_PATH or jobs.db)")
+    parser.add_argument("--workers", type=int, default=0, help="Also start this many worker processes")
+    parser.add_argument("--tesseract", default=None, help="Path to the tesseract executable (for --workers)")
+    args = parser.parse_args(argv)
+
+    pool = None
+    if args.workers:
+        from job_worker import WorkerPool
+        pool = WorkerPool(args.workers, args.queue, args.tesseract)
+    server = create_server(args.host, args.port, args.queue)
+    print(f"Job API listening on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if pool is not None:
+            pool.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""Durable local job queue for document and loan processing.
+
+Jobs live in a SQLite database in WAL mode, so the Streamlit app, the HTTP API
+and any number of worker processes share them, and they survive restarts.
+A worker claims a job with a lease; while it runs, every progress update
+renews the lease. If the worker dies, the lease runs out and another worker
+picks the job up again, up to ``max_attempts`` times. Submitting again with the
+same idempotency key returns the existing job instead of queueing a duplicate.
+"""
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from registry import registry
+
+JOB_KINDS = ("verification", "shortlisting", "loan")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    idempotency_key TEXT UNIQUE,
+    payload TEXT,
+    document BLOB,
+    result TEXT,
+    error TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    stage TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+"""
+
+_COLUMNS = ("id", "kind", "status", "idempotency_key", "payload", "result", "error", "progress",
+            "stage", "attempts", "worker", "created_at", "started_at", "finished_at")
+
+
+class JobError(Exception):
+    pass
+
+
+class JobQueue:
+    def __init__(self, path=None, lease_seconds=300.0, max_attempts=3, timeout=30.0):
+        self.path = path or os.getenv("JOB_QUEUE_PATH", "jobs.db")
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connection()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _row(self, row, with_document=False):
+        job = dict(zip(_COLUMNS, row[:len(_COLUMNS)]))
+        job["payload"] = json.loads(job["payload"]) if job["payload"] else {}
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        if with_document:
+            job["document"] = row[len(_COLUMNS)]
+        return job
+
+    def submit(self, kind, payload=None, document=None, idempotency_key=None):
+        """Queue a job and return its id (the existing job's id for a repeated idempotency key)."""
+        if kind not in JOB_KINDS:
+            raise JobError(f"Unknown job kind '{kind}' (choose from {', '.join(JOB_KINDS)})")
+        conn = self._connection()
+        job_id = uuid.uuid4().hex
+        try:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, idempotency_key, payload, document, created_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, kind, idempotency_key, json.dumps(payload or {}), document, time.time()),
+            )
+        except sqlite3.IntegrityError:
+            row = conn.execute("SELECT id FROM jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+            if row is None:
+                raise
+            return row[0]
+        return job_id
+
+    def claim(self, worker, kinds=None):
+        """Lease the oldest runnable job to ``worker``; returns it with its document, or None."""
+        conn = self._connection()
+        now = time.time()
+        kinds = kinds or JOB_KINDS
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                f"SELECT {', '.join(_COLUMNS)}, document FROM jobs "
+                f"WHERE kind IN ({', '.join('?' * len(kinds))}) "
+                "AND (status = 'queued' OR (status = 'running' AND lease_until < ?)) "
+                "ORDER BY created_at LIMIT 1",
+                (*kinds, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            job = self._row(row, with_document=True)
+            if job["attempts"] >= self.max_attempts:
+                # A job that keeps killing its worker is not retried forever
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                    ("Worker lost too many times", now, job["id"]),
+                )
+                conn.execute("COMMIT")
+                return self.claim(worker, kinds)
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, lease_until = ?, "
+                "started_at = COALESCE(started_at, ?) WHERE id = ?",
+                (worker, now + self.lease_seconds, now, job["id"]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        job.update(status="running", worker=worker, attempts=job["attempts"] + 1)
+        return job
+
+    # progress, complete and fail only touch a job ``worker`` still holds: once its
+    # lease expired and another worker reclaimed the job, they return False
+
+    def progress(self, job_id, worker, progress, stage=None):
+        """Report progress (0..1) and renew the lease."""
+        return self._connection().execute(
+            "UPDATE jobs SET progress = ?, stage = COALESCE(?, stage), lease_until = ? "
+            "WHERE id = ? AND status = 'running' AND worker = ?",
+            (progress, stage, time.time() + self.lease_seconds, job_id, worker),
+        ).rowcount == 1
+
+    def complete(self, job_id, worker, result):
+        return self._connection().execute(
+            "UPDATE jobs SET status = 'done', result = ?, progress = 1, stage = 'done', "
+            "finished_at = ?, lease_until = NULL, document = NULL "
+            "WHERE id = ? AND status = 'running' AND worker = ?",
+            (json.dumps(result, default=str), time.time(), job_id, worker),
+        ).rowcount == 1
+
+    def fail(self, job_id, worker, error):
+        return self._connection().execute(
+            "UPDATE jobs SET status = 'failed', error = ?, stage = 'failed', finished_at = ?, "
+            "lease_until = NULL, document = NULL WHERE id = ? AND status = 'running' AND worker = ?",
+            (str(error), time.time(), job_id, worker),
+        ).rowcount == 1
+
+    def get(self, job_id):
+        row = self._connection().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return self._row(row) if row is not None else None
+
+    def list(self, status=None, limit=50):
+        query, args = f"SELECT {', '.join(_COLUMNS)} FROM jobs", []
+        if status is not None:
+            query += " WHERE status = ?"
+            args.append(status)
+        rows = self._connection().execute(query + " ORDER BY created_at DESC LIMIT ?", (*args, limit)).fetchall()
+        return [self._row(row) for row in rows]
+
+    def counts(self):
+        """{status: count} over all jobs."""
+        return dict(self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+def create_worker_pool():
+    """Worker processes started by the app itself; JOB_WORKERS=0 leaves it to ``python job_worker.py``."""
+    WorkerPool = registry.import_module("job_worker").WorkerPool
+    return WorkerPool(int(os.getenv("JOB_WORKERS", "2")), tesseract_path=os.getenv("TESSERACT_PATH"))
+
+
+registry.register("job_queue", JobQueue)
+registry.register("job_workers", create_worker_pool)
@@ -0,0 +1,169 @@
+"""Worker processes for the job queue.
+
+Each worker claims jobs from the shared queue and runs the existing pipeline
+logic on them: ``DocumentCheckingAgent`` for verification, plus parsing and
+``ShortlistingAgent`` for shortlisting, and ``LoanDecisionAgent`` for loans.
+It reports real progress as it goes.
+
+    python job_worker.py --workers 4 --tesseract /usr/bin/tesseract
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import multiprocessing
+from dataclasses import asdict
+from job_queue import JobQueue
+
+
+class JobProcessor:
+    """Runs one job; heavy models are built once per worker process."""
+
+    def __init__(self, tesseract_path=None):
+        self.tesseract_path = tesseract_path
+        self._doc_checker = None
+
+    @property
+    def doc_checker(self):
+        if self._doc_checker is None:
+            from doc_extrac_shortlist import DocumentCheckingAgent
+            self._doc_checker = DocumentCheckingAgent(self.tesseract_path)
+        return self._doc_checker
+
+    def run(self, job, report):
+        handler = getattr(self, f"_{job['kind']}")
+        return handler(job, report)
+
+    def _verify(self, job, report):
+        from doc_extrac_shortlist import EXPECTED_KEYWORDS
+        from event_store import record_event
+
+        if not job.get("document"):
+            raise ValueError("Job has no document attached")
+        report(0.1, "ocr")
+        # PDFs and DOCX report per page and stop reading once every keyword is found
+        ocr_result = self.doc_checker.scan(
+            job["document"], stop_keywords=EXPECTED_KEYWORDS,
+            on_page=lambda done, total: report(0.1 + 0.6 * done / max(total, 1), f"page {done}/{total}"),
+        )
+        report(0.7, "validating")
+        validation = self.doc_checker.validate_document(ocr_result, EXPECTED_KEYWORDS)
+        record_event("verification", validation["status"], ocr_result.elapsed * 1000, {"job": job["id"]})
+        return ocr_result, validation
+
+    def _verification(self, job, report):
+        ocr_result, validation = self._verify(job, report)
+        return {
+            "validation": validation,
+            "mean_confidence": round(ocr_result.mean_confidence, 2),
+            "ocr_seconds": round(ocr_result.elapsed, 4),
+            "text": ocr_result.text,
+        }
+
+    def _shortlisting(self, job, report):
+        from doc_extrac_shortlist import parse_extracted_text, shortlist_agent
+        from event_store import record_event
+
+        ocr_result, validation = self._verify(job, report)
+        report(0.85, "shortlisting")
+        record = parse_extracted_text(ocr_result)
+        start = time.perf_counter()
+        decision = shortlist_agent.evaluate(validation, record)
+        record_event("shortlisting", "shortlisted" if decision.shortlisted else "rejected",
+                     (time.perf_counter() - start) * 1000, {"job": job["id"]})
+        return {"validation": validation, "parsed": record.to_dict(), "decision": asdict(decision)}
+
+    def _loan(self, job, report):
+        from loan_agent import loan_agent
+        from event_store import record_event
+
+        payload = job["payload"]
+        report(0.2, "deciding")
+        start = time.perf_counter()
+        decision = loan_agent.evaluate(
+            payload.get("shortlisted"), payload.get("annual_income"), payload.get("requested_loan")
+        )
+        record_event("loan", "approved" if decision.approved else "rejected",
+                     (time.perf_counter() - start) * 1000, {"job": job["id"]})
+        result = {"decision": asdict(decision)}
+        if decision.approved and payload.get("finalize"):
+            report(0.6, "reserving budget")
+            # The job id keeps a reclaimed (retried) job from spending twice
+            application_id = payload.get("application_id") or f"job:{job['id']}"
+            result["finalized"] = loan_agent.finalize_approval(json.dumps({**payload, "application_id": application_id}))
+        return result
+
+
+def run_worker(worker_id=None, queue_path=None, tesseract_path=None, poll_interval=0.5, stop=None, max_jobs=None):
+    """Claim and run jobs until ``stop`` is set (or ``max_jobs`` have been processed)."""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    queue = JobQueue(queue_path)
+    processor = JobProcessor(tesseract_path)
+    processed = 0
+    while not (stop is not None and stop.is_set()) and (max_jobs is None or processed < max_jobs):
+        job = queue.claim(worker_id)
+        if job is None:
+            if stop is not None:
+                stop.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+            continue
+        # A job whose lease expired belongs to whoever reclaimed it; its outcome is theirs to write
+        try:
+            result = processor.run(job, lambda progress, stage=None: queue.progress(job["id"], worker_id, progress, stage))
+            queue.complete(job["id"], worker_id, result)
+        except Exception as e:
+            queue.fail(job["id"], worker_id, f"{type(e).__name__}: {e}")
+        processed += 1
+    return processed
+
+
+class WorkerPool:
+    """A set of worker processes sharing one stop event."""
+
+    def __init__(self, workers=2, queue_path=None, tesseract_path=None, poll_interval=0.5):
+        self.stop_event = multiprocessing.Event()
+        self.processes = [
+            multiprocessing.Process(
+                target=run_worker,
+                kwargs={"queue_path": queue_path, "tesseract_path": tesseract_path,
+                        "poll_interval": poll_interval, "stop": self.stop_event},
+                name=f"job-worker-{n}",
+                daemon=True,
+            )
+            for n in range(workers)
+        ]
+        for process in self.processes:
+            process.start()
+
+    def alive(self):
+        return sum(process.is_alive() for process in self.processes)
+
+    def stop(self, timeout=10.0):
+        self.stop_event.set()
+        for process in self.processes:
+            process.join(timeout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Job queue worker processes.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--queue", default=None, help="Job database (default: JOB_QUEUE_PATH or jobs.db)")
+    parser.add_argument("--tesseract", default=None, help="Path to the tesseract executable")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    pool = WorkerPool(args.workers, args.queue, args.tesseract, args.poll_interval)
+    print(f"{args.workers} workers processing jobs from {JobQueue(args.queue).path}", file=sys.stderr)
+    try:
+        while pool.alive():
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pool.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""Layout-aware field extraction from Tesseract word boxes.
+
+Anchor labels ("Overall Grade", "Result", "Roll No", "Registration No") are
+located in the word boxes of a full-page OCR pass, and only the small value
+region next to each anchor is re-OCRed in single-line mode. The value regions
+found for a board/university format are stored as a template, so later cards
+of the same format skip anchor search and go straight to the value crops.
+Templates are saved to ``LAYOUT_TEMPLATES_PATH`` when learned and loaded on
+first use, so they survive restarts and are shared between processes.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from cache_utils import LRUCache
+
+ANCHORS = {
+    "overall_grade": ["overall", "grade"],
+    "result": ["result"],
+    "roll_no": ["roll", "no"],
+    "registration_no": ["registration", "no"],
+}
+
+# What a valid value looks like once the small region has been OCRed
+VALUE_PATTERNS = {
+    "overall_grade": re.compile(r"\b([A-F][+\-]?|O)(?![A-Za-z])"),
+    "result": re.compile(r"\b(PASS|FAIL)\b", re.IGNORECASE),
+    # Identifiers contain a digit, so neighbouring labels are never taken for one
+    "roll_no": re.compile(r"\b((?=[A-Z/\-]*\d)[A-Z0-9][A-Z0-9/\-]{3,})\b", re.IGNORECASE),
+    "registration_no": re.compile(r"\b((?=[A-Z/\-]*\d)[A-Z0-9][A-Z0-9/\-]{3,})\b", re.IGNORECASE),
+}
+
+# Single text line: the value crops hold one short line each
+VALUE_PSM = 7
+
+TEMPLATES_PATH = os.getenv("LAYOUT_TEMPLATES_PATH", "layout_templates.json")
+
+template_cache = LRUCache(maxsize=256)
+_templates_loaded = set()
+_templates_lock = threading.Lock()
+
+
+def _normalize(token):
+    return re.sub(r"[^a-z]", "", token.lower())
+
+
+def find_anchors(words, tokens):
+    """Yield bounding boxes (left, top, right, bottom) of runs of words matching ``tokens``."""
+    normalized = [_normalize(w["text"]) for w in words]
+    n = len(tokens)
+    for i in range(len(words) - n + 1):
+        if normalized[i:i + n] != tokens:
+            continue
+        run = words[i:i + n]
+        # All tokens must sit on the same text line
+        top = min(w["top"] for w in run)
+        bottom = max(w["top"] + w["height"] for w in run)
+        if any(w["top"] > top + run[0]["height"] for w in run):
+            continue
+        yield (min(w["left"] for w in run), top,
+               max(w["left"] + w["width"] for w in run), bottom)
+
+
+def candidate_regions(anchor, page_width, page_height):
+    """Value regions to try for an anchor: to its right on the same line, and
+    directly below it for table-style cards where labels form a header row."""
+    left, top, right, bottom = anchor
+    height = bottom - top
+    pad = max(height // 2, 2)
+    right_of = (right + pad, top - pad, min(page_width, right + 12 * height), bottom + pad)
+    below = (max(left - 2 * pad, 0), bottom + pad // 2,
+             min(page_width, right + 2 * pad), min(page_height, bottom + 3 * height))
+    return [right_of, below]
+
+
+def _to_relative(region, page_width, page_height):
+    left, top, right, bottom = region
+    return [left / page_width, top / page_height, right / page_width, bottom / page_height]
+
+
+def _to_absolute(region, page_width, page_height):
+    left, top, right, bottom = region
+    return (int(left * page_width), int(top * page_height),
+            int(right * page_width), int(bottom * page_height))
+
+
+def detect_template_id(ocr_result):
+    """Identify the card format from its header line (board or university name)."""
+    for line in ocr_result.text.splitlines():
+        header = re.sub(r"[^A-Z]", "", line.upper())
+        if len(header) >= 6:
+            return hashlib.sha1(header.encode()).hexdigest()[:12]
+    return None
+
+
+class LayoutExtractor:
+    """Extracts field values by OCRing only the regions next to anchor labels."""
+
+    def __init__(self, backend, templates=None, path=TEMPLATES_PATH):
+        self.backend = backend
+        self.templates = template_cache if templates is None else templates
+        # Only the shared cache is persisted
+        self.path = path if templates is None else None
+        if self.path:
+            with _templates_lock:
+                if self.path not in _templates_loaded:
+                    _templates_loaded.add(self.path)
+                    if os.path.exists(self.path):
+                        load_templates(self.path, self.templates)
+
+    def _read_region(self, gray, region):
+        left, top, right, bottom = region
+        crop = gray[max(top, 0):bottom, max(left, 0):right]
+        if crop.size == 0:
+            return ""
+        data = self.backend.image_to_data(crop, psm=VALUE_PSM)
+        return " ".join(word.strip() for word in data["text"] if word.strip())
+
+    def _match(self, field, text):
+        match = VALUE_PATTERNS[field].search(text)
+        return match.group(1).upper() if match else None
+
+    def extract(self, gray, ocr_result, template_id=None):
+        """Return {"fields", "raw", "template", "template_hit", "elapsed"} for a
+        preprocessed page image and its full-page OCR result."""
+        start = time.perf_counter()
+        page_height, page_width = gray.shape[:2]
+        template_id = template_id or detect_template_id(ocr_result)
+        template = self.templates.get(template_id) if template_id else None
+
+        fields, raw = {}, {}
+        if template is not None:
+            for field, region in template.items():
+                text = self._read_region(gray, _to_absolute(region, page_width, page_height))
+                raw[field] = text
+                fields[field] = self._match(field, text)
+
+        # Fields the template didn't cover (or had no value in) fall back to anchor search
+        learned = dict(template or {})
+        for field, tokens in ANCHORS.items():
+            if fields.get(field):
+                continue
+            fields[field] = None
+            # A label can also appear in headings ("Result Card"), so try every occurrence
+            for anchor in find_anchors(ocr_result.words, tokens):
+                for region in candidate_regions(anchor, page_width, page_height):
+                    text = self._read_region(gray, region)
+                    value = self._match(field, text)
+                    if value:
+                        raw[field] = text
+                        fields[field] = value
+                        learned[field] = _to_relative(region, page_width, page_height)
+                        break
+                if fields[field]:
+                    break
+
+        if template_id and learned != (template or {}):
+            self.templates.set(template_id, learned)
+            if self.path:
+                save_templates(self.path, self.templates)
+
+        return {
+            "fields": fields,
+            "raw": raw,
+            "template": template_id,
+            "template_hit": template is not None,
+            "elapsed": time.perf_counter() - start,
+        }
+
+
+def save_templates(path, templates=None):
+    """Persist learned layout templates to a JSON file, keeping templates other
+    processes saved there. The file is replaced atomically."""
+    templates = template_cache if templates is None else templates
+    saved = {}
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            pass
+    saved.update(templates.items())
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(saved, f, indent=2)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load_templates(path, templates=None):
+    """Load layout templates saved by save_templates into the cache."""
+    templates = template_cache if templates is None else templates
+    with open(path, "r") as f:
+        for key, value in json.load(f).items():
+            templates.set(key, value)
@@ -0,0 +1,381 @@
+"""Asyncio gateway for all LLM traffic.
+
+Every chain and agent talks to its model through ``GatewayLLM``, which hands
+the prompt to a single gateway running on a background event loop. Per
+provider the gateway enforces:
+
+* a concurrency cap and a token-bucket rate limit,
+* a per-attempt timeout and an overall deadline,
+* retries with full-jitter exponential backoff,
+* single-flight coalescing: identical prompts already in flight share one call,
+* a circuit breaker that fails fast while a provider keeps erroring.
+
+Providers are created lazily, so nothing connects until the first prompt.
+Point ``LLM_PROVIDER=local`` and ``LOCAL_LLM_URL`` at
+``python -m benchmarks.fake_llm_server`` to exercise it without network access.
+"""
+import os
+import json
+import time
+import queue
+import random
+import asyncio
+import threading
+import urllib.request
+from typing import Any, Iterator, List, Optional
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class ProviderPolicy:
+    def __init__(self, max_concurrency=8, rate_per_second=10.0, burst=20, timeout=30.0,
+                 deadline=90.0, retries=3, backoff_base=0.5, backoff_max=8.0,
+                 failure_threshold=5, reset_timeout=30.0):
+        self.max_concurrency = max_concurrency
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.timeout = timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+    @classmethod
+    def from_env(cls, provider):
+        """Defaults overridden by LLM_<PROVIDER>_<SETTING>, e.g. LLM_COHERE_MAX_CONCURRENCY=4."""
+        policy = cls()
+        prefix = f"LLM_{provider.upper()}_"
+        for name, value in vars(policy).items():
+            override = os.getenv(prefix + name.upper())
+            if override is not None:
+                setattr(policy, name, type(value)(override))
+        return policy
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """Closed -> open after ``failure_threshold`` consecutive failures; after
+    ``reset_timeout`` one trial call is let through (half-open)."""
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def check(self):
+        state = self.state
+        if state == "open" or (state == "half_open" and self._trial_running):
+            raise CircuitOpenError("LLM provider circuit is open; failing fast")
+        if state == "half_open":
+            self._trial_running = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def cancel_trial(self):
+        """The trial call never reached the provider, so it counts neither way."""
+        self._trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_running = False
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+
+class LangChainProvider:
+    """Adapts a synchronous LangChain LLM (Cohere, HuggingFaceEndpoint, ...)."""
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    async def complete(self, prompt, stop=None, timeout=None):
+        return await asyncio.to_thread(self.llm.invoke, prompt, stop=stop)
+
+    async def stream(self, prompt, stop=None, timeout=None):
+        async for token in self.llm.astream(prompt, stop=stop):
+            yield token
+
+
+class HTTPProvider:
+    """Minimal JSON-over-HTTP provider: POST {"prompt", "stop"} -> {"text"}."""
+
+    def __init__(self, url):
+        self.url = url
+
+    def _post(self, prompt, stop, timeout):
+        body = json.dumps({"prompt": prompt, "stop": stop}).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())["text"]
+
+    async def complete(self, prompt, stop=None, timeout=None):
+        return await asyncio.to_thread(self._post, prompt, stop, timeout)
+
+    async def stream(self, prompt, stop=None, timeout=None):
+        yield await self.complete(prompt, stop, timeout)
+
+
+class _ProviderState:
+    def __init__(self, factory, policy):
+        self.factory = factory
+        self.policy = policy
+        self.provider = None
+        self.semaphore = asyncio.Semaphore(policy.max_concurrency)
+        self.limiter = TokenBucket(policy.rate_per_second, policy.burst)
+        self.breaker = CircuitBreaker(policy.failure_threshold, policy.reset_timeout)
+        self.stats = {"calls": 0, "attempts": 0, "retries": 0, "coalesced": 0, "failures": 0,
+                      "timeouts": 0, "queue_timeouts": 0, "rejected_open": 0, "total_seconds": 0.0}
+
+    async def acquire_slot(self):
+        await self.limiter.acquire()
+        await self.semaphore.acquire()
+
+    def release_slot(self, call):
+        self.semaphore.release()
+        if not call.cancelled():
+            call.exception()  # retrieved, so an abandoned call doesn't log "never retrieved"
+
+
+class LLMGateway:
+    def __init__(self):
+        self._providers = {}
+        self._inflight = {}
+        self._loop = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="llm-gateway", daemon=True).start()
+            return self._loop
+
+    def register(self, name, factory, policy=None):
+        """Register a provider factory; it is called on the gateway loop at first use."""
+        self._providers[name] = _ProviderState(factory, policy or ProviderPolicy.from_env(name))
+
+    def _state(self, name):
+        state = self._providers.get(name)
+        if state is None:
+            raise KeyError(f"No LLM provider registered under '{name}'")
+        if state.provider is None:
+            state.provider = state.factory()
+        return state
+
+    async def acomplete(self, name, prompt, stop=None):
+        state = self._state(name)
+        state.stats["calls"] += 1
+        key = (name, prompt, tuple(stop or ()))
+        task = self._inflight.get(key)
+        if task is not None:
+            state.stats["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(self._call_with_retries(state, prompt, stop))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: one caller giving up must not cancel the call for the others
+        return await asyncio.shield(task)
+
+    async def _call_with_retries(self, state, prompt, stop):
+        policy = state.policy
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + policy.deadline
+        start = time.perf_counter()
+        try:
+            for attempt in range(policy.retries + 1):
+                try:
+                    state.breaker.check()
+                except CircuitOpenError:
+                    state.stats["rejected_open"] += 1
+                    raise
+                try:
+                    await asyncio.wait_for(state.acquire_slot(), timeout=deadline - loop.time())
+                except asyncio.TimeoutError:
+                    # Spent waiting on our own limits; the provider did nothing wrong
+                    state.stats["queue_timeouts"] += 1
+                    state.breaker.cancel_trial()
+                    raise
+                state.stats["attempts"] += 1
+                # A worker thread can't be interrupted, so a timed-out call keeps its
+                # concurrency slot until it really returns
+                call = asyncio.ensure_future(state.provider.complete(prompt, stop, timeout=policy.timeout))
+                call.add_done_callback(state.release_slot)
+                try:
+                    remaining = deadline - loop.time()
+                    result = await asyncio.wait_for(asyncio.shield(call), timeout=min(policy.timeout, remaining))
+                    state.breaker.record_success()
+                    return result
+                except asyncio.TimeoutError as e:
+                    state.stats["timeouts"] += 1
+                    state.breaker.record_failure()
+                    error = e
+                except Exception as e:
+                    state.stats["failures"] += 1
+                    state.breaker.record_failure()
+                    error = e
+
+                remaining = deadline - loop.time()
+                if attempt == policy.retries or remaining <= 0:
+                    raise error
+                state.stats["retries"] += 1
+                # Full jitter: spreads retries from many callers instead of synchronizing them
+                backoff = random.uniform(0, min(policy.backoff_max, policy.backoff_base * 2 ** attempt))
+                await asyncio.sleep(min(backoff, remaining))
+        finally:
+            state.stats["total_seconds"] += time.perf_counter() - start
+
+    async def astream(self, name, prompt, stop=None):
+        """Stream tokens. Streams are never coalesced and are not retried once a
+        token has been delivered; each token must arrive within the timeout."""
+        state = self._state(name)
+        state.stats["calls"] += 1
+        state.stats["attempts"] += 1
+        try:
+            state.breaker.check()
+        except CircuitOpenError:
+            state.stats["rejected_open"] += 1
+            raise
+        await state.limiter.acquire()
+        async with state.semaphore:
+            tokens = state.provider.stream(prompt, stop, timeout=state.policy.timeout).__aiter__()
+            try:
+                while True:
+                    try:
+                        token = await asyncio.wait_for(tokens.__anext__(), timeout=state.policy.timeout)
+                    except StopAsyncIteration:
+                        break
+                    yield token
+            except Exception:
+                state.stats["failures"] += 1
+                state.breaker.record_failure()
+                raise
+        state.breaker.record_success()
+
+    def complete(self, name, prompt, stop=None):
+        """Blocking call for synchronous callers (LangChain chains and agents)."""
+        return asyncio.run_coroutine_threadsafe(self.acomplete(name, prompt, stop), self.loop).result()
+
+    def stream(self, name, prompt, stop=None):
+        """Blocking iterator over streamed tokens."""
+        tokens = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for token in self.astream(name, prompt, stop):
+                    tokens.put(token)
+                tokens.put(done)
+            except Exception as e:
+                tokens.put(e)
+
+        asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        while True:
+            item = tokens.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def stats(self):
+        rows = []
+        for name, state in sorted(self._providers.items()):
+            rows.append({"provider": name, "circuit": state.breaker.state, **state.stats})
+        return rows
+
+
+gateway = LLMGateway()
+
+
+class GatewayLLM(LLM):
+    """LangChain LLM that routes every prompt through the shared gateway."""
+
+    provider: str
+    streaming: bool = False
+
+    @property
+    def _llm_type(self):
+        return "gateway"
+
+    @property
+    def _identifying_params(self):
+        return {"provider": self.provider}
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        if self.streaming:
+            return "".join(chunk.text for chunk in self._stream(prompt, stop, run_manager))
+        return gateway.complete(self.provider, prompt, stop)
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        future = asyncio.run_coroutine_threadsafe(gateway.acomplete(self.provider, prompt, stop), gateway.loop)
+        return await asyncio.wrap_future(future)
+
+    def _stream(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None,
+                **kwargs: Any) -> Iterator[GenerationChunk]:
+        for token in gateway.stream(self.provider, prompt, stop):
+            chunk = GenerationChunk(text=token)
+            if run_manager is not None:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+# --- Providers ---
+def _cohere():
+    from langchain.llms import Cohere
+    return LangChainProvider(Cohere(cohere_api_key=os.getenv("COHERE_API_KEY"), streaming=True))
+
+
+def _huggingface():
+    from langchain_community.llms import HuggingFaceEndpoint
+    return LangChainProvider(HuggingFaceEndpoint(
+        endpoint_url="https://api-inference.huggingface.co/models/HuggingFaceH4/zephyr-7b-alpha",
+        temperature=0.2
+    ))
+
+
+def _local():
+    return HTTPProvider(os.getenv("LOCAL_LLM_URL", "http://127.0.0.1:8765/generate"))
+
+
+gateway.register("cohere", _cohere)
+gateway.register("huggingface", _huggingface)
+gateway.register("local", _local)
@@ -1,93 +1,182 @@
 import json
-from langchain.vectorstores import Chroma
-from langchain.embeddings import HuggingFaceEmbeddings
-from langchain.docstore.document import Document
-from langchain.chains import RetrievalQA
-from langchain.chains.question_answering import load_qa_chain
-from langchain.agents import Tool, initialize_agent, AgentType
-from langchain.llms import Cohere
-import os
-llm = Cohere(cohere_api_key=os.getenv("COHERE_API_KEY"))
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+from faq_index import faq_retriever
+from registry import registry
+from semantic_cache import create_semantic_cache
+from budget_ledger import BudgetLedger, LedgerError, InsufficientBudget, IdempotencyConflict
+from tracing import langchain_callbacks
+from tool_memo import memoize, invalidate
+
+LOAN_TOOL_NAME = "Student Loan Agent"
+
+
+def application_key(application_id=None):
+    """Ledger idempotency key for finalizing one loan decision: the application's
+    own ID, so retries of that application never spend twice, or a fresh key
+    per decision when there is none."""
+    return f"application:{application_id}" if application_id else f"decision:{uuid.uuid4()}"
+
 def load_faq_chain():
-    with open("loan_data.json", "r") as f:
-        faqs = json.load(f)
-
-    docs = [Document(page_content=f"{faq['question']} - {faq['answer']}") for faq in faqs]
-    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-    vectorstore = Chroma.from_documents(
-        documents=docs,
-        embedding=embeddings,
-        persist_directory="./loan_faq_db"
-    )
+    RetrievalQA = registry.import_module("langchain.chains").RetrievalQA
+    load_qa_chain = registry.import_module("langchain.chains.question_answering").load_qa_chain
+
+    # Reuses the persisted index; only added/edited FAQ entries are embedded
+    retriever = faq_retriever("loan", "./loan_faq_db", k=2)
 
-    qa_chain = load_qa_chain(llm=llm, chain_type="stuff")
+    qa_chain = load_qa_chain(llm=registry.get("llm"), chain_type="stuff")
 
     return RetrievalQA(
-        retriever=vectorstore.as_retriever(search_kwargs={"k": 2}),
+        retriever=retriever,
         combine_documents_chain=qa_chain
     )
 
-faq_chain = load_faq_chain()
+def answer_loan_faq(question):
+    """Answer from the semantic cache when a similar question was seen, else run the loan FAQ chain."""
+    return registry.get("loan_faq_answer_cache").get_or_compute(
+        question, lambda q: registry.get("loan_faq_chain").run(q, callbacks=langchain_callbacks())
+    )
+
+def create_faq_tool():
+    Tool = registry.import_module("langchain.agents").Tool
+    return Tool(
+        name="Loan FAQ Retriever",
+        func=memoize("Loan FAQ Retriever", answer_loan_faq, ttl=3600, llm_calls=1, sources=["loan_data.json"]),
+        description="Use this to answer FAQs related to student loan approval."
+    )
+
+@dataclass
+class LoanDecision:
+    approved: bool
+    message: str
+    remaining_budget: Optional[float] = None
+
+    def __str__(self):
+        return self.message
+
 
-faq_tool = Tool(
-    name="Loan FAQ Retriever",
-    func=lambda q: faq_chain.run(q),
-    description="Use this to answer FAQs related to student loan approval."
-)
 class LoanDecisionAgent:
-    def __init__(self, budget, income_threshold):
-        self.budget = budget
+    def __init__(self, budget, income_threshold, ledger=None):
+        self.initial_budget = budget
         self.income_threshold = income_threshold
+        self._ledger = ledger
 
-    def approve_loan(self, input_str):
-        try:
-            data = json.loads(input_str)
+    @property
+    def ledger(self):
+        # Shared SQLite ledger: the balance is consistent across sessions and
+        # processes and survives restarts; ``budget`` only seeds a new ledger
+        if self._ledger is None:
+            self._ledger = BudgetLedger(initial_budget=self.initial_budget)
+        return self._ledger
 
-            # Extract inputs
-            shortlisted = data.get("shortlisted", "").strip().lower()
-            annual_income = float(data.get("annual_income", 0))
-            requested_loan = float(data.get("requested_loan", 0))
+    @property
+    def budget(self):
+        return self.ledger.available()
 
-            temp_budget = self.budget  # Avoid mutation unless approved in final output
+    def evaluate(self, shortlisted, annual_income, requested_loan):
+        """Structured loan decision. Pure function of the inputs and current budget, no LLM involved."""
+        shortlisted = str(shortlisted or "").strip().lower()
+        annual_income = float(annual_income or 0)
+        requested_loan = float(requested_loan or 0)
 
-            if shortlisted != "shortlisted":
-                return "Loan Rejected: Student not shortlisted."
+        temp_budget = self.budget  # Avoid mutation unless approved in final output
 
-            if annual_income > self.income_threshold:
-                return f"Loan Rejected: Annual income {annual_income} exceeds threshold {self.income_threshold}."
+        if shortlisted != "shortlisted":
+            return LoanDecision(False, "Loan Rejected: Student not shortlisted.")
 
-            if requested_loan > temp_budget:
-                return f"Loan Rejected: Requested loan ({requested_loan}) exceeds remaining budget ({temp_budget})."
+        if annual_income > self.income_threshold:
+            return LoanDecision(False, f"Loan Rejected: Annual income {annual_income} exceeds threshold {self.income_threshold}.")
 
-            # Simulate approval, don't mutate real budget during intermediate calls
-            return f"Loan Approved for ₹{requested_loan}. Remaining Budget: ₹{temp_budget - requested_loan}"
+        if requested_loan <= 0:
+            return LoanDecision(False, "Loan Rejected: Requested loan amount must be positive.")
+
+        if requested_loan > temp_budget:
+            return LoanDecision(False, f"Loan Rejected: Requested loan ({requested_loan}) exceeds remaining budget ({temp_budget}).")
+
+        # Simulate approval, don't mutate real budget during intermediate calls
+        return LoanDecision(True, f"Loan Approved for ₹{requested_loan}. Remaining Budget: ₹{temp_budget - requested_loan}", temp_budget - requested_loan)
+
+    def approve_loan(self, input_str):
+        try:
+            data = json.loads(input_str)
+
+            # Extract inputs
+            return str(self.evaluate(
+                data.get("shortlisted", ""),
+                data.get("annual_income", 0),
+                data.get("requested_loan", 0),
+            ))
 
         except Exception as e:
             return f"Error processing loan application: {str(e)}"
 
     def finalize_approval(self, input_str):
-        """Deduct from real budget after final decision"""
+        """Deduct from real budget after final decision.
+
+        An ``application_id`` in the input is used as the idempotency key, so
+        finalizing the same application twice only spends once.
+        """
         data = json.loads(input_str)
         requested_loan = float(data.get("requested_loan", 0))
-        self.budget -= requested_loan
+        try:
+            reservation = self.ledger.spend(requested_loan, idempotency_key=data.get("application_id"), detail=data)
+        except InsufficientBudget as e:
+            return f"Loan Rejected: {e}"
+        except IdempotencyConflict as e:
+            return f"Loan not finalized: {e}"
+        except LedgerError as e:
+            return f"Loan Rejected: {e}"
+        # A replayed key returns the earlier reservation, which may have been released
+        if reservation["status"] != "committed":
+            return f"Loan not finalized: application was already {reservation['status']}."
+        # Memoized eligibility answers quoted the old remaining budget
+        invalidate(LOAN_TOOL_NAME)
         return f"[FINAL] Loan Approved. Remaining Budget: ₹{self.budget}"
 loan_agent = LoanDecisionAgent(budget=500000, income_threshold=300000)
-loan_tool = Tool(
-    name="Student Loan Agent",
-    func=lambda query: loan_agent.approve_loan(query),
-    description="Use this to decide if a student is eligible for a loan based on shortlisting, income, and university budget."
-)
-
-# Register tools with agent
-tools = [faq_tool, loan_tool]
-
-agent_executor = initialize_agent(
-    tools=tools,
-    llm=llm,
-    agent_type=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-    verbose=True,
-    handle_parsing_errors=True
-)
+def create_loan_tool():
+    Tool = registry.import_module("langchain.agents").Tool
+    return Tool(
+        name=LOAN_TOOL_NAME,
+        # Short TTL bounds staleness from budget spent by other processes
+        func=memoize(LOAN_TOOL_NAME, loan_agent.approve_loan, ttl=30),
+        description="Use this to decide if a student is eligible for a loan based on shortlisting, income, and university budget."
+    )
+
+def create_agent_executor():
+    agents = registry.import_module("langchain.agents")
+    # Register tools with agent
+    tools = [registry.get("loan_faq_tool"), registry.get("loan_tool")]
+    return agents.initialize_agent(
+        tools=tools,
+        llm=registry.get("llm"),
+        agent_type=agents.AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        verbose=True,
+        handle_parsing_errors=True
+    )
+
+registry.register("loan_faq_chain", load_faq_chain)
+registry.register("loan_faq_tool", create_faq_tool)
+registry.register("loan_faq_answer_cache", lambda: create_semantic_cache(registry.get("embeddings"), ["loan_data.json"]))
+registry.register("loan_tool", create_loan_tool)
+registry.register("loan_agent_executor", create_agent_executor)
+
+_LAZY_ATTRIBUTES = {
+    "llm": "llm",
+    "faq_chain": "loan_faq_chain",
+    "faq_tool": "loan_faq_tool",
+    "loan_tool": "loan_tool",
+    "agent_executor": "loan_agent_executor",
+}
+
+def __getattr__(name):
+    # Module-level objects are built on first access through the shared registry
+    if name in _LAZY_ATTRIBUTES:
+        return registry.get(_LAZY_ATTRIBUTES[name])
+    if name == "tools":
+        return [registry.get("loan_faq_tool"), registry.get("loan_tool")]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 if __name__ == "__main__":
     # Example usage
     annual_income = int(input("Enter your annual income (in INR): "))
@@ -99,5 +188,5 @@ if __name__ == "__main__":
        "requested_loan": requested_loan_amount
     }
 
-    response = agent_executor.run(f"Evaluate loan eligibility: {json.dumps(query_loan)}")
+    response = registry.get("loan_agent_executor").run(f"Evaluate loan eligibility: {json.dumps(query_loan)}")
     print(response)
\ No newline at end of file
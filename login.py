@@ -1,28 +1,37 @@
 import streamlit as st
-
-# --- USER CREDENTIALS (Temporary Storage) ---
-if "user_credentials" not in st.session_state:
-    st.session_state["user_credentials"] = {
-        "admin": {"password": "admin123", "role": "Admin"},
-        "doc_checker": {"password": "doc456", "role": "Document Checker"},
-        "loan_agent": {"password": "loan789", "role": "Loan Agent"},
-    }
+import auth_store  # registers the shared user and session store
+from registry import registry
 
 # --- LOGIN FUNCTION ---
 def login_user(username, password):
-    """Validate user login."""
-    users = st.session_state["user_credentials"]
-    if username in users and users[username]["password"] == password:
-        return users[username]["role"]
-    return None
+    """Validate user login against the shared user store."""
+    return registry.get("auth_store").verify(username, password)
 
 # --- SIGN-UP FUNCTION ---
 def signup_user(username, password, role):
     """Register a new user."""
-    if username in st.session_state["user_credentials"]:
-        return False  # User already exists
-    st.session_state["user_credentials"][username] = {"password": password, "role": role}
-    return True
+    if not username or not password:
+        return False
+    return registry.get("auth_store").create_user(username, password, role)
+
+# --- SESSION ---
+def start_session(username, role):
+    """Open a shared session and keep its token in the URL, so refreshes and other replicas resume it.
+    Any token the browser held before is revoked, so links copied earlier stop working."""
+    store = registry.get("auth_store")
+    previous = st.session_state.get("session_token") or st.query_params.get("session")
+    if previous:
+        store.end_session(previous)
+    token = store.create_session(username, role)
+    st.session_state.update(logged_in=True, role=role, username=username, session_token=token)
+    st.query_params["session"] = token
+
+def end_session():
+    token = st.session_state.get("session_token") or st.query_params.get("session")
+    if token:
+        registry.get("auth_store").end_session(token)
+    st.query_params.pop("session", None)
+    st.session_state.update(logged_in=False, role=None, username=None, session_token=None)
 
 # --- SHOW LOGIN FORM ---
 def show_login():
@@ -40,8 +49,7 @@ def show_login():
             role = login_user(username, password)
             if role:
                 st.success(f"✅ Login successful! Role: {role}")
-                st.session_state["role"] = role
-                st.session_state["logged_in"] = True
+                start_session(username, role)
                 st.success(f"Welcome {username} ")
             else:
                 st.error("❌ Invalid username or password.")
@@ -56,5 +64,5 @@ def show_login():
             if signup_user(new_username, new_password, role):
                 st.success("🎉 Account created successfully! Please login.")
             else:
-                st.error("⚠️ Username already exists. Please choose a different username.")
+                st.error("⚠️ Username already exists or is empty. Please choose a different username.")
 
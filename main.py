@@ -1,36 +1,47 @@
 import streamlit as st
-from login import show_login
+from login import show_login, end_session
+import os
+import sys
 import time
+import hashlib
+import io
 import uuid
-import os
-from datetime import datetime, timedelta
-from langchain.agents import initialize_agent, AgentType
-from agent_tools import tools, llm
+import zipfile
+from datetime import datetime
+from registry import registry
 import streamlit as st
 import json
-from doc_extrac_shortlist import DocumentCheckingAgent, parse_extracted_text, shortlist_agent, agent_executor
-from loan_agent import agent_executor, LoanDecisionAgent
-# --- SESSION TIMEOUT CONFIG ---
-SESSION_TIMEOUT_MINUTES = 15
-
+import pandas as pd
+import bulk_loans
+from doc_extrac_shortlist import DocumentCheckingAgent, parse_extracted_text, shortlist_agent, EXPECTED_KEYWORDS, OCR_LADDER
+from loan_agent import LoanDecisionAgent, loan_agent, application_key
+from decisions import decide_shortlist, decide_loan, run_agent, decision_stats
+from tool_memo import tool_memo
+from event_store import record_event
+from batch_shortlist import run_batch, iter_zip, ResultWriter
+from tracing import tracer, langchain_callbacks
+import job_queue  # registers the job queue and its worker pool
 if "choice" not in st.session_state:
     st.session_state["choice"] = "🏠 Home"
 # --- SESSION STATE INIT ---
 if "logged_in" not in st.session_state:
     st.session_state["logged_in"] = False
     st.session_state["role"] = None
-    st.session_state["last_active"] = datetime.now()
 
 # --- SESSION EXPIRATION CHECK ---
-if st.session_state["logged_in"]:
-    now = datetime.now()
-    if now - st.session_state["last_active"] > timedelta(minutes=SESSION_TIMEOUT_MINUTES):
+# Sessions live in the shared auth store, so the inactivity timeout
+# (SESSION_TIMEOUT_MINUTES) holds across reruns, refreshes and replicas
+session_token = st.session_state.get("session_token") or st.query_params.get("session")
+if session_token:
+    session = registry.get("auth_store").session(session_token)
+    if session is None:
+        end_session()
         st.warning("⏳ Session expired due to inactivity.")
-        st.session_state["logged_in"] = False
-        st.session_state["role"] = None
         st.stop()
-    else:
-        st.session_state["last_active"] = now
+    st.session_state.update(logged_in=True, role=session["role"], username=session["username"],
+                            session_token=session_token)
+elif st.session_state["logged_in"]:
+    st.session_state.update(logged_in=False, role=None)
 
 # --- LOGIN ---
 if not st.session_state["logged_in"]:
@@ -56,8 +67,7 @@ with st.sidebar:
 
 # --- LOGOUT ---
 if choice == "🔐 Logout":
-    st.session_state["logged_in"] = False
-    st.session_state["role"] = None
+    end_session()
     st.success("✅ You have been logged out.")
     time.sleep(5)
     st.rerun()
@@ -77,70 +87,189 @@ elif choice == "📄 Document Verification":
     uploaded_file = st.file_uploader("Upload the document for verification", type=["pdf", "docx","jpg","png","jpeg"])
 
     if uploaded_file:
+        document = uploaded_file.getvalue()
+        jobs = registry.get("job_queue")
+        if int(os.getenv("JOB_WORKERS", "2")):
+            registry.get("job_workers")
+        # Reruns of the page find the same job instead of queueing the document again
+        session_id = st.session_state.setdefault("session_id", str(uuid.uuid4()))
+        job_id = jobs.submit(
+            "verification", {"file": uploaded_file.name}, document,
+            idempotency_key=f"{session_id}:{hashlib.sha256(document).hexdigest()}",
+        )
         st.success("✅ Document uploaded successfully!")
-        st.info("🔎 Verification in progress...")
 
-        # Simulate verification process
+        status_line = st.empty()
         progress_bar = st.progress(0)
-        for percent_complete in range(100):
-            time.sleep(0.02)
-            progress_bar.progress(percent_complete + 1)
-
-        st.success("✅ Document verified successfully!")
-        st.download_button(
-            label="📥 Download Verified Document",
-            data=uploaded_file.read(),
-            file_name=uploaded_file.name,
-            mime="application/octet-stream",
-        )
+        job = jobs.get(job_id)
+        while job["status"] in ("queued", "running"):
+            status_line.info(f"🔎 Verification {job['stage'] or job['status']}...")
+            progress_bar.progress(int(job["progress"] * 100))
+            time.sleep(0.25)
+            job = jobs.get(job_id)
+        progress_bar.progress(100)
+        status_line.empty()
+
+        if job["status"] == "failed":
+            st.error(f"❌ Verification failed: {job['error']}")
+        elif job["result"]["validation"]["status"] == "verified":
+            st.success("✅ Document verified successfully!")
+            st.download_button(
+                label="📥 Download Verified Document",
+                data=document,
+                file_name=uploaded_file.name,
+                mime="application/octet-stream",
+            )
+        else:
+            st.warning(f"⚠️ {job['result']['validation']['message']}")
+        if job["status"] == "done" and job["result"]["validation"].get("duplicate_of"):
+            st.info("🪞 This document matches one already on file; a reviewer will check it.")
 elif choice == "📄 Document Shortlisting":
     if st.session_state["role"] != "Document Checker":
         st.warning("⚠️ Access denied! Only Document Checkers can access this page.")
         st.stop()
 
     st.header("📄 Upload and Verify Documents")
-    uploaded_file = st.file_uploader("Upload student result image (JPEG/PNG)", type=["jpg", "jpeg", "png"])
+    mode = st.radio("Mode", ["Single document", "Batch (multiple files or ZIP)"], horizontal=True)
 
-    if uploaded_file:
-        temp_path = f"./temp_upload_{uuid.uuid4()}.{uploaded_file.type.split('/')[-1]}"
-        with open(temp_path, "wb") as f:
-            f.write(uploaded_file.read())
+    if mode == "Batch (multiple files or ZIP)":
+        batch_files = st.file_uploader(
+            "Upload student result images or ZIP archives",
+            type=["jpg", "jpeg", "png", "pdf", "docx", "zip"],
+            accept_multiple_files=True,
+        )
 
-        st.image(temp_path, caption="Uploaded Document", use_container_width=True)
+        if batch_files and st.button("📌 Run Batch Shortlisting"):
+            def batch_inputs():
+                for batch_file in batch_files:
+                    if batch_file.name.lower().endswith(".zip"):
+                        with zipfile.ZipFile(batch_file) as archive:
+                            yield from iter_zip(archive, prefix=batch_file.name)
+                    else:
+                        yield batch_file.name, batch_file.getvalue()
+
+            output = io.StringIO()
+            rows = []
+            status_line = st.empty()
+            results_table = st.empty()
+
+            def show_row(row):
+                rows.append(row)
+                record_event("verification", row["verification_status"] or "error",
+                             (row["ocr_seconds"] or 0) * 1000, {"file": row["file"], "batch": True})
+                if row["decision"]:
+                    record_event("shortlisting", "shortlisted" if row["decision"] == "Shortlisted" else "rejected")
+                status_line.text(f"🔎 Processed {len(rows)} documents...")
+                if len(rows) % 25 == 1:
+                    results_table.dataframe(rows)
+
+            with st.spinner("Processing batch..."):
+                summary = run_batch(
+                    batch_inputs(),
+                    writer=ResultWriter(output, "csv"),
+                    tesseract_path="C:\\Program Files\\Tesseract-OCR\\tesseract.exe",
+                    on_result=show_row,
+                )
+            results_table.dataframe(rows)
+
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("📄 Documents", summary["documents"])
+            col2.metric("✅ Shortlisted", summary["shortlisted"])
+            col3.metric("⚠️ Errors", summary["errors"])
+            col4.metric("⚡ Docs / second", summary["docs_per_second"])
+
+            st.download_button(
+                label="📥 Download Results (CSV)",
+                data=output.getvalue(),
+                file_name="shortlisting_results.csv",
+                mime="text/csv",
+            )
+        st.stop()
+
+    uploaded_file = st.file_uploader("Upload student result (JPEG/PNG, PDF or DOCX)", type=["jpg", "jpeg", "png", "pdf", "docx"])
+
+    if uploaded_file:
+        # Decoded in memory by the OCR pipeline; nothing is written to disk
+        image_bytes = uploaded_file.getvalue()
+        if not uploaded_file.name.lower().endswith((".pdf", ".docx")):
+            st.image(image_bytes, caption="Uploaded Document", use_container_width=True)
 
+        # One trace per upload: OCR stages, validation, parsing and decisions nest under it
+        request_span = tracer.span("request.document", file=uploaded_file.name).start()
         try:
             doc_checker = DocumentCheckingAgent("C:\\Program Files\\Tesseract-OCR\\tesseract.exe")
-            extracted_text = doc_checker.extract_text_from_image(temp_path)
+            # One OCR pass per upload; reruns hit the shared OCR cache
+            ocr_result = doc_checker.ocr(image_bytes)
 
             st.subheader("📄 Extracted Text")
             with st.expander("📄 Show Raw Extracted Text"):
-                st.text(extracted_text)
-
-            expected_keywords = ["Name", "Registration No", "Overall Grade", "Result", "Roll No"]
-            validation_result = doc_checker.validate_document(temp_path, expected_keywords)
+                st.text(ocr_result.text)
+                st.caption(f"Mean OCR confidence: {ocr_result.mean_confidence:.1f} · OCR time: {ocr_result.elapsed:.2f}s"
+                           + (f" · {ocr_result.total_pages} pages" if ocr_result.total_pages > 1 else ""))
+                st.caption("Stage timings: " + ", ".join(
+                    f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in ocr_result.timings.items()
+                ))
+                if ocr_result.passes:
+                    st.caption("OCR passes: " + " → ".join(
+                        f"{attempt['pass']} {attempt['seconds'] * 1000:.0f} ms{' ✓' if attempt['accepted'] else ''}"
+                        for attempt in ocr_result.passes
+                    ))
+
+            validation_result = doc_checker.validate_document(ocr_result, EXPECTED_KEYWORDS)
+            # Count each document once, not on every rerun of the page
+            recorded = st.session_state.setdefault("recorded_documents", set())
+            if ocr_result.key not in recorded:
+                recorded.add(ocr_result.key)
+                record_event("verification", validation_result["status"], ocr_result.elapsed * 1000)
             st.subheader("✅ Validation Result:")
             st.json(validation_result)
-
-            parsed_data = parse_extracted_text(extracted_text)
+            if validation_result.get("duplicate_of"):
+                first_seen = time.strftime("%Y-%m-%d %H:%M", time.localtime(validation_result["duplicate_of"]["first_seen"]))
+                st.warning(f"🪞 Near-duplicate of a document first processed {first_seen}: "
+                           "its extraction was reused. Please review before accepting.")
+
+            parsed_data = parse_extracted_text(ocr_result)
+            # Region-targeted second pass, only for grade fields the full-page parse missed.
+            # A reused near-duplicate extraction has no word boxes for this image.
+            if not (parsed_data.overall_grade and parsed_data.result) and not ocr_result.duplicate_of:
+                layout = doc_checker.extract_fields(image_bytes, ocr_result)
+                for field in ("overall_grade", "result"):
+                    if not getattr(parsed_data, field) and layout["fields"].get(field):
+                        setattr(parsed_data, field, layout["fields"][field])
+                with st.expander("🧭 Show Layout Fields"):
+                    st.json(layout["fields"])
+                    st.caption(
+                        f"Template {layout['template'] or 'n/a'} "
+                        f"({'cached' if layout['template_hit'] else 'learned'}) · {layout['elapsed'] * 1000:.0f} ms"
+                    )
             st.subheader("📊 Parsed Data:")
-            st.json(parsed_data)
+            st.json(parsed_data.to_dict())
 
             query_data = {
                 "verification_result": validation_result,
-                "extracted_text": parsed_data
+                "extracted_text": parsed_data.to_dict()
             }
 
+            explain = st.checkbox("🧠 Also ask the agent to explain the decision")
             if st.button("📌 Run Shortlisting Agent"):
-                with st.spinner("Processing..."):
-                    response = agent_executor.run(f"Shortlist this student: {json.dumps(query_data)}")
-                st.success("✅ Response from Agent:")
-                st.markdown(f"**{response}**")
+                start = time.perf_counter()
+                decision = decide_shortlist(validation_result, parsed_data)
+                decision_ms = (time.perf_counter() - start) * 1000
+                record_event("shortlisting", "shortlisted" if decision.shortlisted else "rejected", decision_ms)
+                st.success("✅ Shortlisting Decision:")
+                st.markdown(f"**{decision.message}**")
+                st.caption(f"Decided in {decision_ms:.3f} ms without an LLM call")
+
+                if explain:
+                    with st.spinner("Asking the agent..."):
+                        response = run_agent("shortlist", registry.get("shortlist_agent_executor"), f"Shortlist this student: {json.dumps(query_data)}")
+                    st.info(f"🧠 Agent explanation: {response}")
 
         except Exception as e:
+            request_span.set(error=str(e))
             st.error(f"❌ An error occurred: {str(e)}")
-
         finally:
-            os.remove(temp_path)
+            request_span.end()
 # --- LOAN QUERIES PAGE ---
 # --- LOAN QUERIES PAGE ---
 elif choice == "🏦 Loan Queries":
@@ -151,7 +280,7 @@ elif choice == "🏦 Loan Queries":
     st.header("🏦 Loan Application Assistant")
     st.write("This tool helps Loan Agents answer student queries and evaluate loan eligibility.")
 
-    loan_tab1, loan_tab2 = st.tabs(["💡 FAQs", "📋 Loan Eligibility Checker"])
+    loan_tab1, loan_tab2, loan_tab3 = st.tabs(["💡 FAQs", "📋 Loan Eligibility Checker", "📦 Bulk Decisions"])
 
     with loan_tab1:
         st.subheader("Got Questions? Ask here 👇")
@@ -160,8 +289,13 @@ elif choice == "🏦 Loan Queries":
             if user_question:
                 with st.spinner("Thinking..."):
                     try:
-                        response = agent_executor.run(user_question)
-                        st.success(response)
+                        cached_answer, _ = registry.get("loan_faq_answer_cache").lookup(user_question)
+                        if cached_answer is not None:
+                            st.success(cached_answer)
+                            st.caption("⚡ Answered from the semantic cache")
+                        else:
+                            response = run_agent("loan_faq", registry.get("loan_agent_executor"), user_question)
+                            st.success(response)
                     except Exception as e:
                         st.error(f"Error: {e}")
             else:
@@ -173,6 +307,10 @@ elif choice == "🏦 Loan Queries":
         shortlisted = st.selectbox("Was the student shortlisted by the admission committee?", ["Yes", "No"])
         annual_income = st.number_input("Annual Income (₹)", min_value=0)
         requested_loan = st.number_input("Requested Loan Amount (₹)", min_value=0)
+        loan_application_id = st.text_input("Application / Student ID (optional)", key="loan_application_id")
+
+        explain_loan = st.checkbox("🧠 Also ask the agent to explain the decision", key="loan_explain")
+        finalize = st.checkbox("💰 Reserve the approved amount from the university budget", key="loan_finalize")
 
         if st.button("Check Loan Eligibility", key="loan_check"):
             status = "shortlisted" if shortlisted == "Yes" else "not shortlisted"
@@ -182,12 +320,72 @@ elif choice == "🏦 Loan Queries":
                 "requested_loan": requested_loan
             }
 
-            with st.spinner("Evaluating loan eligibility..."):
-                try:
-                    response = agent_executor.run(f"Evaluate loan eligibility: {json.dumps(data)}")
-                    st.success(response)
-                except Exception as e:
-                    st.error(f"Error: {e}")
+            start = time.perf_counter()
+            decision = decide_loan(status, annual_income, requested_loan)
+            decision_ms = (time.perf_counter() - start) * 1000
+            record_event("loan", "approved" if decision.approved else "rejected", decision_ms)
+            if decision.approved:
+                st.success(decision.message)
+            else:
+                st.error(decision.message)
+            st.caption(f"Decided in {decision_ms:.3f} ms without an LLM call")
+
+            if decision.approved and finalize:
+                # Re-finalizing the same application never double-spends; without an ID each click is its own decision
+                application_id = application_key(loan_application_id.strip())
+                final_message = loan_agent.finalize_approval(json.dumps({**data, "application_id": application_id}))
+                st.info(final_message)
+
+            if explain_loan:
+                with st.spinner("Asking the agent..."):
+                    try:
+                        response = run_agent("loan", registry.get("loan_agent_executor"), f"Evaluate loan eligibility: {json.dumps(data)}")
+                        st.info(f"🧠 Agent explanation: {response}")
+                    except Exception as e:
+                        st.error(f"Error: {e}")
+
+    with loan_tab3:
+        st.subheader("Decide a Whole Applicant File 📦")
+        applicants_file = st.file_uploader(
+            "Upload applicants (CSV or Parquet with shortlisted, annual_income, requested_loan)",
+            type=["csv", "parquet"],
+        )
+        policy_labels = {
+            "First come, first served": "fifo",
+            "Lowest income first": "lowest_income",
+            "Maximum number funded": "max_funded",
+        }
+        policy = st.selectbox("Budget allocation policy", list(policy_labels))
+        bulk_budget = st.number_input("Budget to allocate (₹)", min_value=0.0, value=float(loan_agent.budget))
+
+        if applicants_file and st.button("Run Bulk Decisions", key="bulk_loans"):
+            try:
+                if applicants_file.name.lower().endswith(".parquet"):
+                    applicants = pd.read_parquet(applicants_file)
+                else:
+                    applicants = pd.read_csv(applicants_file)
+                start = time.perf_counter()
+                decisions = bulk_loans.decide(
+                    bulk_loans.normalize_columns(applicants), bulk_budget,
+                    loan_agent.income_threshold, policy_labels[policy],
+                )
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                summary = bulk_loans.summarize(decisions, bulk_budget)
+
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("👥 Applicants", summary["applicants"])
+                col2.metric("✅ Approved", summary["approved"])
+                col3.metric("💰 Allocated", f"₹{summary['allocated']:,.0f}")
+                col4.metric("⚡ Decided in", f"{elapsed_ms:.1f} ms")
+                st.dataframe(decisions.head(1000))
+                st.download_button(
+                    label="📥 Download Decisions (CSV)",
+                    data=decisions.to_csv(index=False),
+                    file_name="loan_decisions.csv",
+                    mime="text/csv",
+                )
+            except ValueError as e:
+                st.error(f"Error: {e}")
 
 
 # --- ADMIN ANALYTICS PAGE ---
@@ -198,11 +396,13 @@ elif choice == "📈 Admin Analytics":
 
     st.header("📈 Admission Insights")
 
-    applications = 150
-    verified_docs = 120
-    rejected_docs = 30
-    loans_approved = 50
-    loans_rejected = 20
+    # Precomputed aggregates: constant-time reads regardless of event history size
+    events = registry.get("event_store")
+    applications = events.count("verification")
+    verified_docs = events.count("verification", "verified")
+    rejected_docs = applications - verified_docs
+    loans_approved = events.count("loan", "approved")
+    loans_rejected = events.count("loan", "rejected")
 
     col1, col2 = st.columns(2)
     col1.metric("📄 Total Applications", applications)
@@ -214,6 +414,114 @@ elif choice == "📈 Admin Analytics":
     st.subheader("🏦 Loan Approval Rate")
     st.bar_chart({"Status": ["Approved", "Rejected"], "Count": [loans_approved, loans_rejected]})
 
+    st.subheader("📅 Activity Over Time")
+    timeseries = pd.DataFrame(events.timeseries())
+    if timeseries.empty:
+        st.caption("No events recorded in the last 7 days.")
+    else:
+        timeseries["hour"] = pd.to_datetime(timeseries["bucket"], unit="s")
+        timeseries["series"] = timeseries["stage"] + ": " + timeseries["outcome"]
+        st.line_chart(timeseries.pivot_table(index="hour", columns="series", values="count", aggfunc="sum").fillna(0))
+
+    st.subheader("⏱️ Pipeline Stage Throughput & Latency")
+    st.caption("Events per minute over the last hour; latency percentiles in milliseconds.")
+    st.dataframe(events.stage_summary())
+
+    st.subheader("⚡ Decision Paths")
+    st.caption("Direct decision engine calls vs. LLM agent calls in this server process.")
+    st.dataframe(decision_stats.snapshot())
+
+    st.subheader("🧠 FAQ Answer Cache")
+    cache_rows = [
+        {"cache": name, **registry.get(name).stats()}
+        for name in ("faq_answer_cache", "loan_faq_answer_cache")
+        if registry.is_initialized(name)
+    ]
+    if cache_rows:
+        st.dataframe(cache_rows)
+    else:
+        st.caption("No FAQ questions answered yet in this server process.")
+
+    st.subheader("🧮 Tool Memoization")
+    st.caption("Agent tool calls answered from the memo instead of being recomputed, in this server process.")
+    memo_summary = tool_memo.summary()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Agent Runs", memo_summary["requests"])
+    col2.metric("Tool Calls Saved", memo_summary["saved_tool_calls"])
+    col3.metric("LLM Calls Saved", memo_summary["saved_llm_calls"])
+    if tool_memo.stats():
+        st.dataframe(tool_memo.stats())
+
+    st.subheader("🪜 OCR Pass Ladder")
+    st.caption("Documents accepted or escalated at each pass, with the pass's Tesseract latency in milliseconds.")
+    ladder_rows = []
+    for name in OCR_LADDER:
+        stage = f"ocr_pass:{name}"
+        accepted, attempts = events.count(stage, "accepted"), events.count(stage)
+        if attempts:
+            ladder_rows.append({"pass": name, "attempts": attempts, "accepted": accepted,
+                                "acceptance_rate": round(accepted / attempts, 3), **events.latency_percentiles(stage)})
+    if ladder_rows:
+        st.dataframe(ladder_rows)
+    else:
+        st.caption("No documents OCRed yet.")
+
+    st.subheader("🧾 Job Queue")
+    job_counts = registry.get("job_queue").counts()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Queued", job_counts.get("queued", 0))
+    col2.metric("Running", job_counts.get("running", 0))
+    col3.metric("Done", job_counts.get("done", 0))
+    col4.metric("Failed", job_counts.get("failed", 0))
+
+    st.subheader("🚦 LLM Gateway")
+    if "llm_gateway" in sys.modules:
+        st.dataframe(sys.modules["llm_gateway"].gateway.stats())
+    else:
+        st.caption("No LLM calls made yet in this server process.")
+
+    st.subheader("🔬 Pipeline Traces")
+    if not tracer.enabled:
+        st.caption("Tracing is disabled (TRACING_ENABLED=0).")
+    else:
+        stage_rows = tracer.stage_percentiles()
+        if stage_rows:
+            st.dataframe(stage_rows)
+        traces = tracer.traces(limit=50)
+        if traces:
+            import altair as alt
+
+            selected = st.selectbox(
+                "Request waterfall",
+                range(len(traces)),
+                format_func=lambda i: (
+                    f"{datetime.fromtimestamp(traces[i]['start_ts']).strftime('%H:%M:%S')} · "
+                    f"{traces[i]['name']} · {traces[i]['duration_ms']:.0f} ms"
+                ),
+            )
+            spans = pd.DataFrame(traces[selected]["spans"])
+            spans["end_ms"] = spans["start_ms"] + spans["duration_ms"]
+            spans["row"] = [f"{i:02d} {name}" for i, name in enumerate(spans["name"])]
+            st.altair_chart(
+                alt.Chart(spans).mark_bar().encode(
+                    x=alt.X("start_ms", title="ms since request start"),
+                    x2="end_ms",
+                    y=alt.Y("row", sort=None, title=None),
+                    color=alt.Color("name", legend=None),
+                    tooltip=["name", "start_ms", "duration_ms", "error"],
+                ),
+                use_container_width=True,
+            )
+        else:
+            st.caption("No traced requests yet in this server process.")
+        col1, col2 = st.columns(2)
+        col1.download_button("📥 Traces (JSON)", tracer.export_json(), file_name="traces.json", mime="application/json")
+        col2.download_button("📥 Metrics (Prometheus)", tracer.prometheus(), file_name="metrics.prom", mime="text/plain")
+
+    st.subheader("⏱️ Component Startup")
+    st.caption("Models and agents are created on first use and shared by all sessions.")
+    st.dataframe(registry.report())
+
 # --- FAQ PAGE ---
 elif choice == "❓ FAQ & Support":
     st.header("🤖 Ask Our Admission Counsellor Bot")
@@ -222,28 +530,36 @@ elif choice == "❓ FAQ & Support":
     if query and st.button("Ask"):
         with st.spinner("🤖 Thinking..."):
             try:
-                agent_executor = initialize_agent(
-                    tools=tools,
-                    llm=llm,
-                    agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-                    verbose=False,
-                    handle_parsing_errors=True,
-                    return_intermediate_steps=True
-                )
+                # Similar questions answered before skip the agent and the LLM entirely
+                cached_answer, _ = registry.get("faq_answer_cache").lookup(query)
+                if cached_answer is not None:
+                    st.subheader("✅ Final Answer")
+                    st.success(cached_answer)
+                    st.caption("⚡ Answered from the semantic cache")
+                    st.stop()
 
-                result = agent_executor.invoke({"input": query})
+                from streaming import StreamlitAgentHandler
 
                 st.subheader("🧠 Reasoning Process")
-                for i, step in enumerate(result["intermediate_steps"]):
-                    action, observation = step
-                    st.markdown(f"**Step {i + 1}:**")
-                    st.markdown(f"*Tool:* `{action.tool}`")
-                    st.code(action.tool_input)
-                    st.markdown(f"**Response:** {observation}")
-                    st.markdown("---")
+                steps_container = st.container()
+                token_placeholder = st.empty()
+                handler = StreamlitAgentHandler(token_placeholder, steps_container)
+
+                # Executors are built once and shared; each request checks one out
+                with tracer.span("agent.faq") as span, tool_memo.track() as savings, \
+                        registry.get("faq_agent_pool").acquire() as agent_executor:
+                    result = agent_executor.invoke({"input": query}, config={"callbacks": [handler, *langchain_callbacks()]})
+                    span.set(**savings.to_dict())
+                token_placeholder.empty()
 
                 st.subheader("✅ Final Answer")
                 st.success(result["output"])
 
+                col1, col2 = st.columns(2)
+                col1.metric("⚡ Time to First Token", f"{handler.first_token_seconds or 0:.2f} s")
+                col2.metric("⏱️ Total Time", f"{handler.total_seconds:.2f} s")
+                if savings.saved_calls:
+                    st.caption(f"♻️ {savings.saved_calls} repeated tool call(s) answered from the memo")
+
             except Exception as e:
                 st.error(f"⚠️ Something went wrong: {e}")
\ No newline at end of file
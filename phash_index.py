@@ -0,0 +1,283 @@
+"""Perceptual-hash index of processed result cards.
+
+Before OCR, the preprocessed page is reduced to two DCT perceptual hashes. The
+64-bit hash finds candidates within ``PHASH_MAX_DISTANCE`` bits via
+multi-index hashing; the 256-bit hash ranks them. A re-photographed or
+re-compressed card lands within a few bits of the original, but so do other
+students' cards printed from the same board template. A candidate is therefore
+only accepted after its identity fields (Roll No, Registration No) are found
+again in the new image. Only those small value regions are OCRed, at the
+positions stored with the original. A confirmed near-duplicate reuses the
+stored extraction and is flagged for the reviewer.
+
+Hashes and extractions live in SQLite (``PHASH_INDEX_PATH``), so every process
+and restart shares them. Each process keeps the hashes in NumPy arrays and
+picks up rows added elsewhere on its next lookup.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from itertools import combinations
+import cv2
+import numpy as np
+from layout import ANCHORS, VALUE_PATTERNS, find_anchors
+from registry import registry
+
+MAX_DISTANCE = int(os.getenv("PHASH_MAX_DISTANCE", "8"))
+# Candidates (nearest by the fine hash) whose identity fields are checked
+VERIFY_CANDIDATES = int(os.getenv("PHASH_VERIFY_CANDIDATES", "3"))
+IDENTITY_FIELDS = ("roll_no", "registration_no")
+# Slack around a stored value box, as a share of the page, for alignment error between captures
+VERIFY_MARGIN = 0.02
+# Block segmentation: the slack may pull neighbouring lines into the crop
+VERIFY_PSM = 6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    coarse INTEGER NOT NULL,
+    fine BLOB NOT NULL,
+    ocr_key TEXT NOT NULL UNIQUE,
+    extraction TEXT NOT NULL,
+    checks TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+if hasattr(np, "bitwise_count"):
+    popcount = np.bitwise_count
+else:  # NumPy < 2.0
+    _BYTE_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def popcount(codes):
+        codes = np.ascontiguousarray(codes)
+        return _BYTE_BITS[codes.view(np.uint8)].reshape(*codes.shape, codes.itemsize).sum(axis=-1)
+
+
+def phash(gray, side=8):
+    """DCT perceptual hash of ``side * side`` bits, packed big-endian into uint64 words."""
+    small = cv2.resize(gray, (side * 4, side * 4), interpolation=cv2.INTER_AREA).astype(np.float32)
+    coefficients = cv2.dct(small)[:side, :side].flatten()
+    # The DC term only reflects overall brightness
+    bits = coefficients > np.median(coefficients[1:])
+    bits[0] = False
+    return np.packbits(bits).view(">u8").astype(np.uint64)
+
+
+def perceptual_hashes(gray):
+    """(64-bit code as int, 256-bit code as 4 uint64) for a page image."""
+    return int(phash(gray, 8)[0]), phash(gray, 16)
+
+
+class MultiIndexHash:
+    """Exact Hamming-radius search over 64-bit codes.
+
+    Codes are split into ``chunks`` substrings. By pigeonhole, a code within
+    ``radius`` bits of the query matches it to within ``radius // chunks`` bits
+    on at least one substring. All substrings, tagged with their chunk number,
+    go into one sorted array. A lookup is a single ``searchsorted`` for every
+    substring value within the sub-radius of the query's. Codes added since the
+    last rebuild are kept in a small tail that is scanned directly.
+    """
+
+    def __init__(self, radius=MAX_DISTANCE, chunks=4, rebuild_every=4096):
+        self.radius = radius
+        self.chunks = chunks
+        self.width = 64 // chunks
+        self.rebuild_every = rebuild_every
+        self.codes = np.zeros(0, dtype=np.uint64)
+        self._keys = np.zeros(0, dtype=np.uint64)
+        self._positions = np.zeros(0, dtype=np.int64)
+        self._indexed = 0
+        flips = [0]
+        for distance in range(1, radius // chunks + 1):
+            flips += [sum(1 << bit for bit in bits) for bits in combinations(range(self.width), distance)]
+        self._flips = np.array(flips, dtype=np.uint64)
+        self._shifts = np.arange(chunks, dtype=np.uint64) * np.uint64(self.width)
+        self._tags = np.arange(chunks, dtype=np.uint64) << np.uint64(self.width)
+        self._mask = np.uint64((1 << self.width) - 1)
+
+    def _substrings(self, codes):
+        """(len(codes), chunks) substrings, each tagged with its chunk number."""
+        return ((codes[:, None] >> self._shifts) & self._mask) | self._tags
+
+    def add(self, codes):
+        self.codes = np.concatenate([self.codes, np.asarray(codes, dtype=np.uint64)])
+        if len(self.codes) - self._indexed >= self.rebuild_every:
+            self.rebuild()
+
+    def rebuild(self):
+        keys = self._substrings(self.codes).ravel()
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._positions = order // self.chunks
+        self._indexed = len(self.codes)
+
+    def search(self, code):
+        """(positions, distances) of the stored codes within ``radius`` bits of ``code``."""
+        code = np.uint64(code)
+        probes = (self._substrings(np.array([code]))[0][:, None] ^ self._flips).ravel()
+        low = np.searchsorted(self._keys, probes, "left")
+        high = np.searchsorted(self._keys, probes, "right")
+        lengths = high - low
+        hit = lengths > 0
+        low, lengths = low[hit], lengths[hit]
+        # Concatenated [low, high) ranges without a Python loop
+        total = int(lengths.sum())
+        starts = np.repeat(low - np.cumsum(lengths) + lengths, lengths)
+        candidates = np.concatenate([self._positions[starts + np.arange(total)],
+                                     np.arange(self._indexed, len(self.codes))])
+        distances = popcount(self.codes[candidates] ^ code)
+        keep = distances <= self.radius
+        candidates, index = np.unique(candidates[keep], return_index=True)
+        return candidates, distances[keep][index]
+
+    def __len__(self):
+        return len(self.codes)
+
+
+def _normalize_value(text):
+    return re.sub(r"[^A-Z0-9]", "", text.upper())
+
+
+def _value_right_of(words, anchor, field):
+    left, top, right, bottom = anchor
+    middle = (top + bottom) / 2
+    same_line = sorted(
+        (w for w in words if w["left"] >= right and w["top"] <= middle <= w["top"] + w["height"]),
+        key=lambda w: w["left"],
+    )
+    for word in same_line[:3]:
+        if VALUE_PATTERNS[field].fullmatch(word["text"].strip(":.-")):
+            return word
+    return None
+
+
+def identity_checks(words, page_width, page_height):
+    """Value boxes (relative to the page) and values of the identity fields in an OCR result."""
+    checks = []
+    for field in IDENTITY_FIELDS:
+        for anchor in find_anchors(words, ANCHORS[field]):
+            word = _value_right_of(words, anchor, field)
+            if word is None or not re.search(r"\d", word["text"]):
+                continue
+            pad = word["height"]
+            checks.append({
+                "field": field,
+                "value": _normalize_value(word["text"]),
+                "region": [max(word["left"] - pad, 0) / page_width, max(word["top"] - pad, 0) / page_height,
+                           min(word["left"] + word["width"] + pad, page_width) / page_width,
+                           min(word["top"] + word["height"] + pad, page_height) / page_height],
+            })
+            break
+    return checks
+
+
+def confirm(gray, checks, backend):
+    """True when every stored identity value is read back, as a whole word, from its region of ``gray``."""
+    # A value without a digit is a label, not an identifier (rows stored before that was enforced)
+    if not checks or not all(re.search(r"\d", check["value"]) for check in checks):
+        return False
+    height, width = gray.shape[:2]
+    for check in checks:
+        left, top, right, bottom = check["region"]
+        crop = gray[int(max(top - VERIFY_MARGIN, 0) * height):int(min(bottom + VERIFY_MARGIN, 1) * height),
+                    int(max(left - VERIFY_MARGIN, 0) * width):int(min(right + VERIFY_MARGIN, 1) * width)]
+        if crop.size == 0:
+            return False
+        data = backend.image_to_data(crop, psm=VERIFY_PSM)
+        # Whole words only: the padded crop may hold neighbouring numbers, and "1234" is not "12345"
+        if check["value"] not in {_normalize_value(word) for word in data["text"]}:
+            return False
+    return True
+
+
+class PHashIndex:
+    def __init__(self, path=None, max_distance=MAX_DISTANCE, timeout=30.0):
+        self.path = path or os.getenv("PHASH_INDEX_PATH", "phash.db")
+        self.timeout = timeout
+        self.mih = MultiIndexHash(max_distance)
+        self.fine = np.zeros((0, 4), dtype=np.uint64)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.lookups = 0
+        self.duplicates = 0
+        self.rejected_candidates = 0
+        self._last_id = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._refresh()
+        self.mih.rebuild()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _refresh(self):
+        """Load hashes added since the last look (by this or any other process)."""
+        rows = self._connection().execute(
+            "SELECT id, coarse, fine FROM documents WHERE id > ? ORDER BY id", (self._last_id,)
+        ).fetchall()
+        if not rows:
+            return
+        self.ids = np.concatenate([self.ids, np.array([row[0] for row in rows], dtype=np.int64)])
+        # SQLite integers are signed; the code is stored as its two's-complement view
+        self.mih.add(np.array([row[1] for row in rows], dtype=np.int64).view(np.uint64))
+        self.fine = np.concatenate([self.fine, np.frombuffer(b"".join(row[2] for row in rows), dtype=np.uint64).reshape(-1, 4)])
+        self._last_id = rows[-1][0]
+
+    def candidates(self, coarse, fine, limit=VERIFY_CANDIDATES):
+        """Up to ``limit`` stored documents near the hashes, closest 256-bit hash first:
+        [(document id, coarse distance, fine distance)]."""
+        with self._lock:
+            self.lookups += 1
+            self._refresh()
+            positions, distances = self.mih.search(coarse)
+            if not len(positions):
+                return []
+            fine_distances = popcount(self.fine[positions] ^ fine).sum(axis=1)
+            best = np.argsort(fine_distances, kind="stable")[:limit]
+            return [(int(self.ids[positions[i]]), int(distances[i]), int(fine_distances[i])) for i in best]
+
+    def get(self, document_id):
+        row = self._connection().execute(
+            "SELECT ocr_key, extraction, checks, created_at FROM documents WHERE id = ?", (document_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"id": document_id, "ocr_key": row[0], "extraction": json.loads(row[1]),
+                "checks": json.loads(row[2]), "created_at": row[3]}
+
+    def add(self, coarse, fine, ocr_key, extraction, checks):
+        """Store a processed document; a repeated ``ocr_key`` is ignored."""
+        self._connection().execute(
+            "INSERT OR IGNORE INTO documents (coarse, fine, ocr_key, extraction, checks, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (int(np.uint64(coarse).view(np.int64)), np.asarray(fine, dtype=np.uint64).tobytes(), ocr_key,
+             json.dumps(extraction), json.dumps(checks), time.time()),
+        )
+
+    def find_duplicate(self, gray, coarse, fine, backend):
+        """The stored document ``gray`` is a confirmed near-duplicate of, with its distances, or None."""
+        for document_id, distance, fine_distance in self.candidates(coarse, fine):
+            document = self.get(document_id)
+            if document is not None and confirm(gray, document["checks"], backend):
+                self.duplicates += 1
+                return {**document, "distance": distance, "fine_distance": fine_distance}
+            self.rejected_candidates += 1
+        return None
+
+    def stats(self):
+        return {"documents": len(self.ids), "lookups": self.lookups, "duplicates": self.duplicates,
+                "rejected_candidates": self.rejected_candidates}
+
+
+registry.register("phash_index", PHashIndex)
@@ -0,0 +1,113 @@
+"""Process-wide registry of lazily created, shared components.
+
+LLM clients, embedding models, vector stores, chains and agent executors are
+registered as factories and only built the first time something asks for them.
+Every module and every Streamlit session in the process then shares the same
+instance, so a role that never touches the loan agent never pays for it.
+Import and initialization times are recorded for the admin dashboard.
+"""
+import os
+import time
+import importlib
+import threading
+from dotenv import load_dotenv
+
+
+class Registry:
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._init_seconds = {}
+        self._import_seconds = {}
+
+    def register(self, name, factory):
+        """Register (or replace) the factory for a component; it is not called yet."""
+        with self._lock:
+            self._factories[name] = factory
+            self._locks.setdefault(name, threading.Lock())
+            self._instances.pop(name, None)
+
+    def get(self, name):
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        if name not in self._factories:
+            raise KeyError(f"No component registered under '{name}'")
+        # Per-component lock: building the loan agent doesn't block the FAQ chain
+        with self._locks[name]:
+            instance = self._instances.get(name)
+            if instance is None:
+                start = time.perf_counter()
+                instance = self._factories[name]()
+                self._init_seconds[name] = time.perf_counter() - start
+                self._instances[name] = instance
+        return instance
+
+    def is_initialized(self, name):
+        return name in self._instances
+
+    def reset(self, name=None):
+        """Drop built instances so they are recreated on next use."""
+        with self._lock:
+            if name is None:
+                self._instances.clear()
+            else:
+                self._instances.pop(name, None)
+
+    def import_module(self, module_name):
+        """Import a (heavy) module, recording how long the first import took."""
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        self._import_seconds.setdefault(module_name, time.perf_counter() - start)
+        return module
+
+    def report(self):
+        """Rows describing every component and heavy import, for display."""
+        rows = [
+            {
+                "component": name,
+                "initialized": name in self._instances,
+                "init_seconds": round(self._init_seconds.get(name, 0.0), 4),
+            }
+            for name in sorted(self._factories)
+        ]
+        rows += [
+            {"component": f"import {module}", "initialized": True, "init_seconds": round(seconds, 4)}
+            for module, seconds in sorted(self._import_seconds.items())
+        ]
+        return rows
+
+
+registry = Registry()
+
+
+# --- Shared models used by several modules ---
+load_dotenv()
+
+
+# All model calls go through the LLM gateway (concurrency limits, retries,
+# coalescing); LLM_PROVIDER picks the provider behind it.
+def create_llm():
+    GatewayLLM = registry.import_module("llm_gateway").GatewayLLM
+    return GatewayLLM(provider=os.getenv("LLM_PROVIDER", "cohere"))
+
+
+def create_streaming_llm():
+    GatewayLLM = registry.import_module("llm_gateway").GatewayLLM
+    return GatewayLLM(provider=os.getenv("LLM_PROVIDER", "cohere"), streaming=True)
+
+
+def create_embeddings():
+    HuggingFaceEmbeddings = registry.import_module("langchain.embeddings").HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+
+
+registry.register("llm", create_llm)
+registry.register("streaming_llm", create_streaming_llm)
+registry.register("embeddings", create_embeddings)
+
+# Offline development, benchmarks and load tests: deterministic fake models
+if os.getenv("HELPDESK_MODELS") == "fake":
+    registry.import_module("benchmarks.fakes").install()
@@ -0,0 +1,143 @@
+"""Semantic answer cache for the FAQ chains.
+
+Incoming questions are embedded and compared (cosine similarity) with the
+questions answered before; anything above the threshold gets the stored answer
+back without a retrieval or LLM call. Entries expire after a TTL, the least
+recently used ones are evicted when the cache is full, and the whole cache is
+dropped when one of the FAQ source files changes.
+"""
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+from cache_utils import file_fingerprint
+
+
+def _normalize_question(question):
+    return re.sub(r"\s+", " ", question.strip().lower())
+
+
+class SemanticCache:
+    def __init__(self, embed_query, threshold=0.92, ttl=86400, maxsize=1000,
+                 sources=(), check_interval=5.0):
+        self.embed_query = embed_query
+        self.threshold = threshold
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.sources = tuple(sources)
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # normalized question -> (unit vector, answer, stored_at)
+        self._entries = OrderedDict()
+        self._matrix = None
+        self._keys = []
+        self._lock = threading.Lock()
+        self._fingerprint = file_fingerprint(self.sources)
+        self._last_check = time.monotonic()
+
+    def _check_sources(self):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        fingerprint = file_fingerprint(self.sources)
+        if fingerprint != self._fingerprint:
+            self._fingerprint = fingerprint
+            self._entries.clear()
+            self._matrix = None
+            self.invalidations += 1
+
+    def _embed(self, question):
+        vector = np.asarray(self.embed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _evict_expired(self):
+        cutoff = time.monotonic() - self.ttl
+        expired = [key for key, (_, _, stored_at) in self._entries.items() if stored_at < cutoff]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def _similarity_matrix(self):
+        if self._matrix is None and self._entries:
+            self._keys = list(self._entries)
+            self._matrix = np.stack([self._entries[key][0] for key in self._keys])
+        return self._matrix
+
+    def lookup(self, question):
+        """Return (answer, vector). ``answer`` is None on a miss; ``vector`` can be
+        passed to store() so the question is not embedded twice."""
+        key = _normalize_question(question)
+        with self._lock:
+            self._check_sources()
+            self._evict_expired()
+            # Exact repeats skip the embedding model entirely
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][1], self._entries[key][0]
+
+        vector = self._embed(question)
+        with self._lock:
+            matrix = self._similarity_matrix()
+            if matrix is not None:
+                scores = matrix @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    match = self._keys[best]
+                    if match in self._entries:
+                        self._entries.move_to_end(match)
+                        self.hits += 1
+                        return self._entries[match][1], vector
+            self.misses += 1
+        return None, vector
+
+    def store(self, question, answer, vector=None):
+        if vector is None:
+            vector = self._embed(question)
+        with self._lock:
+            self._entries[_normalize_question(question)] = (vector, answer, time.monotonic())
+            self._entries.move_to_end(_normalize_question(question))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def get_or_compute(self, question, compute):
+        answer, vector = self.lookup(question)
+        if answer is None:
+            answer = compute(question)
+            self.store(question, answer, vector)
+        return answer
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+def create_semantic_cache(embeddings, sources):
+    """SemanticCache configured from FAQ_CACHE_THRESHOLD, FAQ_CACHE_TTL_SECONDS and FAQ_CACHE_SIZE."""
+    return SemanticCache(
+        embeddings.embed_query,
+        threshold=float(os.getenv("FAQ_CACHE_THRESHOLD", "0.92")),
+        ttl=float(os.getenv("FAQ_CACHE_TTL_SECONDS", "86400")),
+        maxsize=int(os.getenv("FAQ_CACHE_SIZE", "1000")),
+        sources=sources,
+    )
@@ -0,0 +1,50 @@
+"""Streams agent output into Streamlit placeholders as it is produced."""
+import time
+import streamlit as st
+from langchain.callbacks.base import BaseCallbackHandler
+
+
+class StreamlitAgentHandler(BaseCallbackHandler):
+    """Renders LLM tokens and tool steps live and measures time to first token."""
+
+    def __init__(self, token_placeholder, steps_container):
+        self.token_placeholder = token_placeholder
+        self.steps_container = steps_container
+        self.start = time.perf_counter()
+        self.first_token_seconds = None
+        self.steps = 0
+        self._text = ""
+
+    def _mark_first_output(self):
+        if self.first_token_seconds is None:
+            self.first_token_seconds = time.perf_counter() - self.start
+
+    def on_llm_new_token(self, token, **kwargs):
+        self._mark_first_output()
+        self._text += token
+        self.token_placeholder.markdown(self._text)
+
+    def on_llm_end(self, response, **kwargs):
+        # Providers without token streaming still deliver the whole completion here
+        self._mark_first_output()
+        if not self._text:
+            generations = getattr(response, "generations", None) or [[]]
+            if generations[0]:
+                self.token_placeholder.markdown(generations[0][0].text)
+        self._text = ""
+
+    def on_agent_action(self, action, **kwargs):
+        self.steps += 1
+        with self.steps_container:
+            st.markdown(f"**Step {self.steps}:**")
+            st.markdown(f"*Tool:* `{action.tool}`")
+            st.code(action.tool_input)
+
+    def on_tool_end(self, output, **kwargs):
+        with self.steps_container:
+            st.markdown(f"**Response:** {output}")
+            st.markdown("---")
+
+    @property
+    def total_seconds(self):
+        return time.perf_counter() - self.start
@@ -0,0 +1,161 @@
+"""Memoized agent tool functions.
+
+A ReAct run often calls the same tool several times with inputs that differ
+only in whitespace or JSON key order. ``memoize`` wraps a tool function so the
+input is canonicalized first and an equivalent call is answered from a
+per-tool LRU cache with its own TTL and size. A tool whose result depends on
+outside state (the loan budget) is cleared with ``invalidate`` when that
+state changes. A tool built from source files (the FAQ JSON) is cleared
+automatically when a source changes.
+
+``track()`` scopes a request, such as one agent run. It counts the tool calls
+made and how many were answered from the cache. It also counts the LLM calls
+those cached answers avoided (a FAQ tool runs a QA chain per call).
+
+TTL and size can be overridden per tool with ``TOOL_MEMO_TTL_<TOOL>`` and
+``TOOL_MEMO_SIZE_<TOOL>``, e.g. ``TOOL_MEMO_TTL_STUDENT_LOAN_AGENT=10``.
+``TOOL_MEMO_ENABLED=0`` turns memoization off.
+"""
+import os
+import re
+import json
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from cache_utils import LRUCache, file_fingerprint
+
+_MISSING = object()
+_current_request = ContextVar("tool_memo_request", default=None)
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return {str(key).strip(): _canonical(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_canonical(item) for item in value]
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value.strip())
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def canonical_input(query):
+    """Cache key for a tool input: sorted compact JSON when it parses, else whitespace-collapsed text."""
+    text = query if isinstance(query, str) else json.dumps(query, default=str)
+    # Agents sometimes wrap the JSON action input in backticks or quotes
+    stripped = text.strip().strip("`'\"").strip()
+    try:
+        value = json.loads(stripped)
+    except ValueError:
+        return re.sub(r"\s+", " ", text.strip())
+    return json.dumps(_canonical(value), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+class RequestSavings:
+    """Tool calls and cache savings within one ``track()`` scope."""
+
+    def __init__(self):
+        self.tool_calls = 0
+        self.saved_calls = 0
+        self.saved_llm_calls = 0
+
+    def to_dict(self):
+        return {"tool_calls": self.tool_calls, "saved_tool_calls": self.saved_calls,
+                "saved_llm_calls": self.saved_llm_calls}
+
+
+class MemoizedTool:
+    def __init__(self, name, func, ttl=300.0, maxsize=256, llm_calls=0, sources=()):
+        self.name = name
+        self.func = func
+        self.llm_calls = llm_calls
+        self.sources = tuple(sources)
+        self.cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.invalidations = 0
+        self._fingerprint = file_fingerprint(self.sources)
+
+    def __call__(self, query):
+        if self.sources:
+            fingerprint = file_fingerprint(self.sources)
+            if fingerprint != self._fingerprint:
+                self._fingerprint = fingerprint
+                self.invalidate()
+        key = canonical_input(query)
+        result = self.cache.get(key, _MISSING)
+        request = _current_request.get()
+        if request is not None:
+            request.tool_calls += 1
+        if result is not _MISSING:
+            if request is not None:
+                request.saved_calls += 1
+                request.saved_llm_calls += self.llm_calls
+            return result
+        result = self.func(query)
+        self.cache.set(key, result)
+        return result
+
+    def invalidate(self):
+        self.cache.clear()
+        self.invalidations += 1
+
+    def stats(self):
+        return {"tool": self.name, **self.cache.stats(), "invalidations": self.invalidations,
+                "ttl_seconds": self.cache.ttl, "maxsize": self.cache.maxsize}
+
+
+class ToolMemo:
+    """The memoized tools of this process plus per-request savings totals."""
+
+    def __init__(self):
+        self._tools = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.requests_with_savings = 0
+        self.saved_calls = 0
+        self.saved_llm_calls = 0
+
+    def memoize(self, name, func, ttl=300.0, maxsize=256, llm_calls=0, sources=()):
+        """Wrap ``func`` (one string input, as LangChain tools take) for the tool ``name``."""
+        if os.getenv("TOOL_MEMO_ENABLED", "1") == "0":
+            return func
+        slug = re.sub(r"\W+", "_", name).strip("_").upper()
+        ttl = float(os.getenv(f"TOOL_MEMO_TTL_{slug}", ttl))
+        maxsize = int(os.getenv(f"TOOL_MEMO_SIZE_{slug}", maxsize))
+        tool = MemoizedTool(name, func, ttl, maxsize, llm_calls, sources)
+        with self._lock:
+            self._tools[name] = tool
+        return tool
+
+    def invalidate(self, name):
+        tool = self._tools.get(name)
+        if tool is not None:
+            tool.invalidate()
+
+    @contextmanager
+    def track(self):
+        savings = RequestSavings()
+        token = _current_request.set(savings)
+        try:
+            yield savings
+        finally:
+            _current_request.reset(token)
+            with self._lock:
+                self.requests += 1
+                self.requests_with_savings += savings.saved_calls > 0
+                self.saved_calls += savings.saved_calls
+                self.saved_llm_calls += savings.saved_llm_calls
+
+    def stats(self):
+        return [tool.stats() for tool in list(self._tools.values())]
+
+    def summary(self):
+        with self._lock:
+            return {"requests": self.requests, "requests_with_savings": self.requests_with_savings,
+                    "saved_tool_calls": self.saved_calls, "saved_llm_calls": self.saved_llm_calls}
+
+
+tool_memo = ToolMemo()
+memoize = tool_memo.memoize
+invalidate = tool_memo.invalidate
+track = tool_memo.track
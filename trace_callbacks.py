@@ -0,0 +1,67 @@
+"""LangChain callbacks that turn LLM calls, tool runs and retrievals into spans."""
+import threading
+from langchain.callbacks.base import BaseCallbackHandler
+from tracing import tracer, _current_span
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Opens a span per LLM call, tool invocation and retriever query.
+
+    Spans nest under the span of their LangChain parent run when there is one,
+    otherwise under whatever span is current when the run starts. Tool spans
+    become the current span while the tool runs, so stages traced inside the
+    tool (the FAQ chain, the decision engines) show up beneath it.
+    """
+
+    def __init__(self):
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, parent_run_id, name, activate=False, **attrs):
+        with self._lock:
+            parent = self._spans.get(parent_run_id) if parent_run_id else None
+        span = tracer.child_span(name, parent or _current_span.get(), **attrs)
+        if activate:
+            span.start()
+        with self._lock:
+            self._spans[run_id] = span
+
+    def _end(self, run_id, error=None, **attrs):
+        with self._lock:
+            span = self._spans.pop(run_id, None)
+        if span is not None:
+            span.set(**attrs)
+            span.end(error)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, "llm", prompt_chars=sum(len(p) for p in prompts))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        generations = getattr(response, "generations", None) or [[]]
+        text = generations[0][0].text if generations[0] else ""
+        self._end(run_id, completion_chars=len(text))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self._start(run_id, parent_run_id, f"tool:{name}", activate=True)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, "retrieval")
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id, documents=len(documents))
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+
+tracing_handler = TracingCallbackHandler()
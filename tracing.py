@@ -0,0 +1,253 @@
+"""Lightweight span tracing for the admission pipeline.
+
+Stages are wrapped in spans (``with tracer.span("tesseract"):`` or the
+``@traced`` decorator). Spans opened inside another span become its children
+through a context variable, so each request produces one trace that can be
+drawn as a waterfall. Finished traces are kept in memory (and optionally
+appended as JSON lines to ``TRACE_EXPORT_PATH``), and per-stage latencies feed
+p50/p95/p99 and a Prometheus text exposition.
+
+``TRACING_ENABLED=0`` turns every span into a shared no-op object, so the
+instrumented code pays one attribute check per stage.
+"""
+import os
+import json
+import time
+import uuid
+import threading
+import functools
+import contextvars
+from collections import deque
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class _NoopSpan:
+    def start(self):
+        return self
+
+    def end(self, error=None):
+        pass
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "attrs", "trace_id", "span_id", "parent", "root",
+                 "spans", "start_ts", "start_time", "duration", "error", "_token")
+
+    def __init__(self, tracer, name, attrs, parent=None):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent = parent
+        self.root = parent.root if parent is not None else self
+        self.trace_id = self.root.span_id
+        self.spans = [] if parent is None else None
+        self.start_ts = time.time()
+        self.start_time = time.perf_counter()
+        self.duration = None
+        self.error = None
+        self._token = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def start(self):
+        """Make this the current span, so spans opened from here are its children."""
+        self._token = _current_span.set(self)
+        return self
+
+    def end(self, error=None):
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self.start_time
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        if self._token is not None:
+            try:
+                _current_span.reset(self._token)
+            except ValueError:
+                # Ended from a different context (e.g. a callback thread)
+                _current_span.set(self.parent)
+            self._token = None
+        self.tracer._finish(self)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end(exc if isinstance(exc, Exception) else None)
+        return False
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent is not None else None,
+            "start_ms": round((self.start_time - self.root.start_time) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+            "error": self.error,
+            "attrs": self.attrs,
+        }
+
+
+def _percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class Tracer:
+    def __init__(self, enabled=True, max_traces=200, samples_per_stage=2048, export_path=None):
+        self.enabled = enabled
+        self.max_traces = max_traces
+        self.samples_per_stage = samples_per_stage
+        self.export_path = export_path
+        self._traces = deque(maxlen=max_traces)
+        self._samples = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            enabled=os.getenv("TRACING_ENABLED", "1") != "0",
+            max_traces=int(os.getenv("TRACING_MAX_TRACES", "200")),
+            export_path=os.getenv("TRACE_EXPORT_PATH") or None,
+        )
+
+    def span(self, name, **attrs):
+        """Child of the current span, or the root of a new trace."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attrs, _current_span.get())
+
+    def child_span(self, name, parent, **attrs):
+        """Span with an explicit parent, for code that can't rely on the context (callbacks)."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attrs, parent)
+
+    def record(self, name, seconds, **attrs):
+        """Add an already measured stage that ended just now under the current span."""
+        if not self.enabled:
+            return
+        span = Span(self, name, attrs, _current_span.get())
+        span.start_time -= seconds
+        span.start_ts -= seconds
+        span.end()
+
+    def _finish(self, span):
+        with self._lock:
+            samples = self._samples.get(span.name)
+            if samples is None:
+                samples = self._samples[span.name] = deque(maxlen=self.samples_per_stage)
+            samples.append(span.duration)
+            total = self._totals.setdefault(span.name, [0, 0.0, 0])
+            total[0] += 1
+            total[1] += span.duration
+            total[2] += span.error is not None
+            if span.parent is not None:
+                # Children that outlive their root (late callbacks) only count towards the stats
+                if span.root.spans is not None:
+                    span.root.spans.append(span)
+                return
+            trace = {
+                "trace_id": span.trace_id,
+                "name": span.name,
+                "start_ts": span.start_ts,
+                "duration_ms": round(span.duration * 1000, 3),
+                "spans": [span.to_dict()] + [child.to_dict() for child in sorted(span.spans, key=lambda c: c.start_time)],
+            }
+            span.spans = None
+            self._traces.append(trace)
+        if self.export_path:
+            with open(self.export_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(trace, default=str) + "\n")
+
+    def traces(self, limit=None):
+        """Most recent finished traces first."""
+        with self._lock:
+            traces = list(self._traces)[::-1]
+        return traces[:limit] if limit else traces
+
+    def export_json(self, limit=None):
+        return json.dumps(self.traces(limit), indent=2, default=str)
+
+    def stage_percentiles(self, percentiles=(50, 95, 99)):
+        """Rows of {stage, count, errors, p50_ms, p95_ms, p99_ms} over recent samples."""
+        with self._lock:
+            snapshot = {name: sorted(samples) for name, samples in self._samples.items()}
+            totals = {name: list(total) for name, total in self._totals.items()}
+        rows = []
+        for name, values in sorted(snapshot.items()):
+            row = {"stage": name, "count": totals[name][0], "errors": totals[name][2]}
+            for p in percentiles:
+                row[f"p{p}_ms"] = round(_percentile(values, p) * 1000, 3)
+            rows.append(row)
+        return rows
+
+    def prometheus(self, prefix="admission_stage"):
+        """Prometheus text exposition: a summary per stage plus an error counter."""
+        lines = [
+            f"# HELP {prefix}_seconds Time spent in each pipeline stage.",
+            f"# TYPE {prefix}_seconds summary",
+        ]
+        with self._lock:
+            snapshot = {name: sorted(samples) for name, samples in self._samples.items()}
+            totals = {name: list(total) for name, total in self._totals.items()}
+        for name, values in sorted(snapshot.items()):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            for q in (0.5, 0.95, 0.99):
+                lines.append(f'{prefix}_seconds{{stage="{label}",quantile="{q}"}} {_percentile(values, q * 100):.6f}')
+            lines.append(f'{prefix}_seconds_sum{{stage="{label}"}} {totals[name][1]:.6f}')
+            lines.append(f'{prefix}_seconds_count{{stage="{label}"}} {totals[name][0]}')
+        lines += [f"# HELP {prefix}_errors_total Spans that ended with an exception.",
+                  f"# TYPE {prefix}_errors_total counter"]
+        for name, total in sorted(totals.items()):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'{prefix}_errors_total{{stage="{label}"}} {total[2]}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._traces.clear()
+            self._samples.clear()
+            self._totals.clear()
+
+
+tracer = Tracer.from_env()
+
+
+def traced(name):
+    """Decorator: run the function inside a span called ``name``."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def langchain_callbacks():
+    """Callback list that adds LLM, tool and retriever spans to the current trace."""
+    if not tracer.enabled:
+        return []
+    from trace_callbacks import tracing_handler
+    return [tracing_handler]
@@ -0,0 +1,312 @@
+"""In-process vector index over quantized, memory-mapped embeddings.
+
+Vectors are unit-normalized and stored as one contiguous int8 matrix with a
+per-row scale (a quarter of float32), or as float16, in ``vectors.npy``. The
+file is opened with ``mmap_mode="r"``, so the OS page cache holds it once for
+every process. int8 is the default because it also decodes much faster than
+float16 on CPUs without native half-precision conversion. Search is cosine
+similarity with vectorized NumPy:
+
+* small indexes are scanned brute force, in row chunks;
+* from ``VECTOR_INDEX_IVF_MIN_ROWS`` rows, k-means partitions the rows into
+  ``sqrt(n)`` clusters stored contiguously. A query only scans the ``nprobe``
+  clusters nearest to it.
+
+Queries can be batched: each scanned block is decoded once and multiplied with
+every query that needs it. Entries carry metadata, and
+``filter={"domain": "loan"}`` restricts a search, so several FAQ domains share
+one index.
+
+Each build writes its files under a new version name and then swaps in the
+manifest that points at them. A rebuild never touches files an open index
+still has mapped (Windows refuses to replace those), and concurrent rebuilds
+in several processes don't collide. Files of old versions are removed once
+they are ``STALE_SECONDS`` old and no longer mapped.
+"""
+import os
+import json
+import time
+import uuid
+import tempfile
+from typing import Any, List, Optional
+import numpy as np
+
+try:
+    from langchain_core.documents import Document
+    from langchain_core.retrievers import BaseRetriever
+except ImportError:  # optional: only needed to plug the index into LangChain chains
+    BaseRetriever = None
+
+VECTOR_DTYPES = ("float16", "int8")
+IVF_MIN_ROWS = int(os.getenv("VECTOR_INDEX_IVF_MIN_ROWS", "20000"))
+DEFAULT_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", "8"))
+# Rows converted to float32 at a time while scanning
+CHUNK_ROWS = 32768
+
+MANIFEST_NAME = "manifest.json"
+VERSIONED_FILES = ("vectors", "scales", "centroids", "offsets", "entries")
+# Old versions are kept this long for processes that read the previous manifest
+STALE_SECONDS = 300
+
+
+def normalize(vectors):
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize(vectors, dtype):
+    """(stored matrix, per-row scales or None) for unit vectors."""
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+    raise ValueError(f"Unsupported vector dtype '{dtype}' (choose from {', '.join(VECTOR_DTYPES)})")
+
+
+def kmeans(vectors, nlist, iterations=10, sample=50000, seed=0):
+    """Spherical k-means centroids, trained on a sample of the rows."""
+    rng = np.random.default_rng(seed)
+    train = vectors[rng.choice(len(vectors), min(sample, len(vectors)), replace=False)]
+    centroids = train[rng.choice(len(train), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(train @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, train)
+        counts = np.bincount(assignment, minlength=nlist)
+        # Empty clusters keep their previous centroid
+        centroids = normalize(np.where(counts[:, None] > 0, sums, centroids))
+    return centroids
+
+
+def assign(vectors, centroids):
+    return np.concatenate([
+        np.argmax(vectors[start:start + CHUNK_ROWS] @ centroids.T, axis=1)
+        for start in range(0, len(vectors), CHUNK_ROWS)
+    ]) if len(vectors) else np.zeros(0, dtype=np.int64)
+
+
+def _file_name(stem, version, extension=".npy"):
+    # Indexes built before versioning have unversioned file names
+    return f"{stem}-{version}{extension}" if version else f"{stem}{extension}"
+
+
+def _write(directory, name, write, mode="wb"):
+    """Write to a unique temporary file beside the target, then swap it in, so
+    readers never see a half-written file."""
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+            write(f)
+        os.replace(tmp, os.path.join(directory, name))
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _save(directory, name, array):
+    _write(directory, name, lambda f: np.save(f, array))
+
+
+def _remove_stale(directory, version):
+    """Delete files of other versions older than STALE_SECONDS; files still
+    mapped somewhere can't be deleted on Windows and are left for a later build."""
+    cutoff = time.time() - STALE_SECONDS
+    for name in os.listdir(directory):
+        # Unversioned names are from indexes built before versioning
+        stem = name.split("-", 1)[0].split(".", 1)[0]
+        if stem not in VERSIONED_FILES or name.endswith(".tmp") or f"-{version}." in name:
+            continue
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+class VectorIndex:
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST_NAME), "r") as f:
+            self.manifest = json.load(f)
+        version = self.manifest.get("version")
+        path = lambda stem, extension=".npy": os.path.join(directory, _file_name(stem, version, extension))
+        with open(path("entries", ".json"), "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        self.ids, self.texts, self.metadata = entries["ids"], entries["texts"], entries["metadata"]
+        self.vectors = np.load(path("vectors"), mmap_mode="r")
+        # Plain ndarray view of the mapping: slicing it skips the memmap subclass overhead
+        self._matrix = np.asarray(self.vectors)
+        self.scales = np.load(path("scales")) if self.manifest["dtype"] == "int8" else None
+        if self.manifest.get("nlist"):
+            self.centroids = np.load(path("centroids"))
+            self.offsets = np.load(path("offsets"))
+        else:
+            self.centroids = self.offsets = None
+        self._codes = {}
+        self._masks = {}
+        self.last_sync = None
+
+    @classmethod
+    def build(cls, directory, ids, texts, vectors, metadata=None, dtype="int8", nlist=None, manifest=None):
+        """Write a new index to ``directory`` and open it."""
+        vectors = normalize(vectors) if len(ids) else np.zeros((0, 0), dtype=np.float32)
+        metadata = list(metadata) if metadata is not None else [{} for _ in ids]
+        ids, texts = list(ids), list(texts)
+        if nlist is None:
+            nlist = int(np.sqrt(len(ids))) if len(ids) >= IVF_MIN_ROWS else 0
+
+        os.makedirs(directory, exist_ok=True)
+        version = f"{int(time.time() * 1000):x}{uuid.uuid4().hex[:8]}"
+        if nlist:
+            centroids = kmeans(vectors, nlist)
+            assignment = assign(vectors, centroids)
+            # Rows of one cluster are stored contiguously so probing it is a single slice
+            order = np.argsort(assignment, kind="stable")
+            vectors = vectors[order]
+            ids, texts, metadata = [ids[i] for i in order], [texts[i] for i in order], [metadata[i] for i in order]
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=nlist))])
+            _save(directory, _file_name("centroids", version), centroids)
+            _save(directory, _file_name("offsets", version), offsets)
+
+        stored, scales = quantize(vectors, dtype)
+        _save(directory, _file_name("vectors", version), stored)
+        if scales is not None:
+            _save(directory, _file_name("scales", version), scales)
+        _write(directory, _file_name("entries", version, ".json"),
+               lambda f: json.dump({"ids": ids, "texts": texts, "metadata": metadata}, f), "w")
+        # The manifest goes last: it is what switches readers to the new version
+        _write(directory, MANIFEST_NAME, lambda f: json.dump(
+            {**(manifest or {}), "version": version, "dtype": dtype, "count": len(ids),
+             "dim": int(vectors.shape[1]) if len(ids) else 0, "nlist": nlist}, f, indent=2), "w")
+        _remove_stale(directory, version)
+        return cls(directory)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def nbytes(self):
+        """Bytes of vector data (matrix, scales and centroids)."""
+        return sum(a.nbytes for a in (self.vectors, self.scales, self.centroids) if a is not None)
+
+    def dequantize(self, rows):
+        vectors = self.vectors[rows].astype(np.float32)
+        return vectors * self.scales[rows, None] if self.scales is not None else vectors
+
+    def _scan(self, start, stop, queries):
+        """Scores (rows x queries) of one contiguous row range, decoded to float32 once."""
+        block = self._matrix[start:stop].astype(np.float32) @ queries.T
+        if self.scales is not None:
+            block *= self.scales[start:stop, None]
+        return block
+
+    def _brute_force(self, queries):
+        rows = np.arange(len(self))
+        scores = np.concatenate([self._scan(start, min(start + CHUNK_ROWS, len(self)), queries)
+                                 for start in range(0, len(self), CHUNK_ROWS)])
+        return [(rows, scores[:, j]) for j in range(len(queries))]
+
+    def _probe(self, queries, nprobe):
+        """Per-query (rows, scores) from the nearest clusters. A cluster probed by
+        several queries of a batch is decoded once and scored for all of them."""
+        nprobe = min(nprobe or DEFAULT_NPROBE, len(self.centroids))
+        probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        if len(queries) == 1:
+            # One query: gather its clusters in the stored dtype and decode them in a single cast
+            ranges = [(self.offsets[c], self.offsets[c + 1]) for c in probes[0]]
+            rows = np.concatenate([np.arange(start, stop) for start, stop in ranges])
+            block = np.concatenate([self._matrix[start:stop] for start, stop in ranges])
+            scores = block.astype(np.float32) @ queries[0]
+            if self.scales is not None:
+                scores *= self.scales[rows]
+            return [(rows, scores)]
+        rows, scores = [[] for _ in queries], [[] for _ in queries]
+        for cluster in np.unique(probes):
+            start, stop = self.offsets[cluster], self.offsets[cluster + 1]
+            if start == stop:
+                continue
+            members = np.flatnonzero((probes == cluster).any(axis=1))
+            block = self._scan(start, stop, queries[members])
+            cluster_rows = np.arange(start, stop)
+            for column, j in enumerate(members):
+                rows[j].append(cluster_rows)
+                scores[j].append(block[:, column])
+        return [(np.concatenate(r), np.concatenate(s)) if r else (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+                for r, s in zip(rows, scores)]
+
+    @staticmethod
+    def _top(rows, scores, k):
+        best = np.argpartition(-scores, k - 1)[:k] if len(rows) > k else np.arange(len(rows))
+        best = best[np.argsort(-scores[best])]
+        return [(int(rows[i]), float(scores[i])) for i in best]
+
+    def _mask(self, filter):
+        """Boolean row mask for ``{key: value or [values]}`` metadata filters (cached per filter)."""
+        filter = {key: tuple(sorted(wanted)) if isinstance(wanted, (list, tuple, set)) else (wanted,)
+                  for key, wanted in filter.items()}
+        cache_key = tuple(sorted(filter.items()))
+        if cache_key in self._masks:
+            return self._masks[cache_key]
+        mask = None
+        for key, wanted in filter.items():
+            if key not in self._codes:
+                values = {}
+                codes = np.fromiter((values.setdefault(m.get(key), len(values)) for m in self.metadata),
+                                    dtype=np.int32, count=len(self.metadata))
+                self._codes[key] = (codes, values)
+            codes, values = self._codes[key]
+            key_mask = np.isin(codes, [values[v] for v in wanted if v in values])
+            mask = key_mask if mask is None else mask & key_mask
+        self._masks[cache_key] = mask
+        return mask
+
+    def search(self, queries, k=4, filter=None, nprobe=None):
+        """Top-k (row, score) lists, one per query vector, best first."""
+        queries = normalize(queries)
+        if not len(self) or k <= 0:
+            return [[] for _ in queries]
+        mask = self._mask(filter) if filter else None
+        candidates = self._brute_force(queries) if self.centroids is None else self._probe(queries, nprobe)
+        results = []
+        for j, (rows, scores) in enumerate(candidates):
+            if mask is not None:
+                keep = mask[rows]
+                if self.centroids is not None and keep.sum() < min(k, mask.sum()):
+                    # Too few matching rows in the probed clusters: scan everything
+                    rows, scores = self._brute_force(queries[j:j + 1])[0]
+                    keep = mask[rows]
+                rows, scores = rows[keep], scores[keep]
+            results.append(self._top(rows, scores, k))
+        return results
+
+    def documents(self, hits):
+        return [Document(page_content=self.texts[row], metadata={**self.metadata[row], "score": score})
+                for row, score in hits]
+
+    def as_retriever(self, embeddings, k=4, filter=None, nprobe=None):
+        if BaseRetriever is None:
+            raise ImportError("The LangChain retriever needs langchain-core (pip install langchain-core)")
+        return VectorIndexRetriever(index=self, embeddings=embeddings, k=k, filter=filter, nprobe=nprobe)
+
+
+if BaseRetriever is not None:
+    class VectorIndexRetriever(BaseRetriever):
+        """LangChain retriever over a ``VectorIndex``; ``batch_documents`` embeds and searches many queries at once."""
+
+        index: Any
+        embeddings: Any
+        k: int = 4
+        filter: Optional[dict] = None
+        nprobe: Optional[int] = None
+
+        def _get_relevant_documents(self, query, *, run_manager=None) -> List[Document]:
+            hits = self.index.search(self.embeddings.embed_query(query), self.k, self.filter, self.nprobe)[0]
+            return self.index.documents(hits)
+
+        def batch_documents(self, queries):
+            vectors = self.embeddings.embed_documents(list(queries))
+            return [self.index.documents(hits) for hits in self.index.search(vectors, self.k, self.filter, self.nprobe)]